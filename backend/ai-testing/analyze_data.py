@@ -7,197 +7,1387 @@ import pandas as pd
 import numpy as np
 import sys
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
+import re
+import glob
+import io
+import hashlib
+import tempfile
+import json
+import itertools
+import functools
+import time
+import argparse
+import contextlib
+import warnings
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone
+from dataclasses import dataclass, replace
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def load_and_clean_data(filepath):
-    """Load CSV data and handle missing values."""
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# matplotlib, seaborn and pyarrow are imported where they are used: the plotting stack alone costs about a
+# second of startup, which dominates report-only runs on small trials
+
+# Raw experiment files are named <experiment>_raw_<timestamp>.csv
+RAW_FILE_PATTERN = re.compile(r'_raw_[^_]+\.csv$')
+
+# Known raw data schema, covering both readability_length_exp_raw and the older acc_readability_exp_raw files
+NUMERIC_COLUMNS = ['TargetLength', 'ActualWordCount', 'NLI_DataCollection', 
+                   'NLI_PrivacyExplanation', 'NLI_AverageScore', 
+                   'FleschKincaid', 'ColemanLiau', 'WordFrequencyScore']
+CATEGORICAL_COLUMNS = ['EventKey', 'InstructionType']
+# Bookkeeping columns some raw files carry (run_experiments.py's Repetition), never analyzed
+BOOKKEEPING_COLUMNS = ['Repetition']
+
+# Applied by the CSV parser itself: keys become categoricals, N/A becomes NaN and numbers are parsed in place
+RAW_CSV_OPTIONS = {
+    'dtype': {col: 'category' for col in CATEGORICAL_COLUMNS},
+    'na_values': ['N/A'],
+}
+
+AGGREGATE_METRICS = ['ActualWordCount', 'NLI_DataCollection', 'NLI_PrivacyExplanation', 
+                     'NLI_AverageScore', 'FleschKincaid', 'WordFrequencyScore']
+LENGTH_METRICS = ['LengthRatio', 'LengthDifference', 'LengthAccuracy']
+CORRELATION_PAIRS = list(itertools.combinations(AGGREGATE_METRICS, 2))
+
+# Reported correlations as (name, metric, metric, sign). FleschKincaid is a grade level (higher means harder
+# to read), so its correlations are reported with the sign flipped.
+OVERALL_CORRELATIONS = [
+    ('Length_vs_NLI_Avg', 'ActualWordCount', 'NLI_AverageScore', 1),
+    ('Length_vs_NLI_DataCollection', 'ActualWordCount', 'NLI_DataCollection', 1),
+    ('Length_vs_NLI_PrivacyExplanation', 'ActualWordCount', 'NLI_PrivacyExplanation', 1),
+    ('Length_vs_FleschKincaid', 'ActualWordCount', 'FleschKincaid', -1),
+    ('Length_vs_WordFrequency', 'ActualWordCount', 'WordFrequencyScore', 1),
+    ('NLI_Avg_vs_FleschKincaid', 'NLI_AverageScore', 'FleschKincaid', -1),
+    ('NLI_Avg_vs_WordFrequency', 'NLI_AverageScore', 'WordFrequencyScore', 1),
+    ('NLI_DataCollection_vs_FleschKincaid', 'NLI_DataCollection', 'FleschKincaid', -1),
+    ('NLI_DataCollection_vs_WordFrequency', 'NLI_DataCollection', 'WordFrequencyScore', 1),
+    ('NLI_PrivacyExplanation_vs_FleschKincaid', 'NLI_PrivacyExplanation', 'FleschKincaid', -1),
+    ('NLI_PrivacyExplanation_vs_WordFrequency', 'NLI_PrivacyExplanation', 'WordFrequencyScore', 1),
+]
+LENGTH_CONTROLLED_CORRELATIONS = [
+    (f'{nli_col}_vs_{name}', nli_col, metric, sign)
+    for nli_col in ['NLI_AverageScore', 'NLI_DataCollection', 'NLI_PrivacyExplanation']
+    for name, metric, sign in [('FleschKincaid', 'FleschKincaid', -1), ('WordFrequency', 'WordFrequencyScore', 1)]
+]
+# Metrics regressed on ActualWordCount plus indicators of each categorical column (see calculate_metric_regressions)
+REGRESSION_METRICS = ['NLI_DataCollection', 'NLI_PrivacyExplanation', 'NLI_AverageScore', 'FleschKincaid',
+                      'ColemanLiau', 'WordFrequencyScore']
+REGRESSION_FACTORS = ['EventKey', 'InstructionType']
+
+# Partial correlations regress ActualWordCount out of the metrics, plus fixed effects of each of these sets of
+# categorical columns (the ones a file lacks are left out)
+PARTIAL_CORRELATION_FIXED_EFFECTS = [[], ['EventKey'], ['EventKey', 'InstructionType']]
+
+# Report families that can be skipped, and the grouping set each aggregate family is rolled up from
+REPORT_FAMILIES = ['by_length', 'overall', 'by_event', 'length_analysis', 'correlations', 'regression']
+AGGREGATE_GROUPING_SETS = {
+    'by_length': ['TargetLength'],
+    'overall': [],
+    'by_event': ['EventKey'],
+    'length_analysis': ['TargetLength'],
+}
+
+# Report files written for each family
+FAMILY_REPORTS = {
+    'by_length': ['by_length'],
+    'overall': ['overall'],
+    'by_event': ['by_event'],
+    'length_analysis': ['length_analysis'],
+    'correlations': ['overall_correlations', 'length_controlled_correlations', 'partial_correlations',
+                     'window_correlations'],
+    'regression': ['metric_regressions'],
+}
+FIGURES = ['metrics_by_length_scatter', 'correlation_analysis', 'correlation_matrix']
+# Report families a figure is drawn from (the others are drawn from the cleaned data)
+FIGURE_INPUTS = {'correlation_analysis': ['correlations']}
+
+# Every report family and figure is a stage whose outputs are reused while its key (code version, raw data
+# content hash and parameters) matches the stage manifest kept next to the reports. Bump a stage's version
+# whenever the code producing its output changes, so only that stage is redone on the next sweep.
+STAGE_VERSIONS = {
+    'by_length': 2,
+    'overall': 2,
+    'by_event': 2,
+    'length_analysis': 2,
+    'correlations': 2,
+    'regression': 1,
+    'metrics_by_length_scatter': 1,
+    'correlation_analysis': 1,
+    'correlation_matrix': 1,
+}
+STAGE_MANIFEST_VERSION = 1
+
+# Sufficient statistics persisted by --incremental runs; bump when their layout changes
+INCREMENTAL_STATS_VERSION = 1
+
+# Reports are rounded to this many decimals for readability when they are written, never in memory
+REPORT_DECIMALS = 4
+# Bump when the layout of the --bundle zip changes
+BUNDLE_VERSION = 1
+
+# Cleaned frames are cached as Feather (Arrow IPC) files in a directory next to each raw CSV, keyed by
+# the CSV's content hash and the loader version. Bump LOADER_VERSION whenever the cleaning rules change.
+LOADER_VERSION = 3
+RAW_CACHE_DIR = '.raw_cache'
+
+def _import_feather():
+    """The pyarrow feather module, or None when pyarrow is not installed."""
     try:
-        df = pd.read_csv(filepath)
-        print(f"Loaded {len(df)} rows from {filepath}")
-        
-        # Convert N/A strings to NaN for proper handling
-        df = df.replace('N/A', np.nan)
-        
-        # Convert numeric columns to proper types
-        numeric_columns = ['TargetLength', 'ActualWordCount', 'NLI_DataCollection', 
-                            'NLI_PrivacyExplanation', 'NLI_AverageScore', 
-                            'FleschKincaid', 'WordFrequencyScore']
+        from pyarrow import feather
+    except ImportError:
+        return None
+    return feather
+
+def _coerce_numeric_columns(df):
+    """Coerce numeric schema columns the parser could not read as numbers (stray text becomes NaN)."""
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+def compact_dtypes(df, float32=False):
+    """
+    Store the cleaned frame compactly: key columns as categoricals and float metrics as float32 where every
+    value survives the round trip. Integral columns (TargetLength, word counts) stay int64, since the reports
+    and the old visualizations do arithmetic on them that a narrower type would overflow.
+    float32=True narrows every float metric (about 7 significant digits), which is for pooled frames
+    where memory matters more than the last digits.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    
+    for col in NUMERIC_COLUMNS:
+        if col not in df.columns:
+            continue
+        if pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype(np.int64)
+        elif df[col].dtype == np.float64:
+            narrow = df[col].astype(np.float32)
+            if float32 or np.array_equal(narrow.to_numpy(dtype=float), df[col].to_numpy(), equal_nan=True):
+                df[col] = narrow
+    return df
+
+def memory_report(df):
+    """
+    Bytes per row of each column as the original loader laid the frame out (object strings, 64-bit numbers),
+    in the compact layout of df, and with every float metric narrowed to float32.
+    """
+    legacy = df.astype({col: object if isinstance(dtype, pd.CategoricalDtype) else
+                        (np.float64 if dtype.kind == 'f' else np.int64)
+                        for col, dtype in df.dtypes.items()})
+    narrow = compact_dtypes(df.copy(), float32=True)
+    rows = max(len(df), 1)
+    
+    report = pd.DataFrame({
+        'Column': list(df.columns),
+        'LegacyDtype': [str(dtype) for dtype in legacy.dtypes],
+        'LegacyBytesPerRow': legacy.memory_usage(index=False, deep=True).to_numpy() / rows,
+        'CompactDtype': [str(dtype) for dtype in df.dtypes],
+        'CompactBytesPerRow': df.memory_usage(index=False, deep=True).to_numpy() / rows,
+        'Float32BytesPerRow': narrow.memory_usage(index=False, deep=True).to_numpy() / rows,
+    })
+    totals = report[['LegacyBytesPerRow', 'CompactBytesPerRow', 'Float32BytesPerRow']].sum()
+    return pd.concat([report, pd.DataFrame([{'Column': 'Total', **totals}])], ignore_index=True)
+
+def print_memory_report(df):
+    """Print memory_report(df) to console."""
+    report = memory_report(df)
+    print("\n" + "="*60)
+    print(" MEMORY PER ROW")
+    print("="*60)
+    print(f" {'Column':<24}{'Legacy':>18}{'Compact':>18}{'float32':>10}")
+    for row in report.itertuples(index=False):
+        legacy = f"{row.LegacyBytesPerRow:.1f} {row.LegacyDtype}" if row.Column != 'Total' else f"{row.LegacyBytesPerRow:.1f}"
+        compact = f"{row.CompactBytesPerRow:.1f} {row.CompactDtype}" if row.Column != 'Total' else f"{row.CompactBytesPerRow:.1f}"
+        print(f" {row.Column:<24}{legacy:>18}{compact:>18}{row.Float32BytesPerRow:>10.1f}")
+    total = report.iloc[-1]
+    print(f" {len(df)} rows: {total['LegacyBytesPerRow'] * len(df) / 2**20:.2f} MB legacy, "
+          f"{total['CompactBytesPerRow'] * len(df) / 2**20:.2f} MB compact "
+          f"({total['LegacyBytesPerRow'] / total['CompactBytesPerRow']:.1f}x smaller)")
+
+# The stage profiler of --profile; None (the default) makes every profile_stage a no-op
+_profiler = None
+
+def _max_rss_mb():
+    """Peak resident set size of this process so far, in MB (None where getrusage is unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class StageProfiler:
+    """
+    Records wall time, CPU time, peak memory and row counts of nested pipeline stages as Chrome trace events.
+    Peak memory is the tracemalloc high-water mark within the stage (numpy and pandas buffers included), so it
+    still counts stages that free what they allocate; nested stages fold their peak into the enclosing one.
+    """
+    
+    def __init__(self):
+        self.events = []
+        self._stack = []
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+    
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        args = {} if rows is None else {'rows': int(rows)}
+        if self._stack:
+            self._stack[-1]['peak'] = max(self._stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        frame = {'peak': 0}
+        self._stack.append(frame)
+        start, cpu_start = time.perf_counter_ns(), time.process_time_ns()
+        try:
+            yield args
+        finally:
+            wall, cpu = time.perf_counter_ns() - start, time.process_time_ns() - cpu_start
+            self._stack.pop()
+            peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            args.update({'cpu_ms': cpu / 1e6, 'peak_memory_mb': peak / 2**20, 'max_rss_mb': _max_rss_mb()})
+            self.events.append({'name': name, 'cat': 'analyze_data', 'ph': 'X', 'ts': start / 1e3,
+                                'dur': wall / 1e3, 'pid': os.getpid(), 'tid': 0, 'args': args})
+    
+    def close(self):
+        """Stop tracing memory (if this profiler started it) and return the recorded events."""
+        if self._started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self.events
+
+def enable_profiling():
+    """Make profile_stage record stages until disable_profiling()."""
+    global _profiler
+    _profiler = StageProfiler()
+
+def disable_profiling():
+    """Stop profiling and return the recorded Chrome trace events ([] if profiling was off)."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler.close() if profiler is not None else []
+
+def profile_stage(name, rows=None):
+    """
+    Context manager timing one pipeline stage when profiling is enabled, and nothing otherwise.
+    It yields a dict that rows (and any other counts) can be added to once they are known.
+    """
+    if _profiler is None:
+        return contextlib.nullcontext({})
+    return _profiler.stage(name, rows)
+
+def profile_summary(events):
+    """The stages of Chrome trace events as a flat list, in start order, with times in seconds."""
+    depth = []
+    summary = []
+    for event in sorted(events, key=lambda event: (event['pid'], event['ts'], -event['dur'])):
+        # Events of one process nest, so a stage ends no later than the stage it runs inside
+        while depth and (depth[-1][0] != event['pid'] or event['ts'] >= depth[-1][1]):
+            depth.pop()
+        summary.append({'name': event['name'], 'pid': event['pid'], 'depth': len(depth),
+                        'wall_s': event['dur'] / 1e6, 'cpu_s': event['args']['cpu_ms'] / 1e3,
+                        'peak_memory_mb': event['args']['peak_memory_mb'],
+                        'max_rss_mb': event['args']['max_rss_mb'], 'rows': event['args'].get('rows')})
+        depth.append((event['pid'], event['ts'] + event['dur']))
+    return summary
+
+def write_profile(events, path, profile_format='chrome'):
+    """
+    Write profiled stages to path: a Chrome trace (open in chrome://tracing or https://ui.perfetto.dev) or,
+    with profile_format='json', the flat profile_summary of the stages.
+    """
+    if profile_format == 'chrome':
+        profile = {'traceEvents': sorted(events, key=lambda event: event['ts']), 'displayTimeUnit': 'ms'}
+    else:
+        profile = {'stages': profile_summary(events)}
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+    print(f" Profile of {len(events)} stages written to {path}")
+
+def file_content_hash(filepath, block_size=1 << 20, end=None):
+    """Hex digest of a file's bytes (the first end bytes, if given), read in blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        stream = io.BufferedReader(_ByteRangeReader(f, 0, end)) if end is not None else f
+        for block in iter(lambda: stream.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def committed_size(filepath):
+    """
+    Bytes of a raw data file up to its last newline. Rows are appended a whole line at a time (by
+    evalAIExplanation.ts and by the ledger of run_experiments.py), so anything after that is a row still being
+    written. Reading only this prefix gives a consistent snapshot of a file that is being appended to.
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = _complete_lines_end(f, size)
+    if end < size:
+        print(f"Warning: Ignoring the partial last row of {filepath} ({size - end} bytes, still being written?)")
+    return end
+
+def _read_committed_csv(filepath, end):
+    """Parse the first end bytes of a raw data file (its committed rows), or the whole file if that is all."""
+    if end >= os.path.getsize(filepath):
+        return pd.read_csv(filepath, **RAW_CSV_OPTIONS)
+    with open(filepath, 'rb') as f:
+        return pd.read_csv(io.BufferedReader(_ByteRangeReader(f, 0, end)), **RAW_CSV_OPTIONS)
+
+def raw_cache_path(filepath, content_hash):
+    """Location of the cached cleaned frame for one version of a raw data file."""
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(filepath)), RAW_CACHE_DIR)
+    return os.path.join(cache_dir, f"{os.path.basename(filepath)}.v{LOADER_VERSION}.{content_hash}.feather")
+
+def _read_raw_cache(cache_path):
+    """Read a cached frame memory-mapped, or return None if there is no usable cache entry."""
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        return _import_feather().read_table(cache_path, memory_map=True).to_pandas(split_blocks=True)
+    except Exception as e:
+        print(f"Warning: Ignoring unreadable cache {cache_path}: {e}")
+        return None
+
+def _write_raw_cache(df, filepath, cache_path):
+    """Atomically write the cleaned frame and drop cache entries for older versions of the same file."""
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            # Uncompressed so later reads can map the file instead of decoding it
+            _import_feather().write_feather(df, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    except Exception as e:
+        print(f"Warning: Could not cache parsed data for {filepath}: {e}")
+        return
+    
+    prefix = f"{os.path.basename(filepath)}.v"
+    for name in os.listdir(cache_dir):
+        stale_path = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith('.feather') and stale_path != cache_path:
+            os.remove(stale_path)
+
+def load_and_clean_data(filepath, use_cache=True, content_hash=None, end=None):
+    """
+    Load CSV data and handle missing values. Only the committed rows are read (see committed_size); pass end
+    (the committed size) and content_hash (the digest of those bytes) if they are already known.
+    The cleaned frame is cached next to the CSV (requires pyarrow), so an unchanged file is never parsed twice.
+    """
+    try:
+        end = committed_size(filepath) if end is None else end
+        cache_path = None
+        if use_cache and _import_feather() is not None:
+            cache_path = raw_cache_path(filepath, content_hash or file_content_hash(filepath, end=end))
+            df = _read_raw_cache(cache_path)
+            if df is not None:
+                print(f"Loaded {len(df)} rows from {filepath} (cached)")
+                return df
         
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = _read_committed_csv(filepath, end)
+        print(f"Loaded {len(df)} rows from {filepath}")
+        df = compact_dtypes(_coerce_numeric_columns(df))
         
+        if cache_path is not None:
+            _write_raw_cache(df, filepath, cache_path)
         return df
         
     except Exception as e:
         print(f"Error loading data: {e}")
         return None
 
-def calculate_basic_stats(df, group_cols, metrics):
-    """Calculate mean, std, count for specified metrics."""
-    stats = []
+def iter_clean_chunks(filepath, chunksize=100_000):
+    """Yield the committed rows of a raw data file as cleaned, typed DataFrames of at most chunksize rows."""
+    end = committed_size(filepath)
+    with open(filepath, 'rb') as f:
+        source = io.BufferedReader(_ByteRangeReader(f, 0, end))
+        with pd.read_csv(source, chunksize=chunksize, **RAW_CSV_OPTIONS) as reader:
+            for chunk in reader:
+                yield _coerce_numeric_columns(chunk)
+
+def _pairwise_correlations(n, sum_x, sum_y, sum_xx, sum_yy, sum_xy):
+    """Pearson correlations from pair counts, sums, sums of squares and cross-products (NaN without variance)."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sxx = sum_xx - sum_x * sum_x / n
+        syy = sum_yy - sum_y * sum_y / n
+        sxy = sum_xy - sum_x * sum_y / n
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1.0, 1.0)
+    return np.where((n > 1) & (sxx > 0) & (syy > 0), r, np.nan)
+
+class CellMoments:
+    """
+    Online accumulator of row count and, per metric, count/sum/sum of squares for every key cell
+    (e.g. each TargetLength x EventKey combination). Each chunk is reduced to its cells before it
+    is merged, so memory grows with the number of cells rather than the number of rows.
+    For each metric pair it also keeps the count, sums, sums of squares and cross-product over the
+    rows where both metrics are present, which is enough for pairwise-complete correlations.
+    """
+    
+    def __init__(self, key_cols, metrics, pairs=()):
+        self.key_cols = list(key_cols)
+        self.metrics = list(metrics)
+        self.pairs = [tuple(pair) for pair in pairs]
+        self.cells = None
+    
+    def update(self, df):
+        """Fold a chunk of rows into the running cell totals."""
+        if df.empty:
+            return
+        
+        # Number the chunk's cells; keys are stored as plain values so categoricals from different chunks line up
+        codes, uniques = zip(*(pd.factorize(df[col], use_na_sentinel=False) for col in self.key_cols))
+        shape = [len(values) for values in uniques]
+        cell_codes, cell_ids = pd.factorize(np.ravel_multi_index(codes, shape))
+        key_codes = np.unravel_index(cell_ids, shape)
+        columns = {col: np.asarray(values, dtype=object)[key_codes[i]]
+                   for i, (col, values) in enumerate(zip(self.key_cols, uniques))}
+        
+        def cell_sums(weights=None):
+            return np.bincount(cell_codes, weights=weights, minlength=len(cell_ids))
+        
+        columns['Rows'] = cell_sums()
+        values = {}
+        for metric in self.metrics:
+            values[metric] = df[metric].to_numpy(dtype=float) if metric in df.columns else np.full(len(df), np.nan)
+            present = ~np.isnan(values[metric])
+            x = np.where(present, values[metric], 0.0)
+            columns[f'Count_{metric}'] = cell_sums(present).astype(np.int64)
+            columns[f'Sum_{metric}'] = cell_sums(x)
+            columns[f'SumSq_{metric}'] = cell_sums(x * x)
+        
+        for x_metric, y_metric in self.pairs:
+            pair = f'{x_metric}__{y_metric}'
+            both = ~np.isnan(values[x_metric]) & ~np.isnan(values[y_metric])
+            x = np.where(both, values[x_metric], 0.0)
+            y = np.where(both, values[y_metric], 0.0)
+            columns[f'PairCount_{pair}'] = cell_sums(both).astype(np.int64)
+            columns[f'PairSumX_{pair}'] = cell_sums(x)
+            columns[f'PairSumY_{pair}'] = cell_sums(y)
+            columns[f'PairSumXX_{pair}'] = cell_sums(x * x)
+            columns[f'PairSumYY_{pair}'] = cell_sums(y * y)
+            columns[f'PairSumXY_{pair}'] = cell_sums(x * y)
+        
+        self.merge(pd.DataFrame(columns).set_index(self.key_cols))
+    
+    def merge(self, cells):
+        """Add cell totals (indexed by the key columns) into the running totals."""
+        if self.cells is None:
+            self.cells = cells
+        else:
+            self.cells = pd.concat([self.cells, cells]).groupby(level=self.key_cols, dropna=False).sum()
+    
+    def _group_totals(self, group_cols):
+        """Sum the cells within each group of group_cols, or into a single row when group_cols is empty."""
+        cells = self.cells.reset_index()
+        stat_cols = list(self.cells.columns)
+        if group_cols:
+            totals = cells.groupby(group_cols)[stat_cols].sum().reset_index()
+            # Keys were stored as plain objects; give them back a proper dtype (e.g. int TargetLength)
+            totals[group_cols] = totals[group_cols].infer_objects()
+            return totals
+        return cells[stat_cols].sum().to_frame().T
+    
+    def rollup(self, grouping_sets):
+        """Combine cells into each grouping set, in the same layout as calculate_basic_stats."""
+        results = []
+        for group_cols in grouping_sets:
+            group_cols = list(group_cols)
+            totals = self._group_totals(group_cols)
+            
+            stats = {col: totals[col] for col in group_cols}
+            stats['SampleSize'] = totals['Rows'].to_numpy().astype(np.int64)
+            for metric in self.metrics:
+                n = totals[f'Count_{metric}'].to_numpy(dtype=float)
+                total = totals[f'Sum_{metric}'].to_numpy(dtype=float)
+                squares = totals[f'SumSq_{metric}'].to_numpy(dtype=float)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    mean = total / n
+                    variance = np.maximum(squares - total * mean, 0.0) / (n - 1)
+                stats[f'Mean_{metric}'] = np.where(n > 0, mean, np.nan)
+                stats[f'Std_{metric}'] = np.where(n > 1, np.sqrt(variance), np.nan)
+            results.append(pd.DataFrame(stats))
+        
+        return results
+    
+    def correlation_matrices(self, group_cols=(), metrics=None):
+        """
+        Pairwise-complete correlation and pair count matrices of the paired metrics (or just those in metrics)
+        for each group of group_cols. Returns a list of (group key, row count, correlations, counts);
+        with no group_cols there is a single group keyed None.
+        """
+        group_cols = list(group_cols)
+        totals = self._group_totals(group_cols)
+        paired = [metric for metric in self.metrics if any(metric in pair for pair in self.pairs)
+                  and (metrics is None or metric in metrics)]
+        
+        corr = np.full((len(totals), len(paired), len(paired)), np.nan)
+        counts = np.zeros((len(totals), len(paired), len(paired)))
+        for i, metric in enumerate(paired):
+            counts[:, i, i] = totals[f'Count_{metric}'].to_numpy(dtype=float)
+            corr[:, i, i] = 1.0
+        
+        for x_metric, y_metric in self.pairs:
+            if x_metric not in paired or y_metric not in paired:
+                continue
+            pair = f'{x_metric}__{y_metric}'
+            n = totals[f'PairCount_{pair}'].to_numpy(dtype=float)
+            r = _pairwise_correlations(n, *(totals[f'{stat}_{pair}'].to_numpy(dtype=float) for stat in
+                                            ['PairSumX', 'PairSumY', 'PairSumXX', 'PairSumYY', 'PairSumXY']))
+            
+            i, j = paired.index(x_metric), paired.index(y_metric)
+            corr[:, i, j] = corr[:, j, i] = r
+            counts[:, i, j] = counts[:, j, i] = n
+        
+        keys = totals[group_cols].itertuples(index=False, name=None) if group_cols else [None]
+        return [
+            (key, int(rows), pd.DataFrame(corr[g], index=paired, columns=paired),
+             pd.DataFrame(counts[g], index=paired, columns=paired))
+            for g, (key, rows) in enumerate(zip(keys, totals['Rows']))
+        ]
+    
+    def to_dict(self):
+        """JSON-serialisable copy of the accumulated cells."""
+        cells = self.cells.reset_index()
+        return {col: cells[col].tolist() for col in cells.columns}
+    
+    @classmethod
+    def from_dict(cls, cells, key_cols, metrics, pairs=()):
+        """Rebuild an accumulator from the output of to_dict."""
+        moments = cls(key_cols, metrics, pairs)
+        cells = pd.DataFrame(cells)
+        for col in moments.key_cols:
+            cells[col] = cells[col].astype(object)
+        moments.cells = cells.set_index(moments.key_cols)
+        return moments
+
+def _pairwise_block_sums(padded, starts, lengths):
+    """Pairwise-sum contiguous blocks of padded, whose last element is a 0.0 pad that never belongs to a block."""
+    sums = np.empty(len(starts))
+    
+    # numpy splits blocks longer than 128 values in two (keeping the left half a multiple of 8)
+    large = lengths > 128
+    if large.any():
+        half = lengths[large] // 2
+        half -= half % 8
+        halves = _pairwise_block_sums(
+            padded,
+            np.concatenate([starts[large], starts[large] + half]),
+            np.concatenate([half, lengths[large] - half])
+        )
+        sums[large] = halves[:len(half)] + halves[len(half):]
+    
+    # The remaining blocks hold at most 128 values. Blocks of 8 or more are accumulated in 8 lanes over
+    # their whole octets and the lanes are combined as a tree; blocks are bucketed by octet count so
+    # every bucket is a dense gather.
+    leaf = ~large
+    leaf_starts = starts[leaf]
+    leaf_lengths = lengths[leaf]
+    unrolled = np.where(leaf_lengths >= 8, leaf_lengths - leaf_lengths % 8, 0)
+    octets = unrolled // 8
+    leaf_sums = np.zeros(len(leaf_starts))
+    for count in np.unique(octets[octets > 0]):
+        in_bucket = octets == count
+        lanes = padded[leaf_starts[in_bucket, None, None] + np.arange(count * 8).reshape(count, 8)]
+        acc = lanes[:, 0]
+        for octet in range(1, count):
+            acc = acc + lanes[:, octet]
+        leaf_sums[in_bucket] = ((acc[:, 0] + acc[:, 1]) + (acc[:, 2] + acc[:, 3])) + ((acc[:, 4] + acc[:, 5]) + (acc[:, 6] + acc[:, 7]))
+    
+    # Leftover values (all of a block under 8) are then added one at a time; reads past the end of
+    # a block hit the pad instead
+    tail = unrolled[:, None] + np.arange(7)
+    tail_values = padded[np.where(tail < leaf_lengths[:, None], leaf_starts[:, None] + tail, len(padded) - 1)]
+    for i in range(7):
+        leaf_sums = leaf_sums + tail_values[:, i]
+    sums[leaf] = leaf_sums
+    
+    return sums
+
+def _pairwise_segment_sums(values, starts, lengths):
+    """
+    Sum contiguous segments of a float array in the same order numpy's pairwise summation uses,
+    so every segment total matches np.sum on that slice bit for bit.
+    """
+    sums = np.empty(len(starts))
+    
+    # Long segments amortize a direct np.sum call (at most len(values) / 1024 of them); short
+    # segments are summed together by the vectorized kernel
+    direct = lengths >= 1024
+    for index in np.flatnonzero(direct):
+        sums[index] = np.sum(values[starts[index]:starts[index] + lengths[index]])
+    
+    # np.sum starts from +0.0, so the sign of an intermediate zero never reaches the result
+    if not direct.all():
+        sums[~direct] = _pairwise_block_sums(np.append(values, 0.0), starts[~direct], lengths[~direct]) + 0.0
+    
+    return sums
+
+def calculate_grouping_sets_stats(df, grouping_sets, metrics):
+    """
+    Calculate mean, std, count for specified metrics over several grouping sets at once.
+
+    Every grouping column is factorized a single time and each grouping set costs one stable sort,
+    after which all groups are reduced together with array operations instead of a loop per group.
+    Sums follow numpy's pairwise order, so the results are identical to Series.mean()/Series.std()
+    on each group. Returns one DataFrame per grouping set, in the same layout as calculate_basic_stats.
+    """
+    key_cols = list(dict.fromkeys(col for group_cols in grouping_sets for col in group_cols))
+    factorized = {col: pd.factorize(df[col], sort=True) for col in key_cols}
+    metric_values = {
+        metric: df[metric].to_numpy(dtype=float, na_value=np.nan)
+        for metric in metrics if metric in df.columns
+    }
     
-    # Handle case where no grouping columns are provided (overall stats)
-    if not group_cols:
-        row = {}
-        row['SampleSize'] = len(df)
+    results = []
+    for group_cols in grouping_sets:
+        group_cols = list(group_cols)
+        
+        # Assign each row a group id; rows with a missing key are dropped, as groupby does
+        if group_cols:
+            codes = np.vstack([factorized[col][0] for col in group_cols])
+            sizes = tuple(len(factorized[col][1]) for col in group_cols)
+            keep = (codes >= 0).all(axis=0)
+            combined = np.ravel_multi_index(codes[:, keep], sizes)
+            group_ids, group_codes = pd.factorize(combined, sort=True)
+            stats = pd.DataFrame({
+                col: factorized[col][1].take(col_codes)
+                for col, col_codes in zip(group_cols, np.unravel_index(group_codes, sizes))
+            })
+        else:
+            keep = np.ones(len(df), dtype=bool)
+            group_ids = np.zeros(len(df), dtype=np.int64)
+            stats = pd.DataFrame(index=range(1))
+        
+        # Stable sort keeps each group's rows in file order; the smallest id dtype lets numpy radix sort
+        num_groups = len(stats)
+        order = np.argsort(group_ids.astype(np.min_scalar_type(num_groups)), kind='stable')
+        rows = np.flatnonzero(keep)[order]
+        sorted_ids = group_ids[order]
+        stats['SampleSize'] = np.bincount(group_ids, minlength=num_groups)
         
         for metric in metrics:
-            if metric in df.columns:
-                values = df[metric].dropna()
-                row[f'Mean_{metric}'] = values.mean() if len(values) > 0 else np.nan
-                row[f'Std_{metric}'] = values.std() if len(values) > 0 else np.nan
-            else:
-                row[f'Mean_{metric}'] = np.nan
-                row[f'Std_{metric}'] = np.nan
-                
-        stats.append(row)
-    else:
-        # Normal grouping case
-        for group_name, group_df in df.groupby(group_cols):
-            if isinstance(group_name, tuple):
-                group_dict = dict(zip(group_cols, group_name))
-            else:
-                group_dict = {group_cols[0]: group_name}
+            if metric not in metric_values:
+                stats[f'Mean_{metric}'] = np.nan
+                stats[f'Std_{metric}'] = np.nan
+                continue
             
-            row = group_dict.copy()
-            row['SampleSize'] = len(group_df)
+            values = metric_values[metric][rows]
+            valid = ~np.isnan(values)
+            values = values[valid]
+            ids = sorted_ids[valid]
+            counts = np.bincount(ids, minlength=num_groups)
+            starts = np.cumsum(counts) - counts
             
-            for metric in metrics:
-                if metric in group_df.columns:
-                    values = group_df[metric].dropna()
-                    row[f'Mean_{metric}'] = values.mean() if len(values) > 0 else np.nan
-                    row[f'Std_{metric}'] = values.std() if len(values) > 0 else np.nan
-                else:
-                    row[f'Mean_{metric}'] = np.nan
-                    row[f'Std_{metric}'] = np.nan
-                    
-            stats.append(row)
+            # Two-pass mean and sample std, matching pandas' nanops
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means = _pairwise_segment_sums(values, starts, counts) / counts
+                squares = (means[ids] - values) ** 2
+                variances = _pairwise_segment_sums(squares, starts, counts) / (counts - 1)
+            stats[f'Mean_{metric}'] = np.where(counts > 0, means, np.nan)
+            stats[f'Std_{metric}'] = np.where(counts > 1, np.sqrt(variances), np.nan)
+        
+        results.append(stats)
     
-    return pd.DataFrame(stats)
+    return results
 
-def calculate_correlations(df):
+def calculate_basic_stats(df, group_cols, metrics):
+    """Calculate mean, std, count for specified metrics."""
+    return calculate_grouping_sets_stats(df, [group_cols], metrics)[0]
+
+def _correlations_from_gram(gram, k):
     """
-    Calculate key correlations for the analysis, including the NLI metrics.
+    Pairwise-complete correlation and pair count matrices from Gram matrices of [present, x, x^2] (x zeroed
+    where missing). gram may carry leading batch dimensions, and its rows and columns may come from two
+    different arrangements of the same data (entry i, j then pairs column i of one with column j of the other).
+    """
+    # gram[k + i, j] is the sum of x_i over the rows where x_j is also present, and so on
+    n = gram[..., :k, :k]
+    sum_x = gram[..., k:2 * k, :k]
+    sum_y = gram[..., :k, k:2 * k]
+    sum_xx = gram[..., 2 * k:, :k]
+    sum_yy = gram[..., :k, 2 * k:]
+    corr = _pairwise_correlations(n, sum_x, sum_y, sum_xx, sum_yy, gram[..., k:2 * k, k:2 * k])
+    return corr, n
+
+def _column_shift(values, present):
+    """Column means of the present values (0 for empty columns); centring on them keeps the pair sums accurate."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.nan_to_num(np.nansum(values, axis=0) / present.sum(axis=0))
+
+def _correlation_matrix(values, present, block_size=1 << 16):
+    """
+    Pairwise-complete correlation and pair count matrices of the columns of values (present marks non-missing cells).
+    All pair sums come from one Gram matrix of [present, x, x^2], with x centred on its column mean for accuracy.
     """
+    k = values.shape[1]
+    shift = _column_shift(values, present)
     
-    correlations = {}
+    gram = np.zeros((3 * k, 3 * k))
+    for start in range(0, len(values), block_size):
+        block_present = present[start:start + block_size]
+        x = np.where(block_present, values[start:start + block_size] - shift, 0.0)
+        block = np.hstack([block_present, x, x * x])
+        gram += block.T @ block
     
-    # Overall correlations
-    numeric_df = df.select_dtypes(include=[np.number])
+    corr, n = _correlations_from_gram(gram, k)
+    np.fill_diagonal(corr, np.where(np.isnan(np.diag(corr)), np.nan, 1.0))
+    return corr, n
+
+def _group_slices(df, group_col):
+    """
+    Sort rows by group_col once. Returns the sorted groups, the row order and each group's start and size
+    in that order; rows with a missing group value are left out.
+    """
+    codes, groups = pd.factorize(df[group_col], sort=True)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(groups))
+    order = np.argsort(codes.astype(np.min_scalar_type(-max(len(groups), 1))), kind='stable')[len(codes) - sizes.sum():]
+    return groups, order, np.cumsum(sizes) - sizes, sizes
+
+def pairwise_correlation_matrices(df, metrics, group_col=None):
+    """
+    Pairwise-complete Pearson correlations between all metric columns, overall and within each group of group_col.
+    Rows are sorted by group once, so each group is a contiguous slice rather than a filtered copy of the frame.
+    Returns ((correlations, counts), [(group, rows, correlations, counts), ...]) with groups in sorted order.
+    """
+    values = df[metrics].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    
+    def as_frames(corr, n):
+        return pd.DataFrame(corr, index=metrics, columns=metrics), pd.DataFrame(n, index=metrics, columns=metrics)
+    
+    overall = as_frames(*_correlation_matrix(values, present))
+    if group_col is None:
+        return overall, []
+    
+    # Rows with a missing group value only count towards the overall matrix
+    groups, order, starts, sizes = _group_slices(df, group_col)
+    values, present = values[order], present[order]
+    
+    by_group = []
+    for group, start, size in zip(groups, starts, sizes):
+        corr, n = _correlation_matrix(values[start:start + size], present[start:start + size])
+        by_group.append((group, int(size), *as_frames(corr, n)))
+    
+    return overall, by_group
+
+def _weighted_grams(stacked, weights, block_rows=16384):
+    """Gram matrices of the rows of stacked, once for each row of weights (how often each row counts)."""
+    width = stacked.shape[1]
+    grams = np.zeros((len(weights), width * width))
+    for start in range(0, len(stacked), block_rows):
+        block = stacked[start:start + block_rows]
+        grams += weights[:, start:start + block_rows] @ (block[:, :, None] * block[:, None, :]).reshape(len(block), -1)
+    return grams.reshape(-1, width, width)
+
+def _resample_correlations(values, resamples, seed, batch_elements=1 << 22):
+    """
+    Draw bootstrap and permutation resamples of one group's rows (the rows of values) and return the bootstrap
+    correlation matrices plus, for every pair, how many permutations gave a correlation at least as extreme
+    as the observed one. Resamples are drawn in batches as index matrices and turned into Gram matrices with
+    matrix products: a bootstrap resample weights each row by how often it was drawn, and a permutation pairs
+    the columns with a row-shuffled copy of themselves, which gives a null draw for every pair at once.
+    """
+    rng = np.random.default_rng(seed)
+    rows, k = values.shape
+    present = ~np.isnan(values)
+    observed, _ = _correlation_matrix(values, present)
+    x = np.where(present, values - _column_shift(values, present), 0.0)
+    stacked = np.hstack([present, x, x * x])
     
-    if 'ActualWordCount' in numeric_df.columns:
-        # Length vs NLI scores
-        correlations['Length_vs_NLI_Avg'] = numeric_df['ActualWordCount'].corr(numeric_df['NLI_AverageScore'])
-        correlations['Length_vs_NLI_DataCollection'] = numeric_df['ActualWordCount'].corr(numeric_df['NLI_DataCollection'])
-        correlations['Length_vs_NLI_PrivacyExplanation'] = numeric_df['ActualWordCount'].corr(numeric_df['NLI_PrivacyExplanation'])
+    boot = np.empty((resamples, k, k))
+    extreme = np.zeros((k, k))
+    batch_size = max(1, batch_elements // max(rows * stacked.shape[1], 1))
+    for start in range(0, resamples, batch_size):
+        size = min(batch_size, resamples - start)
         
-        # Length vs readability
-        correlations['Length_vs_FleschKincaid'] = -numeric_df['ActualWordCount'].corr(numeric_df['FleschKincaid'])
-        correlations['Length_vs_WordFrequency'] = numeric_df['ActualWordCount'].corr(numeric_df['WordFrequencyScore'])
+        draws = rng.integers(0, rows, size=(size, rows))
+        weights = np.bincount((draws + rows * np.arange(size)[:, None]).ravel(), minlength=size * rows)
+        boot[start:start + size] = _correlations_from_gram(
+            _weighted_grams(stacked, weights.reshape(size, rows).astype(float)), k)[0]
+        
+        shuffles = rng.permuted(np.broadcast_to(np.arange(rows), (size, rows)), axis=1)
+        null, _ = _correlations_from_gram(stacked.T @ stacked[shuffles], k)
+        with np.errstate(invalid='ignore'):
+            # The tolerance keeps an arrangement as extreme as the observed one from being lost to rounding
+            extreme += (np.abs(null) >= np.abs(observed) - 1e-12).sum(axis=0)
+    
+    return boot, extreme
+
+def _resample_correlations_worker(args):
+    """Picklable wrapper so resampling can run in worker processes."""
+    return _resample_correlations(*args)
+
+def calculate_correlation_intervals(df, resamples, seed=0, workers=1, confidence=0.95, chunk_resamples=1000):
+    """
+    Bootstrap percentile confidence intervals and two-sided permutation p-values for the overall and
+    length-controlled correlations, in the same layout as calculate_correlations with CILow_, CIHigh_ and
+    PValue_ columns for each correlation.
+    Resamples are drawn in fixed chunks, each seeded from (seed, group, chunk), so the results do not depend
+    on how many worker processes share the work.
+    """
+    metrics = [metric for metric in AGGREGATE_METRICS
+               if metric in df.columns and pd.api.types.is_numeric_dtype(df[metric])]
+    values = df[metrics].to_numpy(dtype=float)
+    groups, order, starts, sizes = _group_slices(df, 'TargetLength')
+    sorted_values = values[order]
+    
+    # Group 0 is every row, then one group per TargetLength
+    group_values = [values] + [sorted_values[start:start + size] for start, size in zip(starts, sizes)]
+    tasks, task_groups = [], []
+    for g, rows in enumerate(group_values):
+        for chunk, start in enumerate(range(0, resamples, chunk_resamples)):
+            tasks.append((rows, min(chunk_resamples, resamples - start), [seed, g, chunk]))
+            task_groups.append(g)
+    
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_resample_correlations_worker, tasks))
+    else:
+        results = [_resample_correlations_worker(task) for task in tasks]
+    
+    tail = (1 - confidence) / 2
+    intervals = []
+    for g, rows in enumerate(group_values):
+        group_results = [result for result, task_group in zip(results, task_groups) if task_group == g]
+        boot = np.concatenate([result[0] for result in group_results])
+        extreme = sum(result[1] for result in group_results)
+        observed, counts = _correlation_matrix(rows, ~np.isnan(rows))
+        with warnings.catch_warnings():
+            # Pairs with no variance in any resample have no interval
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanquantile(boot, [tail, 1 - tail], axis=0)
+        p_value = np.where(np.isnan(observed), np.nan, (extreme + 1) / (resamples + 1))
+        intervals.append((low, high, p_value, counts))
+    
+    def interval_columns(interval, specs, min_count):
+        low, high, p_value, counts = interval
+        columns = {}
+        for name, x_metric, y_metric, sign in specs:
+            if x_metric in metrics and y_metric in metrics:
+                i, j = metrics.index(x_metric), metrics.index(y_metric)
+                enough = counts[i, j] >= min_count
+                # Flipped correlations (FleschKincaid) flip their interval too
+                bounds = sorted([sign * low[i, j], sign * high[i, j]])
+                columns[f'CILow_{name}'] = bounds[0] if enough else np.nan
+                columns[f'CIHigh_{name}'] = bounds[1] if enough else np.nan
+                columns[f'PValue_{name}'] = p_value[i, j] if enough else np.nan
+        return columns
+    
+    overall = interval_columns(intervals[0], OVERALL_CORRELATIONS, 0)
     
-    if 'NLI_AverageScore' in numeric_df.columns:
-        # NLI Avg vs readability
-        correlations['NLI_Avg_vs_FleschKincaid'] = -numeric_df['NLI_AverageScore'].corr(numeric_df['FleschKincaid'])
-        correlations['NLI_Avg_vs_WordFrequency'] = numeric_df['NLI_AverageScore'].corr(numeric_df['WordFrequencyScore'])
+    length_controlled = []
+    for group, size, interval in zip(groups, sizes, intervals[1:]):
+        if size >= 3:  # Same rule as the length-controlled correlations themselves
+            row = {'TargetLength': group, 'SampleSize': int(size)}
+            row.update(interval_columns(interval, LENGTH_CONTROLLED_CORRELATIONS, 3))
+            length_controlled.append(row)
+    
+    return overall, pd.DataFrame(length_controlled)
 
-    if 'NLI_DataCollection' in numeric_df.columns:
-        # NLI DataCollection vs readability
-        correlations['NLI_DataCollection_vs_FleschKincaid'] = -numeric_df['NLI_DataCollection'].corr(numeric_df['FleschKincaid'])
-        correlations['NLI_DataCollection_vs_WordFrequency'] = numeric_df['NLI_DataCollection'].corr(numeric_df['WordFrequencyScore'])
+def _interleave_correlation_columns(report, intervals):
+    """Place each correlation's CILow_/CIHigh_/PValue_ columns right after it."""
+    report = pd.concat([report, intervals.drop(columns=[col for col in intervals.columns if col in report.columns])],
+                       axis=1)
+    columns = []
+    for col in report.columns:
+        if not col.startswith(('CILow_', 'CIHigh_', 'PValue_')):
+            columns.append(col)
+            columns += [f'{stat}_{col}' for stat in ('CILow', 'CIHigh', 'PValue') if f'{stat}_{col}' in report.columns]
+    return report[columns]
 
-    if 'NLI_PrivacyExplanation' in numeric_df.columns:
-        # NLI PrivacyExplanation vs readability
-        correlations['NLI_PrivacyExplanation_vs_FleschKincaid'] = -numeric_df['NLI_PrivacyExplanation'].corr(numeric_df['FleschKincaid'])
-        correlations['NLI_PrivacyExplanation_vs_WordFrequency'] = numeric_df['NLI_PrivacyExplanation'].corr(numeric_df['WordFrequencyScore'])
+def calculate_correlations(df):
+    """
+    Calculate key correlations for the analysis, including the NLI metrics.
+    The full correlation matrix is computed overall and within each target length, and the named correlations are read out of it.
+    """
+    metrics = [metric for metric in AGGREGATE_METRICS
+               if metric in df.columns and pd.api.types.is_numeric_dtype(df[metric])]
+    overall, by_length = pairwise_correlation_matrices(df, metrics, 'TargetLength')
+    return correlation_reports(overall, by_length)
 
-    # Length-controlled correlations
+def correlation_reports(overall, by_length):
+    """
+    Read the named overall and length-controlled correlations out of correlation matrices,
+    in the same layout as calculate_correlations.
+    overall is a (correlations, counts) pair of matrices; by_length is a list of (TargetLength, rows, correlations, counts).
+    """
+    corr, _ = overall
+    correlations = {name: sign * corr.at[x_metric, y_metric] for name, x_metric, y_metric, sign in OVERALL_CORRELATIONS
+                    if x_metric in corr.index and y_metric in corr.index}
+    
     length_controlled_corrs = []
-    for length in sorted(df['TargetLength'].dropna().unique()):
-        length_df = df[df['TargetLength'] == length]
-        if len(length_df) >= 3:  # Need at least 3 points for correlation
+    for length, rows, corr, counts in by_length:
+        if rows >= 3:  # Need at least 3 points for correlation
             length_corrs = {
                 'TargetLength': length,
-                'SampleSize': len(length_df)
+                'SampleSize': rows
             }
-            
-            # NLI vs readability within this length
-            for nli_col in ['NLI_AverageScore', 'NLI_DataCollection', 'NLI_PrivacyExplanation']:
-                if nli_col in length_df.columns and 'FleschKincaid' in length_df.columns:
-                    valid_data = length_df[[nli_col, 'FleschKincaid']].dropna()
-                    if len(valid_data) >= 3:
-                        length_corrs[f'{nli_col}_vs_FleschKincaid'] = -valid_data[nli_col].corr(valid_data['FleschKincaid'])
+            for name, x_metric, y_metric, sign in LENGTH_CONTROLLED_CORRELATIONS:
+                if x_metric in corr.index and y_metric in corr.index:
+                    if counts.at[x_metric, y_metric] >= 3:
+                        length_corrs[name] = sign * corr.at[x_metric, y_metric]
                     else:
-                        length_corrs[f'{nli_col}_vs_FleschKincaid'] = np.nan
-                
-                if nli_col in length_df.columns and 'WordFrequencyScore' in length_df.columns:
-                    valid_data = length_df[[nli_col, 'WordFrequencyScore']].dropna()
-                    if len(valid_data) >= 3:
-                        length_corrs[f'{nli_col}_vs_WordFrequency'] = valid_data[nli_col].corr(valid_data['WordFrequencyScore'])
-                    else:
-                        length_corrs[f'{nli_col}_vs_WordFrequency'] = np.nan
-            
+                        length_corrs[name] = np.nan
             length_controlled_corrs.append(length_corrs)
     
     return correlations, pd.DataFrame(length_controlled_corrs)
 
-def create_aggregation_reports(df):
-    """Create comprehensive aggregation reports."""
+def _fixed_effect_columns(df, fixed_effects):
+    """One indicator column per observed level of each fixed effect column, as a float matrix."""
+    blocks = []
+    for col in fixed_effects:
+        codes, levels = pd.factorize(df[col])
+        indicators = np.zeros((len(df), len(levels)))
+        indicators[np.flatnonzero(codes >= 0), codes[codes >= 0]] = 1
+        blocks.append(indicators)
+    return np.hstack(blocks) if blocks else np.empty((len(df), 0))
+
+def calculate_partial_correlations(df, fixed_effects_sets=PARTIAL_CORRELATION_FIXED_EFFECTS):
+    """
+    Correlations between the metrics controlling for explanation length over every row, rather than within
+    each TargetLength slice: one least-squares solve regresses ActualWordCount (and the fixed effects of one of
+    fixed_effects_sets) out of all metrics at once, and the residuals are correlated.
+    Rows missing length, a metric or a fixed effect are left out. Returns one row per set of controls with the
+    named LENGTH_CONTROLLED_CORRELATIONS.
+    """
+    metrics = [metric for metric in AGGREGATE_METRICS
+               if metric != 'ActualWordCount' and metric in df.columns
+               and pd.api.types.is_numeric_dtype(df[metric]) and df[metric].notna().any()]
+    if 'ActualWordCount' not in df.columns or not metrics:
+        return pd.DataFrame()
+    
+    rows = []
+    seen = []
+    for fixed_effects in fixed_effects_sets:
+        fixed_effects = [col for col in fixed_effects if col in df.columns]
+        if fixed_effects in seen:
+            continue
+        seen.append(fixed_effects)
+        
+        complete = df[['ActualWordCount'] + metrics + fixed_effects].notna().all(axis=1).to_numpy()
+        data = df[complete]
+        n = len(data)
+        design = np.hstack([np.ones((n, 1)), data[['ActualWordCount']].to_numpy(dtype=float),
+                            _fixed_effect_columns(data, fixed_effects)])
+        values = data[metrics].to_numpy(dtype=float)
+        
+        # The indicators of each fixed effect sum to the intercept; lstsq still projects onto their span
+        coefficients, _, rank, _ = np.linalg.lstsq(design, values, rcond=None)
+        residuals = values - design @ coefficients
+        
+        gram = residuals.T @ residuals
+        scale = np.sqrt(np.diag(gram))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = pd.DataFrame(gram / np.outer(scale, scale), index=metrics, columns=metrics)
+        
+        partial = {'Controls': '+'.join(['ActualWordCount'] + fixed_effects), 'SampleSize': n, 'Parameters': rank}
+        for name, x_metric, y_metric, sign in LENGTH_CONTROLLED_CORRELATIONS:
+            if x_metric in corr.index and y_metric in corr.index:
+                # Need at least 3 residual degrees of freedom for a correlation
+                partial[name] = sign * corr.at[x_metric, y_metric] if n - rank >= 3 else np.nan
+        rows.append(partial)
+    
+    return pd.DataFrame(rows)
+
+def calculate_metric_regressions(df, metrics=REGRESSION_METRICS, factors=REGRESSION_FACTORS):
+    """
+    Least-squares fit of every metric on ActualWordCount plus treatment-coded indicators of each factor (the
+    first level in sorted order is the baseline), sharing one SVD of the design matrix across all metrics.
+    Rows missing length, a factor or any metric are left out, so every fit uses the same rows.
+    Returns one row per metric and term with the coefficient, its standard error and t value, and the fit's R².
+    """
+    metrics = [metric for metric in metrics
+               if metric in df.columns and pd.api.types.is_numeric_dtype(df[metric]) and df[metric].notna().any()]
+    factors = [col for col in factors if col in df.columns]
+    if 'ActualWordCount' not in df.columns or not metrics:
+        return pd.DataFrame()
+    
+    data = df[df[['ActualWordCount'] + metrics + factors].notna().all(axis=1).to_numpy()]
+    terms = ['Intercept', 'ActualWordCount']
+    columns = [np.ones(len(data)), data['ActualWordCount'].to_numpy(dtype=float)]
+    for col in factors:
+        codes, levels = pd.factorize(data[col], sort=True)
+        for level in range(1, len(levels)):
+            terms.append(f'{col}={levels[level]}')
+            columns.append((codes == level).astype(float))
+    design = np.column_stack(columns)
+    values = data[metrics].to_numpy(dtype=float)
     
-    metrics = ['ActualWordCount', 'NLI_DataCollection', 'NLI_PrivacyExplanation', 
-               'NLI_AverageScore', 'FleschKincaid', 'WordFrequencyScore']
+    # One factorization serves every metric: coefficients and their covariance both come from the SVD
+    u, singular, vt = np.linalg.svd(design, full_matrices=False)
+    rank = int(np.sum(singular > singular[0] * max(design.shape) * np.finfo(float).eps)) if len(singular) else 0
+    u, singular, vt = u[:, :rank], singular[:rank], vt[:rank]
+    coefficients = vt.T @ ((u.T @ values) / singular[:, None])
+    residual_ss = np.sum((values - design @ coefficients) ** 2, axis=0)
+    total_ss = np.sum((values - values.mean(axis=0)) ** 2, axis=0)
+    residual_df = len(data) - rank
     
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unscaled_variance = np.sum((vt.T / singular) ** 2, axis=1)
+        variance = residual_ss / residual_df if residual_df > 0 else np.full(len(metrics), np.nan)
+        std_errors = np.sqrt(np.outer(unscaled_variance, variance))
+        r_squared = 1 - residual_ss / total_ss
+    
+    report = pd.DataFrame({
+        'Metric': np.repeat(metrics, len(terms)),
+        'Term': np.tile(terms, len(metrics)),
+        'Coefficient': coefficients.T.ravel(),
+        'StdError': std_errors.T.ravel(),
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report['TValue'] = report['Coefficient'] / report['StdError']
+    report['RSquared'] = np.repeat(r_squared, len(terms))
+    report['SampleSize'] = len(data)
+    report['ResidualDF'] = residual_df
+    return report
+
+def sliding_window_correlations(df, window, stride=None, correlations=LENGTH_CONTROLLED_CORRELATIONS):
+    """
+    The named correlations over a window of `window` rows in ActualWordCount order, moved `stride` rows at a
+    time (default: a tenth of the window), for smooth correlation-vs-length curves instead of one point per
+    TargetLength. Rows are sorted once and running sums of the centered metrics (a prefix sum per count, sum,
+    square and cross-product) give every window's moments by subtraction, so the work is O(n) however many
+    windows there are. Returns one row per window with its word count range and mean.
+    """
+    stride = stride or max(1, window // 10)
+    correlations = [(name, x_metric, y_metric, sign) for name, x_metric, y_metric, sign in correlations
+                    if x_metric in df.columns and y_metric in df.columns]
+    metrics = list(dict.fromkeys(metric for _, x_metric, y_metric, _ in correlations for metric in (x_metric, y_metric)))
+    
+    data = df[df['ActualWordCount'].notna()]
+    if len(data) < window:
+        return pd.DataFrame()
+    order = np.argsort(data['ActualWordCount'].to_numpy(dtype=float), kind='stable')
+    lengths = data['ActualWordCount'].to_numpy(dtype=float)[order]
+    values = data[metrics].to_numpy(dtype=float)[order]
+    present = ~np.isnan(values)
+    # Centering keeps the running sums of squares small, so subtracting them loses no precision
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        values = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+    
+    starts = np.arange(0, len(data) - window + 1, stride)
+    
+    def window_sums(columns):
+        prefix = np.zeros((len(columns) + 1, columns.shape[1]))
+        np.cumsum(columns, axis=0, out=prefix[1:])
+        return prefix[starts + window] - prefix[starts]
+    
+    report = {
+        'WindowStart': starts,
+        'WordCountLow': lengths[starts],
+        'WordCountHigh': lengths[starts + window - 1],
+        'WordCountMean': window_sums(lengths[:, None])[:, 0] / window,
+        'SampleSize': window,
+    }
+    for name, x_metric, y_metric, sign in correlations:
+        x, y = values[:, metrics.index(x_metric)], values[:, metrics.index(y_metric)]
+        both = present[:, metrics.index(x_metric)] & present[:, metrics.index(y_metric)]
+        x, y = np.where(both, x, 0.0), np.where(both, y, 0.0)
+        n, sum_x, sum_y, sum_xx, sum_yy, sum_xy = window_sums(np.column_stack([both, x, y, x * x, y * y, x * y])).T
+        # Need at least 3 points for correlation
+        report[name] = np.where(n >= 3, sign * _pairwise_correlations(n, sum_x, sum_y, sum_xx, sum_yy, sum_xy), np.nan)
+    
+    return pd.DataFrame(report)
+
+def add_length_metrics(df):
+    """
+    Return df plus the length adherence metrics (how well does actual match target?), computed in float64
+    whatever the stored dtypes. The new frame shares df's columns instead of copying them (copy-on-write).
+    """
+    actual = df['ActualWordCount'].to_numpy(dtype=float, na_value=np.nan)
+    target = df['TargetLength'].to_numpy(dtype=float, na_value=np.nan)
+    difference = actual - target
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return df.assign(LengthRatio=actual / target, LengthDifference=difference,
+                         LengthAccuracy=np.abs(difference) / target)
+
+def _aggregate_grouping_sets(skip_reports=()):
+    """Grouping sets needed by the aggregate report families that are not skipped, each listed once."""
+    grouping_sets = []
+    for family, group_cols in AGGREGATE_GROUPING_SETS.items():
+        if family not in skip_reports and group_cols not in grouping_sets:
+            grouping_sets.append(group_cols)
+    return grouping_sets
+
+def _split_aggregate_reports(grouping_sets, stats, skip_reports=()):
+    """Select the by_length, overall, by_event and length_analysis report columns, leaving out skipped families."""
+    metric_columns = [f'{stat}_{metric}' for metric in AGGREGATE_METRICS for stat in ('Mean', 'Std')]
+    length_columns = [f'{stat}_{metric}' for metric in LENGTH_METRICS for stat in ('Mean', 'Std')]
+    report_columns = {
+        'by_length': ['TargetLength', 'SampleSize'] + metric_columns,
+        'overall': ['SampleSize'] + metric_columns,
+        'by_event': ['EventKey', 'SampleSize'] + metric_columns,
+        'length_analysis': ['TargetLength', 'SampleSize'] + length_columns,
+    }
+    
+    stats_by_set = {tuple(group_cols): frame for group_cols, frame in zip(grouping_sets, stats)}
+    return {
+        family: stats_by_set[tuple(AGGREGATE_GROUPING_SETS[family])][columns]
+        for family, columns in report_columns.items() if family not in skip_reports
+    }
+
+def create_aggregation_reports(df, resamples=0, seed=0, resample_workers=1, skip_reports=(), window=None,
+                               window_stride=None):
+    """
+    Create comprehensive aggregation reports.
+    With resamples, every correlation also gets a bootstrap confidence interval and a permutation p-value.
+    With a window, the correlations also get sliding-window curves over ActualWordCount (see
+    sliding_window_correlations).
+    Report families named in skip_reports (see REPORT_FAMILIES) are neither calculated nor returned.
+    """
     reports = {}
     
-    # 1. By Target Length
-    print(" Calculating aggregates by Target Length...")
-    by_length = calculate_basic_stats(df, ['TargetLength'], metrics)
-    reports['by_length'] = by_length
-    
-    # 2. Overall Statistics
-    print(" Calculating overall statistics...")
-    overall = calculate_basic_stats(df, [], metrics)
-    reports['overall'] = overall
-    
-    # 3. By Event Type
-    print(" Calculating aggregates by Event Type...")
-    by_event = calculate_basic_stats(df, ['EventKey'], metrics)
-    reports['by_event'] = by_event
-    
-    # 4. Length Analysis - How well does actual match target?
-    print(" Analyzing length accuracy...")
-    df_length_analysis = df.copy()
-    df_length_analysis['LengthRatio'] = df_length_analysis['ActualWordCount'] / df_length_analysis['TargetLength']
-    df_length_analysis['LengthDifference'] = df_length_analysis['ActualWordCount'] - df_length_analysis['TargetLength']
-    df_length_analysis['LengthAccuracy'] = np.abs(df_length_analysis['LengthDifference']) / df_length_analysis['TargetLength']
-    
-    length_metrics = ['LengthRatio', 'LengthDifference', 'LengthAccuracy']
-    length_analysis = calculate_basic_stats(df_length_analysis, ['TargetLength'], length_metrics)
-    reports['length_analysis'] = length_analysis
-    
-    # 5. Correlation Analysis
+    # 1-4. By Target Length, Overall, By Event Type and Length Analysis in a single pass
+    grouping_sets = _aggregate_grouping_sets(skip_reports)
+    if grouping_sets:
+        print(" Calculating aggregates by Target Length, overall, by Event Type and length accuracy...")
+        # The grouping sets share one pass over the data, so they are profiled as one stage
+        families = [family for family in AGGREGATE_GROUPING_SETS if family not in skip_reports]
+        with profile_stage('report:' + '+'.join(families), rows=len(df)):
+            if 'length_analysis' in skip_reports:
+                stats = calculate_grouping_sets_stats(df, grouping_sets, AGGREGATE_METRICS)
+            else:
+                stats = calculate_grouping_sets_stats(add_length_metrics(df), grouping_sets,
+                                                      AGGREGATE_METRICS + LENGTH_METRICS)
+            reports = _split_aggregate_reports(grouping_sets, stats, skip_reports)
+    
+    # 5. Every metric regressed on length, event and instruction type
+    if 'regression' not in skip_reports:
+        print(" Fitting metrics on word count, event and instruction type...")
+        with profile_stage('calculate_metric_regressions', rows=len(df)):
+            reports['metric_regressions'] = calculate_metric_regressions(df)
+    
+    if 'correlations' in skip_reports:
+        return reports
+    
+    # 6. Correlation Analysis
     print(" Calculating correlations...")
-    overall_correlations, length_controlled_correlations = calculate_correlations(df)
+    with profile_stage('calculate_correlations', rows=len(df)):
+        overall_correlations, length_controlled_correlations = calculate_correlations(df)
     
     # Convert overall correlations to DataFrame
     corr_df = pd.DataFrame([overall_correlations])
     reports['overall_correlations'] = corr_df
     reports['length_controlled_correlations'] = length_controlled_correlations
     
+    with profile_stage('calculate_partial_correlations', rows=len(df)):
+        reports['partial_correlations'] = calculate_partial_correlations(df)
+    
+    if window:
+        print(f" Calculating sliding-window correlations ({window} rows, stride {window_stride or max(1, window // 10)})...")
+        with profile_stage('sliding_window_correlations', rows=len(df)):
+            reports['window_correlations'] = sliding_window_correlations(df, window, window_stride)
+    
+    # 7. Uncertainty of the correlations
+    if resamples:
+        print(f" Resampling correlations ({resamples} bootstrap and permutation resamples)...")
+        with profile_stage('calculate_correlation_intervals', rows=len(df)):
+            overall_intervals, length_intervals = calculate_correlation_intervals(df, resamples, seed,
+                                                                                  resample_workers)
+        reports['overall_correlations'] = _interleave_correlation_columns(corr_df, pd.DataFrame([overall_intervals]))
+        if not length_controlled_correlations.empty:
+            reports['length_controlled_correlations'] = _interleave_correlation_columns(
+                length_controlled_correlations, length_intervals)
+    
     return reports
 
-def create_visualizations(df, reports, output_dir, base_filename):
+def create_streaming_aggregation_reports(filepath, chunksize, skip_reports=()):
     """
-    Create comprehensive visualizations with scatter plots and new charts.
+    Create the by_length, overall, by_event and length_analysis reports (minus any in skip_reports) by streaming
+    the raw file through CellMoments in chunks, so peak memory stays flat however large the file is.
+    Correlations need every row at once and are not produced in this mode.
     """
-    label_fontsize = 18
-    tick_label_fontsize = 16
+    moments = CellMoments(['TargetLength', 'EventKey'], AGGREGATE_METRICS + LENGTH_METRICS)
+    rows = 0
+    
+    print(f" Streaming aggregates in chunks of {chunksize} rows...")
+    for chunk in iter_clean_chunks(filepath, chunksize):
+        moments.update(add_length_metrics(chunk))
+        rows += len(chunk)
+    print(f"Streamed {rows} rows from {filepath}")
+    
+    if moments.cells is None:
+        return rows, {}
+    
+    grouping_sets = _aggregate_grouping_sets(skip_reports)
+    return rows, _split_aggregate_reports(grouping_sets, moments.rollup(grouping_sets), skip_reports)
+
+class _ByteRangeReader(io.RawIOBase):
+    """Read-only stream over the bytes [start, end) of an open binary file."""
+    
+    def __init__(self, f, start, end):
+        f.seek(start)
+        self.f = f
+        self.remaining = end - start
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        count = self.f.readinto(memoryview(buffer)[:min(len(buffer), self.remaining)])
+        self.remaining -= count
+        return count
+
+def _complete_lines_end(f, size, block_size=1 << 16):
+    """Offset just past the last newline of the file, so a row still being appended is left for the next run."""
+    end = size
+    while end > 0:
+        start = max(0, end - block_size)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+def _range_digest(f, start, end, block_size=1 << 12):
+    """Digest of the last block_size bytes before end (but not before start), used to recognise an appended file."""
+    start = max(start, end - block_size)
+    f.seek(start)
+    return hashlib.blake2b(f.read(end - start), digest_size=16).hexdigest()
+
+def _load_incremental_state(state_path):
+    """Read persisted sufficient statistics, or return None if there are none we can use."""
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (state.get('version') != INCREMENTAL_STATS_VERSION or state.get('loader_version') != LOADER_VERSION
+            or state.get('metrics') != AGGREGATE_METRICS + LENGTH_METRICS
+            or state.get('pairs') != [list(pair) for pair in CORRELATION_PAIRS]):
+        return None
+    return state
+
+def _save_incremental_state(state, state_path):
+    """Atomically write the sufficient statistics."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(state_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            # Keys and counts may still be numpy scalars
+            f.write(json.dumps(state, default=lambda value: value.item()))
+        os.replace(tmp_path, state_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def update_incremental_stats(filepath, state_path, chunksize=100_000):
+    """
+    Bring the sufficient statistics persisted at state_path up to date with the raw data file and return
+    (rows, CellMoments, columns). Statistics are kept per (TargetLength, EventKey) cell, so when the file has
+    only been appended to since the last run just the new byte range is parsed and merged in. Any other change
+    to the file (or to the statistics layout) starts again from the first row.
+    """
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        end = max(_complete_lines_end(f, size), len(header))
+        
+        state = _load_incremental_state(state_path)
+        if (state is not None and state['header'] == header.decode('utf-8')
+                and len(header) <= state['offset'] <= end
+                and _range_digest(f, len(header), state['offset']) == state['digest']):
+            moments = CellMoments.from_dict(state['cells'], state['key_cols'], state['metrics'], state['pairs'])
+            rows, start = state['rows'], state['offset']
+            print(f" Reusing statistics for {rows} rows from {state_path}")
+        else:
+            moments = CellMoments(['TargetLength', 'EventKey'], AGGREGATE_METRICS + LENGTH_METRICS, CORRELATION_PAIRS)
+            rows, start = 0, len(header)
+            print(f" No reusable statistics for {filepath}, reading every row")
+        
+        columns = pd.read_csv(io.BytesIO(header)).columns.tolist()
+        new_rows = 0
+        if end > start:
+            reader = io.BufferedReader(_ByteRangeReader(f, start, end))
+            with pd.read_csv(reader, header=None, names=columns, chunksize=chunksize, **RAW_CSV_OPTIONS) as chunks:
+                for chunk in chunks:
+                    moments.update(add_length_metrics(_coerce_numeric_columns(chunk)))
+                    new_rows += len(chunk)
+        print(f"Parsed {new_rows} new rows from {filepath}")
+        
+        if new_rows and moments.cells is not None:
+            _save_incremental_state({
+                'version': INCREMENTAL_STATS_VERSION,
+                'loader_version': LOADER_VERSION,
+                'source': os.path.basename(filepath),
+                'header': header.decode('utf-8'),
+                'offset': end,
+                'digest': _range_digest(f, len(header), end),
+                'rows': rows + new_rows,
+                'key_cols': moments.key_cols,
+                'metrics': moments.metrics,
+                'pairs': [list(pair) for pair in moments.pairs],
+                'cells': moments.to_dict(),
+            }, state_path)
+    
+    return rows + new_rows, moments, columns
+
+def create_incremental_reports(filepath, state_path, chunksize=100_000, skip_reports=()):
+    """
+    Create the aggregate and correlation reports (minus any in skip_reports) from persisted sufficient
+    statistics, parsing only the rows appended to the raw file since they were saved.
+    The statistics always cover every family, so a later run can still produce the skipped ones.
+    """
+    rows, moments, columns = update_incremental_stats(filepath, state_path, chunksize)
+    if moments.cells is None:
+        return rows, {}
+    
+    print(" Calculating aggregates and correlations from cell statistics...")
+    # Only correlate metrics the file actually has
+    return rows, moment_reports(moments, columns, skip_reports)
+
+def moment_reports(moments, metrics, skip_reports=()):
+    """
+    Create the aggregate and correlation reports (minus any in skip_reports) from CellMoments kept per
+    (TargetLength, EventKey) cell, correlating only the given metrics.
+    """
+    grouping_sets = _aggregate_grouping_sets(skip_reports)
+    reports = _split_aggregate_reports(grouping_sets, moments.rollup(grouping_sets), skip_reports)
+    if 'correlations' in skip_reports:
+        return reports
+    
+    [(_, _, corr, counts)] = moments.correlation_matrices(metrics=metrics)
+    by_length = [(key[0], length_rows, length_corr, length_counts) for key, length_rows, length_corr, length_counts
+                 in moments.correlation_matrices(['TargetLength'], metrics=metrics)]
+    overall_correlations, length_controlled_correlations = correlation_reports((corr, counts), by_length)
+    
+    reports['overall_correlations'] = pd.DataFrame([overall_correlations])
+    reports['length_controlled_correlations'] = length_controlled_correlations
+    return reports
+
+# Shared by every figure
+LABEL_FONTSIZE = 18
+TICK_LABEL_FONTSIZE = 16
+
+def _style_plots():
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
     plt.style.use('default')
     sns.set_palette("husl")
+
+def plot_metrics_scatter(df, path, dpi=300):
+    """Figure 1: Main metrics by length (as scatter plots)."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    label_fontsize = LABEL_FONTSIZE
+    tick_label_fontsize = TICK_LABEL_FONTSIZE
     
-    # Figure 1: Main metrics by length (as scatter plots)
     fig1, axes = plt.subplots(3, 2, figsize=(18, 18))
         
     # Flatten the axes array for easy iteration
@@ -229,102 +1419,215 @@ def create_visualizations(df, reports, output_dir, base_filename):
             fig1.delaxes(axes[i])
             
     plt.tight_layout()
-    fig1_path = os.path.join(output_dir, f"{base_filename}_metrics_by_length_scatter.png")
-    plt.savefig(fig1_path, dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    # Figure 2: Correlation Analysis by Target Length
-    if 'length_controlled_correlations' in reports and not reports['length_controlled_correlations'].empty:
-        fig2, axes = plt.subplots(2, 2, figsize=(15, 12))
-        fig2.suptitle('Consistency-Readability Trade-offs by Target Length', fontsize=20, fontweight='bold')
-        
-        length_corrs = reports['length_controlled_correlations']
-        corr_lengths = length_corrs['TargetLength'].values
-        
-        # Plot 1: NLI Average vs Flesch-Kincaid
-        ax = axes[0, 0]
-        ax.plot(corr_lengths, length_corrs['NLI_AverageScore_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#FF6B6B')
-        ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
-        ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
-        ax.set_title('Average NLI vs Flesch-Kincaid by Length', fontsize=label_fontsize)
-        ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(-1, 1)
-        ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
-
-        
-        # Plot 2: NLI Average vs Word Frequency
-        ax = axes[0, 1]
-        ax.plot(corr_lengths, length_corrs['NLI_AverageScore_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#4ECDC4')
-        ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
-        ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
-        ax.set_title('Average NLI vs Word Frequency by Length', fontsize=label_fontsize)
-        ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(-1, 1)
-        ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
-
-        # Plot 3: NLI Privacy Policy vs Readability
-        ax = axes[1, 0]
-        ax.plot(corr_lengths, length_corrs['NLI_DataCollection_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#E5D54F', label='NLI Data Collection vs Flesch-Kincaid')
-        ax.plot(corr_lengths, length_corrs['NLI_DataCollection_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#3B6B99', label='NLI Data Collection vs Word Frequency')
-        ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
-        ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
-        ax.set_title('Privacy Policy NLI vs Readability by Length', fontsize=label_fontsize)
-        ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(-1, 1)
-        ax.legend(fontsize=label_fontsize)
-        ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
-
-        # Plot 4: NLI PIPEDA vs Readability
-        ax = axes[1, 1]
-        ax.plot(corr_lengths, length_corrs['NLI_PrivacyExplanation_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#E5D54F', label='NLI Privacy Explanation vs Flesch-Kincaid')
-        ax.plot(corr_lengths, length_corrs['NLI_PrivacyExplanation_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#3B6B99', label='NLI Privacy Explanation vs Word Frequency')
-        ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
-        ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
-        ax.set_title('PIPEDA NLI vs Readability by Length', fontsize=label_fontsize)
-        ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(-1, 1)
-        ax.legend(fontsize=label_fontsize)
-        ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
+    fig1.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig1
 
-        plt.tight_layout()
-        fig2_path = os.path.join(output_dir, f"{base_filename}_correlation_analysis.png")
-        plt.savefig(fig2_path, dpi=300, bbox_inches='tight')
-        plt.show()
+def plot_length_correlations(length_corrs, path, dpi=300, window_corrs=None):
+    """
+    Figure 2: Correlation Analysis by Target Length.
+    With window_corrs (see sliding_window_correlations), each panel also gets the smooth curve over the
+    windows' mean word count.
+    """
+    import matplotlib.pyplot as plt
+    
+    label_fontsize = LABEL_FONTSIZE
+    tick_label_fontsize = TICK_LABEL_FONTSIZE
+    
+    fig2, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig2.suptitle('Consistency-Readability Trade-offs by Target Length', fontsize=20, fontweight='bold')
+    
+    corr_lengths = length_corrs['TargetLength'].values
+    
+    # Plot 1: NLI Average vs Flesch-Kincaid
+    ax = axes[0, 0]
+    ax.plot(corr_lengths, length_corrs['NLI_AverageScore_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#FF6B6B')
+    ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
+    ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
+    ax.set_title('Average NLI vs Flesch-Kincaid by Length', fontsize=label_fontsize)
+    ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(-1, 1)
+    ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
+    
+    
+    # Plot 2: NLI Average vs Word Frequency
+    ax = axes[0, 1]
+    ax.plot(corr_lengths, length_corrs['NLI_AverageScore_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#4ECDC4')
+    ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
+    ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
+    ax.set_title('Average NLI vs Word Frequency by Length', fontsize=label_fontsize)
+    ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(-1, 1)
+    ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
+    
+    # Plot 3: NLI Privacy Policy vs Readability
+    ax = axes[1, 0]
+    ax.plot(corr_lengths, length_corrs['NLI_DataCollection_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#E5D54F', label='NLI Data Collection vs Flesch-Kincaid')
+    ax.plot(corr_lengths, length_corrs['NLI_DataCollection_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#3B6B99', label='NLI Data Collection vs Word Frequency')
+    ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
+    ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
+    ax.set_title('Privacy Policy NLI vs Readability by Length', fontsize=label_fontsize)
+    ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(-1, 1)
+    ax.legend(fontsize=label_fontsize)
+    ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
+    
+    # Plot 4: NLI PIPEDA vs Readability
+    ax = axes[1, 1]
+    ax.plot(corr_lengths, length_corrs['NLI_PrivacyExplanation_vs_FleschKincaid'], 'o-', linewidth=2, markersize=8, color='#E5D54F', label='NLI Privacy Explanation vs Flesch-Kincaid')
+    ax.plot(corr_lengths, length_corrs['NLI_PrivacyExplanation_vs_WordFrequency'], 's-', linewidth=2, markersize=8, color='#3B6B99', label='NLI Privacy Explanation vs Word Frequency')
+    ax.set_xlabel('Target Length (words)', fontsize=label_fontsize)
+    ax.set_ylabel('Correlation Coefficient', fontsize=label_fontsize)
+    ax.set_title('PIPEDA NLI vs Readability by Length', fontsize=label_fontsize)
+    ax.axhline(y=0, color='gray', linestyle='--', alpha=0.7)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(-1, 1)
+    ax.legend(fontsize=label_fontsize)
+    ax.tick_params(axis='both', which='major', labelsize=tick_label_fontsize)
+    
+    if window_corrs is not None and not window_corrs.empty:
+        window_label = f"sliding window ({window_corrs['SampleSize'].iloc[0]} rows)"
+        panels = [
+            (axes[0, 0], [('NLI_AverageScore_vs_FleschKincaid', '#FF6B6B')]),
+            (axes[0, 1], [('NLI_AverageScore_vs_WordFrequency', '#4ECDC4')]),
+            (axes[1, 0], [('NLI_DataCollection_vs_FleschKincaid', '#E5D54F'),
+                          ('NLI_DataCollection_vs_WordFrequency', '#3B6B99')]),
+            (axes[1, 1], [('NLI_PrivacyExplanation_vs_FleschKincaid', '#E5D54F'),
+                          ('NLI_PrivacyExplanation_vs_WordFrequency', '#3B6B99')]),
+        ]
+        for ax, curves in panels:
+            for col, color in curves:
+                if col in window_corrs.columns:
+                    ax.plot(window_corrs['WordCountMean'], window_corrs[col], '-', linewidth=1.5, alpha=0.6,
+                            color=color, label=f'{col.split("_vs_")[1]}, {window_label}')
+            ax.set_xlabel('Target Length / Mean Actual Word Count (words)', fontsize=label_fontsize)
+            ax.legend(fontsize=label_fontsize * 0.6)
+    
+    plt.tight_layout()
+    fig2.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig2
 
-    # Figure 3: Overall Correlations Heatmap
-    fig3, ax = plt.subplots(1, 1, figsize=(10, 8))
+def plot_correlation_matrix(corr_matrix, path, dpi=300):
+    """Figure 3: Overall Correlations Heatmap."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
-    # Create correlation matrix
-    numeric_df = df.select_dtypes(include=[np.number])
-    corr_matrix = numeric_df.corr()
+    label_fontsize = LABEL_FONTSIZE
+    tick_label_fontsize = TICK_LABEL_FONTSIZE
+    
+    fig3, ax = plt.subplots(1, 1, figsize=(10, 8))
     
     # Create mask for upper triangle
     mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
     
     sns.heatmap(corr_matrix, mask=mask, annot=True, fmt='.3f', 
                 cmap='RdBu_r', center=0, square=True, ax=ax,
-                cbar_kws={'label': 'Correlation Coefficient', 'fontsize': label_fontsize},
+                cbar_kws={'label': 'Correlation Coefficient'},
                 annot_kws={"fontsize": label_fontsize})
+    # Colorbars take no font size of their own, so size the label once it exists
+    ax.collections[0].colorbar.set_label('Correlation Coefficient', fontsize=label_fontsize)
     ax.set_title('Overall Correlation Matrix', fontsize=14, fontweight='bold')
     ax.tick_params(axis='both', labelsize=label_fontsize)
     
     plt.tight_layout()
-    fig3_path = os.path.join(output_dir, f"{base_filename}_correlation_matrix.png")
-    plt.savefig(fig3_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    fig3.savefig(path, dpi=dpi, bbox_inches='tight')
+    return fig3
+
+def _render_figure(name, plot, data, path, dpi, profile=False):
+    """
+    Render one figure off-screen and free it (runs in plotting worker processes).
+    With profile, it also returns the worker's profile events of the figure for the parent's trace.
+    """
+    import matplotlib.pyplot as plt
+    
+    if profile:
+        enable_profiling()
+    try:
+        with profile_stage(f'figure:{name}', rows=len(data)):
+            _style_plots()
+            plt.close(plot(data, path, dpi))
+    finally:
+        events = disable_profiling() if profile else []
+    return path, events
+
+def create_visualizations(df, reports, output_dir, base_filename, dpi=300, figure_format='png', headless=False,
+                          workers=1, figures=None):
+    """
+    Create comprehensive visualizations with scatter plots and new charts (only those named in figures, if given).
+    Interactive runs show each figure as before. Headless runs switch to the non-interactive Agg backend and,
+    with more than one worker, render the independent figures concurrently in worker processes.
+    Every figure is closed once it has been saved.
+    """
+    import matplotlib.pyplot as plt
+    
+    def figure_path(name):
+        return os.path.join(output_dir, f"{base_filename}_{name}.{figure_format}")
+    
+    figures = FIGURES if figures is None else figures
+    
+    # Each job only gets the data its figure needs, so workers receive small pickles
+    jobs = []
+    if 'metrics_by_length_scatter' in figures:
+        scatter_columns = [col for col in AGGREGATE_METRICS if col in df.columns]
+        jobs.append(('metrics_by_length_scatter', plot_metrics_scatter, df[scatter_columns],
+                     figure_path('metrics_by_length_scatter')))
+    
+    if ('correlation_analysis' in figures and 'length_controlled_correlations' in reports
+            and not reports['length_controlled_correlations'].empty):
+        plot = plot_length_correlations
+        if 'window_correlations' in reports:
+            plot = functools.partial(plot_length_correlations, window_corrs=reports['window_correlations'])
+        jobs.append(('correlation_analysis', plot, reports['length_controlled_correlations'],
+                     figure_path('correlation_analysis')))
     
+    if 'correlation_matrix' in figures:
+        numeric_columns = [col for col in df.select_dtypes(include=[np.number]).columns
+                           if col not in BOOKKEEPING_COLUMNS]
+        (corr_matrix, _), _ = pairwise_correlation_matrices(df, numeric_columns)
+        jobs.append(('correlation_matrix', plot_correlation_matrix, corr_matrix, figure_path('correlation_matrix')))
+    
+    if headless:
+        plt.switch_backend('Agg')
+    
+    if headless and workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_batch_worker) as executor:
+            futures = [executor.submit(_render_figure, name, plot, data, path, dpi, _profiler is not None)
+                       for name, plot, data, path in jobs]
+            for future in futures:
+                _, events = future.result()
+                if _profiler is not None:
+                    _profiler.events.extend(events)
+    else:
+        for name, plot, data, path in jobs:
+            with profile_stage(f'figure:{name}', rows=len(data)):
+                _style_plots()
+                fig = plot(data, path, dpi)
+            if not headless:
+                plt.show()
+            plt.close(fig)
+    
+    figure_labels = {
+        'metrics_by_length_scatter': 'Metrics by length (scatter)',
+        'correlation_analysis': 'Correlation analysis',
+        'correlation_matrix': 'Correlation matrix',
+    }
+    figure_paths = [path for _, _, _, path in jobs]
     print(f"Visualizations saved:")
-    print(f"  • Metrics by length (scatter): {fig1_path}")
-    if 'length_controlled_correlations' in reports:
-        print(f"  • Correlation analysis: {fig2_path}")
-    print(f"  • Correlation matrix: {fig3_path}")
+    for name in FIGURES:
+        if figure_path(name) in figure_paths:
+            print(f"  • {figure_labels[name]}: {figure_path(name)}")
+    
+    return figure_paths
+
+def _export_report(report_df):
+    """Copy of a report with its numeric columns rounded to REPORT_DECIMALS for readability."""
+    numeric_columns = report_df.select_dtypes(include=[np.number]).columns
+    return report_df.round({col: REPORT_DECIMALS for col in numeric_columns})
 
 def save_reports(reports, output_dir, base_filename):
-    """Save all reports to CSV files."""
+    """Save all reports to CSV files, rounded on export (the reports themselves are left unrounded)."""
     
     saved_files = []
     
@@ -333,16 +1636,65 @@ def save_reports(reports, output_dir, base_filename):
             filename = f"{base_filename}_{report_name}.csv"
             filepath = os.path.join(output_dir, filename)
             
-            # Round numeric columns to 4 decimal places for readability
-            numeric_columns = report_df.select_dtypes(include=[np.number]).columns
-            report_df[numeric_columns] = report_df[numeric_columns].round(4)
-            
-            report_df.to_csv(filepath, index=False)
+            _export_report(report_df).to_csv(filepath, index=False)
             saved_files.append(filepath)
             print(f" Saved {report_name}: {filepath}")
     
     return saved_files
 
+def save_bundle(reports, output_dir, base_filename, data=None):
+    """
+    Save all reports (and data, the cleaned raw frame, if given) as CSV tables in one deflate-compressed zip,
+    <base_filename>_reports.zip, described by a manifest.json of every table's file, rows and column dtypes.
+    Reports are rounded on export like save_reports. The bundle is written to a temporary file and renamed
+    into place, so a crash leaves either the previous bundle or the new one, never a partial set.
+    Returns the bundle's path.
+    """
+    path = os.path.join(output_dir, f"{base_filename}_reports.zip")
+    tables = {name: _export_report(report_df) for name, report_df in reports.items() if not report_df.empty}
+    if data is not None:
+        tables['data'] = data
+    manifest = {
+        'version': BUNDLE_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'source': base_filename,
+        'decimals': REPORT_DECIMALS,
+        'tables': [],
+    }
+    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.abspath(output_dir), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+                for name, table in tables.items():
+                    member = f"{name}.csv"
+                    # Stream each table into the archive rather than building its CSV text in memory
+                    with bundle.open(member, 'w', force_zip64=True) as member_file:
+                        with io.TextIOWrapper(member_file, encoding='utf-8', newline='') as text:
+                            table.to_csv(text, index=False)
+                    manifest['tables'].append({'name': name, 'file': member, 'rows': len(table),
+                                               'columns': {col: str(dtype) for col, dtype in table.dtypes.items()}})
+                bundle.writestr('manifest.json', json.dumps(manifest, indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    
+    print(f" Saved {len(tables)} tables to {path}")
+    return path
+
+def load_bundle(path):
+    """Read a save_bundle zip back into a dict of table name -> DataFrame, with the manifest's dtypes."""
+    with zipfile.ZipFile(path) as bundle:
+        manifest = json.loads(bundle.read('manifest.json'))
+        tables = {}
+        for table in manifest['tables']:
+            with bundle.open(table['file']) as member_file:
+                tables[table['name']] = pd.read_csv(member_file, dtype=table['columns'], keep_default_na=True)
+    return tables
+
 def print_summary_statistics(df, reports):
     """Print key summary statistics to console."""
     
@@ -355,17 +1707,20 @@ def print_summary_statistics(df, reports):
     print(f" Event Types: {df['EventKey'].nunique()}")
     print(f" Target Lengths: {df['TargetLength'].nunique()} ({', '.join(map(str, sorted(df['TargetLength'].unique())))})")
     
-    # Overall metrics
+    # Overall metrics, averaged in float64 whatever the stored dtypes
+    def mean(col):
+        return df[col].astype(float).mean()
+    
     print(f"\n OVERALL RESULTS:")
-    print(f"  • Avg Word Count: {df['ActualWordCount'].mean():.1f}")
-    print(f"  • Avg Flesch-Kincaid: {df['FleschKincaid'].mean():.2f}")
-    print(f"  • Avg Word Freq: {df['WordFrequencyScore'].mean():.2f}")
-    print(f"  • Avg NLI Privacy Policy Score: {df['NLI_DataCollection'].mean():.3f}")
-    print(f"  • Avg NLI PIPEDA Score: {df['NLI_PrivacyExplanation'].mean():.3f}")
-    print(f"  • Avg NLI Avg Score: {df['NLI_AverageScore'].mean():.3f}")
+    print(f"  • Avg Word Count: {mean('ActualWordCount'):.1f}")
+    print(f"  • Avg Flesch-Kincaid: {mean('FleschKincaid'):.2f}")
+    print(f"  • Avg Word Freq: {mean('WordFrequencyScore'):.2f}")
+    print(f"  • Avg NLI Privacy Policy Score: {mean('NLI_DataCollection'):.3f}")
+    print(f"  • Avg NLI PIPEDA Score: {mean('NLI_PrivacyExplanation'):.3f}")
+    print(f"  • Avg NLI Avg Score: {mean('NLI_AverageScore'):.3f}")
     
     # Length adherence
-    length_ratio = (df['ActualWordCount'] / df['TargetLength']).mean()
+    length_ratio = add_length_metrics(df)['LengthRatio'].mean()
     print(f"\n LENGTH ADHERENCE:")
     print(f"  • Overall: {length_ratio:.2f}x target length on average")
     
@@ -384,56 +1739,590 @@ def print_summary_statistics(df, reports):
         print(f"  • NLI Privacy Policy vs Word Frequency: {corr_data['NLI_DataCollection_vs_WordFrequency']:.3f}")
         print(f"  • NLI PIPEDA vs Flesch-Kincaid: {corr_data['NLI_PrivacyExplanation_vs_FleschKincaid']:.3f}")
         print(f"  • NLI PIPEDA vs Word Frequency: {corr_data['NLI_PrivacyExplanation_vs_WordFrequency']:.3f}")
-
-def main():
-    if len(sys.argv) != 2:
-        print(" Usage: python analyze_results.py <raw_data_csv_path>")
-        sys.exit(1)
     
-    raw_data_path = sys.argv[1]
+    if 'metric_regressions' in reports and not reports['metric_regressions'].empty:
+        regressions = reports['metric_regressions']
+        slopes = regressions[regressions['Term'] == 'ActualWordCount']
+        print(f"\n WORD COUNT EFFECTS (per word, holding event and instruction type fixed):")
+        for slope in slopes.itertuples(index=False):
+            print(f"  • {slope.Metric}: {slope.Coefficient:+.4f} ± {slope.StdError:.4f} (R² {slope.RSquared:.3f})")
     
-    if not os.path.exists(raw_data_path):
-        print(f" File not found: {raw_data_path}")
-        sys.exit(1)
+    if 'partial_correlations' in reports and not reports['partial_correlations'].empty:
+        print(f"\n PARTIAL CORRELATIONS (controlling for word count):")
+        for partial in reports['partial_correlations'].itertuples(index=False):
+            print(f"  • {partial.Controls} ({partial.SampleSize} rows): "
+                  f"NLI Avg vs Flesch-Kincaid {partial.NLI_AverageScore_vs_FleschKincaid:.3f}, "
+                  f"NLI Avg vs Word Frequency {partial.NLI_AverageScore_vs_WordFrequency:.3f}")
+
+def stage_key(stage, content_hash, params=()):
+    """Content address of a stage's outputs: its code version, the raw data they are computed from and parameters."""
+    payload = json.dumps([stage, STAGE_VERSIONS[stage], LOADER_VERSION, content_hash, list(params)])
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+def _pipeline_stage_keys(content_hash, options):
+    """Keys of every stage a run with options (an AnalysisOptions) produces: report families, then figures."""
+    # Every stage depends on the scores, so rescored data keys every stage on the scorer version
+    scores = []
+    if options.rescore:
+        from readability_scores import SCORER_VERSION
+        scores = [['rescored', SCORER_VERSION]]
+    # Sliding windows change the correlations and the figure drawn from them
+    windows = [['window', options.window, options.window_stride]] if options.window else []
+    # Reports saved into a bundle live in a different file than their CSVs
+    layout = [['bundle', options.bundle_data]] if options.bundle else []
+    keys = {
+        family: stage_key(family, content_hash,
+                          ([options.resamples, options.seed] + windows if family == 'correlations' else [])
+                          + layout + scores)
+        for family in REPORT_FAMILIES if family not in options.skip_reports
+    }
+    if options.plots:
+        for figure in FIGURES:
+            inputs = FIGURE_INPUTS.get(figure, [])
+            if not any(family in options.skip_reports for family in inputs):
+                keys[figure] = stage_key(figure, content_hash,
+                                         [options.dpi, options.figure_format]
+                                         + [STAGE_VERSIONS[family] for family in inputs]
+                                         + (windows if inputs else []) + scores)
+    return keys
+
+def _load_stage_manifest(manifest_path):
+    """Read the stage manifest, or return an empty one if there is none we can use."""
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'rows': None, 'stages': {}}
+    if manifest.get('version') != STAGE_MANIFEST_VERSION:
+        return {'rows': None, 'stages': {}}
+    return manifest
+
+def _save_stage_manifest(manifest, manifest_path):
+    """Atomically write the stage manifest."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(manifest_path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(dict(manifest, version=STAGE_MANIFEST_VERSION), f, indent=2)
+        os.replace(tmp_path, manifest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _stage_outputs(paths):
+    """Manifest record of a stage's output files: file name -> content hash."""
+    return {os.path.basename(path): file_content_hash(path) for path in paths}
+
+def _stage_is_fresh(entry, key, output_dir):
+    """Whether a manifest entry was produced with this key and its outputs are still on disk, unmodified."""
+    return entry is not None and entry['key'] == key and all(
+        os.path.exists(os.path.join(output_dir, name)) and file_content_hash(os.path.join(output_dir, name)) == digest
+        for name, digest in entry['outputs'].items()
+    )
+
+@dataclass(frozen=True)
+class AnalysisOptions:
+    """How run_analysis and run_batch analyze each raw data file; the defaults match the command line's."""
+    chunksize: int = None
+    use_cache: bool = True
+    incremental: bool = False
+    resamples: int = 0
+    seed: int = 0
+    resample_workers: int = 1
+    dpi: int = 300
+    figure_format: str = 'png'
+    headless: bool = False
+    plot_workers: int = 1
+    plots: bool = True
+    skip_reports: tuple = ()
+    reuse: bool = True
+    rescore: bool = False
+    window: int = None
+    window_stride: int = None
+    bundle: bool = False
+    bundle_data: bool = False
     
-    # Load data
-    df = load_and_clean_data(raw_data_path)
-    if df is None:
-        sys.exit(1)
+    @classmethod
+    def from_args(cls, args):
+        """The options main() parsed; --bundle-data implies --bundle."""
+        return cls(chunksize=args.chunksize, use_cache=args.use_cache, incremental=args.incremental,
+                   resamples=args.bootstrap, seed=args.seed, dpi=args.dpi, figure_format=args.figure_format,
+                   headless=args.headless, plots=args.plots, skip_reports=tuple(args.skip_reports),
+                   reuse=args.reuse, rescore=args.rescore, window=args.window, window_stride=args.window_stride,
+                   bundle=args.bundle or args.bundle_data, bundle_data=args.bundle_data)
+
+def run_analysis(raw_data_path, options=None):
+    """
+    Run the load -> aggregate -> save -> plot pipeline for one raw data file, as options (an AnalysisOptions,
+    by default AnalysisOptions()) say.
+    Returns the cleaned data, the reports, the files written and per-stage timings, or None if loading failed.
+    With a chunksize the file is streamed instead: only the aggregate reports are produced and no data is returned.
+    use_cache=False always re-parses the CSV instead of reading the columnar cache.
+    incremental=True keeps sufficient statistics next to the reports and on later runs only parses the rows
+    appended since; it produces the aggregate and correlation reports but no data or figures.
+    With resamples, correlations get bootstrap intervals and permutation p-values (seeded by seed, spread over
+    resample_workers processes); this needs every row, so it is skipped when streaming or incremental.
+    Figures are saved at dpi in figure_format; headless runs never open windows and may use plot_workers processes.
+    plots=False skips the figures (and never imports matplotlib); families in skip_reports are not produced.
+    Report families and figures whose inputs and parameters are unchanged since the last run (see STAGE_VERSIONS)
+    are reused rather than redone, and the data is not even loaded when everything is up to date; reuse=False
+    redoes every stage. Reused figures are not shown again.
+    rescore=True recomputes ActualWordCount and the readability scores from the explanation texts stored in the raw
+    file, or in the explanations file run_experiments.py writes next to it (see readability_scores.py), spread over
+    resample_workers processes, instead of using the stored scores.
+    A window adds sliding-window correlation curves of that many rows, moved window_stride rows at a time.
+    bundle=True writes the reports into one compressed zip (see save_bundle) instead of a CSV each, with the
+    cleaned data too if bundle_data; the bundle holds every report family, so they are all redone together.
+    """
+    options = options or AnalysisOptions()
+    timings = {}
     
     # Setup output directory and base filename
     output_dir = os.path.dirname(raw_data_path)
     base_filename = os.path.splitext(os.path.basename(raw_data_path))[0]
     base_filename = base_filename.replace('_raw', '_analysis')
     
-    # Create aggregation reports
-    reports = create_aggregation_reports(df)
+    if options.incremental or options.chunksize:
+        if options.resamples:
+            print(" Warning: correlation resampling needs every row and is skipped with --chunksize/--incremental")
+        if options.rescore:
+            print(" Warning: readability rescoring is skipped with --chunksize/--incremental")
+        stage_start = time.perf_counter()
+        try:
+            with profile_stage('incremental' if options.incremental else 'stream') as stage:
+                if options.incremental:
+                    state_path = os.path.join(output_dir, f"{base_filename}_stats.json")
+                    rows, reports = create_incremental_reports(raw_data_path, state_path,
+                                                               options.chunksize or 100_000, options.skip_reports)
+                else:
+                    rows, reports = create_streaming_aggregation_reports(raw_data_path, options.chunksize,
+                                                                         options.skip_reports)
+                stage['rows'] = rows
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return None
+        timings['aggregate'] = time.perf_counter() - stage_start
+        
+        stage_start = time.perf_counter()
+        with profile_stage('save_reports'):
+            if options.bundle:
+                saved_files = [save_bundle(reports, output_dir, base_filename)] if reports else []
+            else:
+                saved_files = save_reports(reports, output_dir, base_filename)
+        timings['save'] = time.perf_counter() - stage_start
+        
+        return {
+            'df': None,
+            'rows': rows,
+            'reports': reports,
+            'output_dir': output_dir,
+            'saved_files': saved_files,
+            'figure_files': [],
+            'reused_files': [],
+            'timings': timings,
+        }
+    
+    # Work out which stages are out of date
+    end = committed_size(raw_data_path)
+    content_hash = file_content_hash(raw_data_path, end=end)
+    manifest_path = os.path.join(output_dir, f"{base_filename}_stages.json")
+    manifest = _load_stage_manifest(manifest_path) if options.reuse else {'rows': None, 'stages': {}}
+    keys = _pipeline_stage_keys(content_hash, options)
+    stale = [stage for stage, key in keys.items() if not _stage_is_fresh(manifest['stages'].get(stage), key, output_dir)]
+    if options.bundle and any(family in stale for family in REPORT_FAMILIES):
+        # The bundle is rewritten as a whole, so every family in it has to be redone
+        stale = [stage for stage in keys if stage in REPORT_FAMILIES or stage in stale]
+    reused_files = [os.path.join(output_dir, name) for stage in keys if stage not in stale
+                    for name in manifest['stages'][stage]['outputs']]
     
-    # Save all reports
-    saved_files = save_reports(reports, output_dir, base_filename)
+    if not stale:
+        print(f" All reports and figures for {raw_data_path} are up to date")
+        return {
+            'df': None,
+            'rows': manifest['rows'],
+            'reports': {},
+            'output_dir': output_dir,
+            'saved_files': [],
+            'figure_files': [],
+            'reused_files': reused_files,
+            'timings': timings,
+        }
+    if reused_files:
+        print(f" Reusing {len(keys) - len(stale)} up-to-date stages ({len(reused_files)} files)")
     
-    # Create visualizations
+    # Load data
+    stage_start = time.perf_counter()
+    with profile_stage('load') as stage:
+        df = load_and_clean_data(raw_data_path, options.use_cache, content_hash, end)
+        stage['rows'] = 0 if df is None else len(df)
+    timings['load'] = time.perf_counter() - stage_start
+    if df is None:
+        return None
+    
+    # Recompute the scores from the explanation texts
+    if options.rescore:
+        import readability_scores
+        
+        texts = df
+        if not readability_scores.has_explanation_texts(df):
+            # Files written by run_experiments.py keep their texts in a JSON Lines file alongside
+            texts = readability_scores.join_explanation_texts(df, raw_data_path)
+            if texts is None:
+                print(f"Error rescoring readability: {raw_data_path} has no explanation text columns "
+                      f"({', '.join(readability_scores.EXPLANATION_FIELDS)}) and no complete "
+                      f"{os.path.basename(readability_scores.explanations_path(raw_data_path))}")
+                return None
+        stage_start = time.perf_counter()
+        with profile_stage('rescore', rows=len(df)):
+            rescored = readability_scores.rescore_readability(texts, workers=options.resample_workers)
+            df = compact_dtypes(rescored[[col for col in rescored.columns if col in df.columns]])
+        timings['rescore'] = time.perf_counter() - stage_start
+        print(f"Rescored readability of {len(df)} explanations")
+    
+    # Create aggregation reports, for stale families and the inputs of stale figures only
+    stale_families = [family for family in REPORT_FAMILIES if family in stale]
+    stale_figures = [figure for figure in FIGURES if figure in stale]
+    needed = set(stale_families).union(*(FIGURE_INPUTS.get(figure, []) for figure in stale_figures))
+    stage_start = time.perf_counter()
+    with profile_stage('create_aggregation_reports', rows=len(df)):
+        reports = create_aggregation_reports(df, options.resamples if 'correlations' in stale else 0, options.seed,
+                                             options.resample_workers,
+                                             [family for family in REPORT_FAMILIES if family not in needed],
+                                             options.window, options.window_stride)
+    timings['aggregate'] = time.perf_counter() - stage_start
+    
+    # Save the stale reports
+    stage_start = time.perf_counter()
+    saved_files = []
+    if options.bundle:
+        if stale_families:
+            bundle_reports = {name: reports[name] for family in stale_families for name in FAMILY_REPORTS[family]
+                              if name in reports}
+            with profile_stage('save_bundle', rows=sum(len(report) for report in bundle_reports.values())):
+                saved_files = [save_bundle(bundle_reports, output_dir, base_filename,
+                                           df if options.bundle_data else None)]
+            for family in stale_families:
+                manifest['stages'][family] = {'key': keys[family], 'outputs': _stage_outputs(saved_files)}
+    else:
+        for family in stale_families:
+            family_reports = {name: reports[name] for name in FAMILY_REPORTS[family] if name in reports}
+            with profile_stage(f'save_reports:{family}',
+                               rows=sum(len(report) for report in family_reports.values())):
+                family_files = save_reports(family_reports, output_dir, base_filename)
+            manifest['stages'][family] = {'key': keys[family], 'outputs': _stage_outputs(family_files)}
+            saved_files.extend(family_files)
+    timings['save'] = time.perf_counter() - stage_start
+    
+    # Create the stale visualizations
+    figure_files = []
+    if stale_figures:
+        stage_start = time.perf_counter()
+        try:
+            with profile_stage('create_visualizations'):
+                figure_files = create_visualizations(df, reports, output_dir, base_filename, options.dpi,
+                                                     options.figure_format, options.headless, options.plot_workers,
+                                                     stale_figures)
+            for figure in stale_figures:
+                path = os.path.join(output_dir, f"{base_filename}_{figure}.{options.figure_format}")
+                manifest['stages'][figure] = {'key': keys[figure],
+                                              'outputs': _stage_outputs([path] if path in figure_files else [])}
+        except Exception as e:
+            print(f"Warning: Could not create visualizations: {e}")
+            print("Make sure matplotlib and seaborn are installed: pip install matplotlib seaborn")
+        timings['plot'] = time.perf_counter() - stage_start
+    
+    manifest['rows'] = len(df)
+    _save_stage_manifest(manifest, manifest_path)
+    
+    return {
+        'df': df,
+        'rows': len(df),
+        'reports': reports,
+        'output_dir': output_dir,
+        'saved_files': saved_files,
+        'figure_files': figure_files,
+        'reused_files': reused_files,
+        'timings': timings,
+    }
+
+def find_raw_data_files(paths):
+    """Expand files, trial directories and glob patterns into a sorted list of raw data files."""
+    raw_files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = glob.glob(os.path.join(path, '**', '*_raw_*.csv'), recursive=True)
+        elif os.path.isfile(path):
+            candidates = [path]
+        else:
+            candidates = glob.glob(path, recursive=True)
+        
+        # Skip derived files that reuse the raw file name (e.g. *_raw_<timestamp>_length_controlled_correlations.csv)
+        raw_files.update(os.path.abspath(candidate) for candidate in candidates
+                         if os.path.isfile(candidate) and RAW_FILE_PATTERN.search(candidate))
+    
+    return sorted(raw_files)
+
+def _init_batch_worker():
+    """Make worker processes render figures off-screen, without importing matplotlib before it is needed."""
+    os.environ['MPLBACKEND'] = 'Agg'
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].switch_backend('Agg')
+
+def _analyze_file_worker(raw_data_path, options, profile=False):
+    """
+    Analyze one raw data file inside a batch worker and return a picklable manifest entry.
+    With profile, the entry also carries the file's profile events under 'profile'.
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    entry = {'raw_data_path': raw_data_path, 'status': 'ok', 'rows': None, 'outputs': [], 'reused': [],
+             'timings': {}}
+    
+    if profile:
+        enable_profiling()
     try:
-        create_visualizations(df, reports, output_dir, base_filename)
+        with contextlib.redirect_stdout(log):
+            # Files are already spread over processes, so each one runs serially and renders off-screen
+            result = run_analysis(raw_data_path, replace(options, resample_workers=1, headless=True,
+                                                         plot_workers=1))
+        if result is None:
+            entry['status'] = 'error'
+            entry['error'] = 'could not load data'
+        else:
+            entry['rows'] = result['rows']
+            entry['outputs'] = result['saved_files'] + result['figure_files']
+            entry['reused'] = result['reused_files']
+            entry['timings'] = result['timings']
     except Exception as e:
-        print(f"Warning: Could not create visualizations: {e}")
-        print("Make sure matplotlib and seaborn are installed: pip install matplotlib seaborn")
-    
-    # Print summary to console
-    print_summary_statistics(df, reports)
-    
-    # Final output summary
-    print(f"\n ANALYSIS COMPLETE!")
-    print(f" Output Directory: {output_dir}")
-    print(f" Generated {len(saved_files)} report files:")
-    for file in saved_files:
-        print(f"  • {os.path.basename(file)}")
-    
-    print(f"\n Key Files:")
-    print(f"  • by_length.csv - Main results by target length")
-    print(f"  • overall_correlations.csv - Overall correlation analysis") 
-    print(f"  • length_controlled_correlations.csv - Correlations within each length")
-    print(f"  • length_analysis.csv - Length adherence analysis")
+        entry['status'] = 'error'
+        entry['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if 'matplotlib.pyplot' in sys.modules:
+            sys.modules['matplotlib.pyplot'].close('all')
+        if profile:
+            entry['profile'] = disable_profiling()
+    
+    entry['timings']['total'] = time.perf_counter() - start
+    entry['log'] = log.getvalue()
+    return entry
+
+def run_batch(raw_data_paths, max_workers=None, manifest_path=None, options=None):
+    """
+    Analyze many raw data files in parallel worker processes, each as options (an AnalysisOptions) say,
+    and write a JSON manifest of the run.
+    When profiling is enabled, every worker profiles its files and the events join this process's profile.
+    """
+    options = options or AnalysisOptions()
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(raw_data_paths)))
+    print(f" Analyzing {len(raw_data_paths)} raw data files with {workers} worker processes...")
+    
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    entries = []
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker) as executor:
+        futures = {executor.submit(_analyze_file_worker, path, options, _profiler is not None): path
+                   for path in raw_data_paths}
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                entry = {'raw_data_path': futures[future], 'status': 'error', 'rows': None, 'outputs': [],
+                         'timings': {}, 'error': f"{type(e).__name__}: {e}", 'log': ''}
+            events = entry.pop('profile', [])
+            if _profiler is not None:
+                _profiler.events.extend(events)
+            entries.append(entry)
+            
+            if entry['status'] == 'ok':
+                print(f" [{len(entries)}/{len(futures)}] {entry['raw_data_path']} - {entry['rows']} rows, "
+                      f"{len(entry['outputs'])} outputs ({len(entry['reused'])} reused) in "
+                      f"{entry['timings']['total']:.2f}s")
+            else:
+                print(f" [{len(entries)}/{len(futures)}] {entry['raw_data_path']} - FAILED: {entry['error']}")
+    
+    manifest = {
+        'started_at': started_at.isoformat(),
+        'workers': workers,
+        'wall_time': time.perf_counter() - start,
+        'files': sorted(entries, key=lambda entry: entry['raw_data_path']),
+    }
+    
+    if manifest_path is None:
+        timestamp = started_at.isoformat(timespec='milliseconds').replace('+00:00', 'Z').replace(':', '-').replace('.', '-')
+        common_dir = os.path.commonpath([os.path.dirname(path) for path in raw_data_paths])
+        manifest_path = os.path.join(common_dir, f"analysis_manifest_{timestamp}.json")
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    failed = [entry for entry in entries if entry['status'] != 'ok']
+    print(f"\n BATCH COMPLETE!")
+    print(f" Analyzed {len(entries) - len(failed)}/{len(entries)} files in {manifest['wall_time']:.2f}s")
+    print(f" Manifest: {manifest_path}")
+    
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Aggregate raw experiment data, calculate correlations and create graphs.'
+    )
+    parser.add_argument('paths', nargs='+',
+                        help='raw data CSV, or directories / glob patterns of raw data CSVs for batch mode')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='maximum number of worker processes: one file each in batch mode (default: number of '
+                             'CPUs), or for correlation resampling when analyzing a single file (default: 1)')
+    parser.add_argument('--manifest', default=None,
+                        help='where to write the batch manifest (default: next to the raw data files)')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream raw data in chunks of this many rows to keep memory flat '
+                             '(aggregate reports only: no correlations or figures)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='keep per-cell sufficient statistics next to the reports and only parse rows appended '
+                             'since the last run (reports only: no figures)')
+    parser.add_argument('--bootstrap', type=int, default=0, metavar='RESAMPLES',
+                        help='add bootstrap confidence intervals and permutation p-values to the correlation '
+                             'reports, using this many resamples (e.g. 10000)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='random seed for --bootstrap (default: 0)')
+    parser.add_argument('--headless', action='store_true',
+                        help='never open figure windows; render figures in parallel worker processes '
+                             '(always on in batch mode)')
+    parser.add_argument('--dpi', type=int, default=300,
+                        help='figure resolution (default: 300; e.g. 72 for quick previews)')
+    parser.add_argument('--figure-format', choices=['png', 'svg', 'pdf'], default='png',
+                        help='figure file format (default: png)')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help=f'always re-parse raw CSVs instead of using the {RAW_CACHE_DIR} columnar cache')
+    parser.add_argument('--memory-report', action='store_true',
+                        help='print the bytes per row of the loaded data in the original and compact layouts')
+    parser.add_argument('--force', dest='reuse', action='store_false',
+                        help='redo every report and figure, even those whose inputs have not changed')
+    parser.add_argument('--no-plots', dest='plots', action='store_false',
+                        help='only write the CSV reports; matplotlib and seaborn are never imported')
+    parser.add_argument('--skip-report', dest='skip_reports', action='append', default=[],
+                        choices=REPORT_FAMILIES, metavar='FAMILY',
+                        help=f'do not calculate or write this report family; repeat to skip several '
+                             f'({", ".join(REPORT_FAMILIES)})')
+    parser.add_argument('--rescore-readability', dest='rescore', action='store_true',
+                        help='recompute word counts and readability scores from the explanation texts in the raw '
+                             'data (why, storage, access, privacyExplanation columns, or the <raw file>_explanations'
+                             '.jsonl run_experiments.py writes) instead of using the stored ones')
+    parser.add_argument('--meta-analysis', action='store_true',
+                        help='pool every raw data file found in paths as one trial each: pooled per-length '
+                             'correlations and metric means with between-trial heterogeneity (see meta_analysis.py)')
+    parser.add_argument('--bundle', action='store_true',
+                        help='write the reports into one compressed <name>_reports.zip with a manifest, atomically, '
+                             'instead of a CSV file each')
+    parser.add_argument('--bundle-data', action='store_true',
+                        help='like --bundle, and also put the cleaned raw data in the bundle')
+    parser.add_argument('--store', default=None, metavar='DB',
+                        help='ingest every raw data file found in paths into this SQLite results store (only new or '
+                             'changed files), then write the aggregate and correlation reports over the whole store, '
+                             'computed by the database (see results_store.py)')
+    parser.add_argument('--trial', dest='trials', action='append', default=None, metavar='TRIAL',
+                        help='with --store, only report on this trial (the raw file\'s directory name); repeat for '
+                             'several')
+    parser.add_argument('--window', type=int, default=None, metavar='ROWS',
+                        help='also correlate the metrics over a sliding window of this many rows in word count '
+                             'order, for smooth correlation-vs-length curves (e.g. 200)')
+    parser.add_argument('--window-stride', type=int, default=None, metavar='ROWS',
+                        help='rows the --window moves between curve points (default: a tenth of the window)')
+    parser.add_argument('--profile', default=None, metavar='PATH',
+                        help='record the wall time, CPU time, peak memory and rows of every pipeline stage and write '
+                             'them to PATH (tracing memory slows the run down somewhat)')
+    parser.add_argument('--profile-format', choices=['chrome', 'json'], default='chrome',
+                        help='--profile output: a Chrome trace for chrome://tracing or Perfetto, or a flat JSON '
+                             'list of stages (default: chrome)')
+    args = parser.parse_args()
+    
+    if args.profile:
+        enable_profiling()
+        try:
+            _run(args)
+        finally:
+            write_profile(disable_profiling(), args.profile, args.profile_format)
+    else:
+        _run(args)
+
+def _run(args):
+    """Run the analysis main() parsed the command line for."""
+    
+    if args.meta_analysis:
+        import meta_analysis
+        
+        raw_data_paths = find_raw_data_files(args.paths)
+        if not raw_data_paths:
+            print(f" No raw data files found in: {', '.join(args.paths)}")
+            sys.exit(1)
+        meta_analysis.run_meta_analysis(raw_data_paths, args.workers, args.use_cache)
+        return
+    
+    if args.store:
+        import results_store
+        
+        raw_data_paths = find_raw_data_files(args.paths)
+        if not raw_data_paths:
+            print(f" No raw data files found in: {', '.join(args.paths)}")
+            sys.exit(1)
+        results_store.run_store_reports(raw_data_paths, args.store, args.trials, skip_reports=args.skip_reports)
+        return
+    
+    # A single raw data file keeps the original interactive behaviour
+    if len(args.paths) == 1 and not os.path.isdir(args.paths[0]) and not glob.has_magic(args.paths[0]):
+        raw_data_path = args.paths[0]
+        
+        if not os.path.exists(raw_data_path):
+            print(f" File not found: {raw_data_path}")
+            sys.exit(1)
+        
+        options = replace(AnalysisOptions.from_args(args), resample_workers=args.workers or 1,
+                          plot_workers=min(3, args.workers or os.cpu_count() or 1))  # at most 3 figures
+        result = run_analysis(raw_data_path, options)
+        if result is None:
+            sys.exit(1)
+        
+        df = result['df']
+        reports = result['reports']
+        output_dir = result['output_dir']
+        saved_files = result['saved_files']
+        reused_files = result['reused_files']
+        
+        # Print summary to console
+        if df is not None:
+            print_summary_statistics(df, reports)
+        
+        if args.memory_report and not (args.incremental or args.chunksize):
+            if df is None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    df = load_and_clean_data(raw_data_path, args.use_cache)
+            print_memory_report(df)
+    
+        # Final output summary
+        print(f"\n ANALYSIS COMPLETE!")
+        print(f" Output Directory: {output_dir}")
+        print(f" Generated {len(saved_files)} report files:")
+        for file in saved_files:
+            print(f"  • {os.path.basename(file)}")
+        if reused_files:
+            print(f" Reused {len(reused_files)} up-to-date outputs (--force to regenerate)")
+    
+        print(f"\n Key Files:")
+        print(f"  • by_length.csv - Main results by target length")
+        print(f"  • overall_correlations.csv - Overall correlation analysis") 
+        print(f"  • length_controlled_correlations.csv - Correlations within each length")
+        print(f"  • partial_correlations.csv - Correlations with word count regressed out of every row")
+        print(f"  • metric_regressions.csv - Every metric fitted on word count, event and instruction type")
+        print(f"  • length_analysis.csv - Length adherence analysis")
+
+    else:
+        raw_data_paths = find_raw_data_files(args.paths)
+        if not raw_data_paths:
+            print(f" No raw data files found in: {', '.join(args.paths)}")
+            sys.exit(1)
+        
+        manifest = run_batch(raw_data_paths, args.workers, args.manifest, AnalysisOptions.from_args(args))
+        if any(entry['status'] != 'ok' for entry in manifest['files']):
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Performance benchmarks and report regression checks for the Python analysis scripts.
+Run them from backend/ai-testing, e.g. python -m benchmarks.bench_loader
+"""
@@ -0,0 +1,104 @@
+"""
+Loader benchmark: rows/sec and peak RSS of the original loader against the typed loader and the
+chunked loader feeding CellMoments.
+
+Usage: python -m benchmarks.bench_loader [rows]
+Every loader runs in a fresh subprocess so its peak RSS is not inflated by the others.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_TESTING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOADERS = ['legacy', 'typed', 'chunked']
+
+def legacy_load_and_clean_data(filepath):
+    """The loader as it was before the typed schema: default dtypes, then N/A replacement and coercion."""
+    import numpy as np
+    import pandas as pd
+    
+    df = pd.read_csv(filepath)
+    df = df.replace('N/A', np.nan)
+    numeric_columns = ['TargetLength', 'ActualWordCount', 'NLI_DataCollection', 
+                       'NLI_PrivacyExplanation', 'NLI_AverageScore', 
+                       'FleschKincaid', 'WordFrequencyScore']
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def measure(loader, path, chunksize=100_000):
+    """Run one loader over path in this process and return rows/sec and memory figures."""
+    import analyze_data
+    
+    baseline_mb = peak_rss_mb()
+    start = time.perf_counter()
+    
+    if loader == 'legacy':
+        rows = len(legacy_load_and_clean_data(path))
+    elif loader == 'typed':
+        rows = len(analyze_data.load_and_clean_data(path))
+    elif loader == 'chunked':
+        moments = analyze_data.CellMoments(['TargetLength', 'EventKey'], analyze_data.AGGREGATE_METRICS)
+        rows = 0
+        for chunk in analyze_data.iter_clean_chunks(path, chunksize):
+            moments.update(chunk)
+            rows += len(chunk)
+    else:
+        raise ValueError(f"Unknown loader: {loader}")
+    
+    elapsed = time.perf_counter() - start
+    return {
+        'loader': loader,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float('inf'),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_above_imports_mb': peak_rss_mb() - baseline_mb,
+    }
+
+def run_isolated(loader, path):
+    """Measure a loader in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_loader', '--measure', loader, path],
+        cwd=AI_TESTING_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        import contextlib, io
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = measure(sys.argv[2], sys.argv[3])
+        print(json.dumps(result))
+        return
+    
+    from benchmarks.synthetic import write_raw_csv
+    
+    rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'readability_length_exp_raw_benchmark.csv')
+        print(f" Generating {rows} synthetic rows...")
+        write_raw_csv(path, rows)
+        print(f" File size: {os.path.getsize(path) / (1024 * 1024):.1f} MB\n")
+        
+        print(f" {'Loader':<10}{'Rows/sec':>14}{'Seconds':>10}{'Peak RSS (MB)':>16}{'Above imports':>16}")
+        for loader in LOADERS:
+            result = run_isolated(loader, path)
+            print(f" {loader:<10}{result['rows_per_sec']:>14,.0f}{result['seconds']:>10.2f}"
+                  f"{result['peak_rss_mb']:>16.1f}{result['peak_rss_above_imports_mb']:>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+NLI harness benchmark: throughput and cache hit rate of nli_scores.py with the deterministic fake scorer, against
+scoring every pair in its own call as nliEvaluator.ts does, on synthetic explanations.
+
+Usage: python -m benchmarks.bench_nli [--rows 1e3 1e4] [--variants 3] [--latency 0.002] [--pair-latency 0.0005]
+The fake scorer sleeps latency per call plus pair-latency per hypothesis, standing in for a model whose fixed
+per-call cost (tokenizing the premise, launching the forward pass) is amortized over a batch.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import make_explanations
+
+def per_pair(explanations, scorer):
+    """Score every pair in its own call, without deduplication or caching (the TypeScript loop)."""
+    import nli_scores
+
+    data_premises, data_hypotheses, privacy_premises, privacy_hypotheses = nli_scores.nli_pairs(explanations)
+    start = time.perf_counter()
+    for premise, hypothesis in zip(data_premises + privacy_premises, data_hypotheses + privacy_hypotheses):
+        scorer.score(premise, [hypothesis])
+    seconds = time.perf_counter() - start
+    pairs = len(data_premises) * 2
+    return {'pairs': pairs, 'scored': pairs, 'batches': pairs, 'cache_hits': 0, 'unique_pairs': pairs,
+            'seconds': seconds, 'pairs_per_second': pairs / seconds}
+
+def main():
+    import nli_scores
+
+    parser = argparse.ArgumentParser(description='Benchmark the batched, cached NLI harness with a fake scorer.')
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e3, 1e4], help='explanations (default: 1e3 1e4)')
+    parser.add_argument('--event-keys', type=int, default=40, help='EventKey cardinality (default: 40)')
+    parser.add_argument('--variants', type=int, default=3,
+                        help='distinct explanations per event and target length (default: 3)')
+    parser.add_argument('--batch-size', type=int, default=nli_scores.DEFAULT_BATCH_SIZE)
+    parser.add_argument('--latency', type=float, default=0.002, help='fake seconds per scorer call (default: 0.002)')
+    parser.add_argument('--pair-latency', type=float, default=0.0005,
+                        help='fake seconds per scored pair (default: 0.0005)')
+    parser.add_argument('--per-pair-max-rows', type=float, default=2e3,
+                        help='skip the per-pair baseline on more explanations than this (default: 2e3)')
+    args = parser.parse_args()
+
+    scorer = nli_scores.FakeScorer(latency=args.latency, pair_latency=args.pair_latency)
+    print(f" {'Explanations':>12}  {'Mode':<16}{'Pairs':>9}{'Scored':>9}{'Calls':>8}{'Seconds':>10}"
+          f"{'Pairs/sec':>12}{'Hit rate':>10}")
+    for rows in (int(rows) for rows in args.rows):
+        explanations = make_explanations(rows, args.event_keys, args.variants)
+        runs = []
+        if rows <= args.per_pair_max_rows:
+            runs.append(('per pair', per_pair(explanations, scorer)))
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = nli_scores.NLIScoreCache(os.path.join(tmp, 'nli_scores.sqlite'))
+            for mode in ['batched, cold', 'batched, warm']:
+                _, stats = nli_scores.score_explanations(explanations, scorer, cache, args.batch_size)
+                runs.append((mode, stats))
+            cache.close()
+        for mode, stats in runs:
+            hit_rate = stats['cache_hits'] / stats['unique_pairs'] if stats['unique_pairs'] else 0.0
+            print(f" {rows:>12}  {mode:<16}{stats['pairs']:>9}{stats['scored']:>9}{stats['batches']:>8}"
+                  f"{stats['seconds']:>10.3f}{stats['pairs_per_second']:>12,.0f}{hit_rate:>10.1%}")
+
+if __name__ == "__main__":
+    main()
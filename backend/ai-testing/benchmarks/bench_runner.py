@@ -0,0 +1,46 @@
+"""
+Experiment runner benchmark: grid throughput of run_experiments.py against the local stub LLM server at several
+concurrency levels, offline. Concurrency 1 without retries is the sequential TS loop of evalAIExplanation.ts.
+
+Usage: python -m benchmarks.bench_runner [--concurrency 1 4 16 32] [--latency 0.2] [--error-rate 0.1]
+"""
+
+import argparse
+import os
+import tempfile
+
+from benchmarks.stub_llm_server import start_stub_server
+
+def main():
+    import nli_scores
+    import run_experiments
+
+    parser = argparse.ArgumentParser(description='Benchmark the experiment runner against the stub LLM server.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 32],
+                        help='concurrency levels to run (default: 1 4 16 32)')
+    parser.add_argument('--repetitions', type=int, default=2, help='repetitions of the 48-cell grid (default: 2)')
+    parser.add_argument('--latency', type=float, default=0.2, help='mean stub seconds per response (default: 0.2)')
+    parser.add_argument('--error-rate', type=float, default=0.1, help='share of failing responses (default: 0.1)')
+    parser.add_argument('--rate', type=float, default=None, help='runner rate limit, requests/sec (default: none)')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(latency=args.latency, error_rate=args.error_rate, retry_after=args.latency)
+    events = run_experiments.load_test_events()
+    print(f" Stub latency {args.latency}s (exponential), error rate {args.error_rate:.0%}, "
+          f"{len(run_experiments.PROMPT_LENGTHS) * len(events) * args.repetitions} cells\n")
+    print(f" {'Mode':<18}{'Seconds':>10}{'Cells/sec':>12}{'Completed':>11}{'Calls':>8}{'Skipped':>9}")
+
+    runs = [('sequential', 1, 0)] + [(f'concurrency {n}', n, 5) for n in args.concurrency]
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, concurrency, retries in runs:
+            stats = run_experiments.run_experiment(
+                events, os.path.join(tmp, f'{name.replace(" ", "_")}.csv'), url, repetitions=args.repetitions,
+                concurrency=concurrency, rate=args.rate, retries=retries, backoff=args.latency,
+                scorer=nli_scores.FakeScorer(), explanations=False
+            )
+            print(f" {name:<18}{stats['seconds']:>10.2f}{stats['cells_per_second']:>12.2f}"
+                  f"{stats['completed']:>11}{stats['calls']:>8}{stats['failed']:>9}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Stage benchmark: wall time and memory of each stage (load, aggregate, correlate, save, plot) of analyze_data.py
+and of the old scripts, on synthetic raw files of either schema. Results are written as a JSON baseline and
+compared against the previous one, so regressions show up between commits.
+
+Usage: python -m benchmarks.bench_stages [--rows 1e3 1e5 ...] [--schema ...] [--compare baseline.json]
+Every pipeline runs in a fresh subprocess. Each stage is timed in one pass and its peak traced allocation
+(tracemalloc) is measured in a second pass, so tracing never slows the timings down.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.bench_loader import AI_TESTING_DIR, peak_rss_mb
+
+OLD_SCRIPTS_DIR = os.path.join(AI_TESTING_DIR, 'old-python-scripts')
+DEFAULT_BASELINE = os.path.join(AI_TESTING_DIR, 'benchmarks', 'baselines', 'bench_stages.json')
+
+STAGES = ['load', 'aggregate', 'correlate', 'save', 'plot']
+
+def analyze_data_pipeline(raw_path, dpi):
+    """The stages of analyze_data.run_analysis, as (stage, function of the shared state) pairs."""
+    import analyze_data
+
+    output_dir = os.path.dirname(raw_path)
+    base_filename = os.path.splitext(os.path.basename(raw_path))[0].replace('_raw', '_analysis')
+
+    def load(state):
+        state['df'] = analyze_data.load_and_clean_data(raw_path, use_cache=False)
+
+    def aggregate(state):
+        state['reports'] = analyze_data.create_aggregation_reports(state['df'],
+                                                                   skip_reports=['correlations', 'regression'])
+
+    def correlate(state):
+        overall, length_controlled = analyze_data.calculate_correlations(state['df'])
+        state['reports']['overall_correlations'] = analyze_data.pd.DataFrame([overall])
+        state['reports']['length_controlled_correlations'] = length_controlled
+
+    def save(state):
+        analyze_data.save_reports(state['reports'], output_dir, base_filename)
+
+    def plot(state):
+        analyze_data.create_visualizations(state['df'], state['reports'], output_dir, base_filename, dpi,
+                                           headless=True)
+
+    return [('load', load), ('aggregate', aggregate), ('correlate', correlate), ('save', save), ('plot', plot)]
+
+def old_scripts_pipeline(raw_path, dpi):
+    """
+    oldaggregate_results.py (load, aggregate, save), oldcorrelation_analysis.py (correlate, plot) and
+    oldvisualize_results.py (plot, from the in-memory aggregates). These need the acc_readability schema.
+    The old scripts always save figures at 300 dpi, so dpi is unused.
+    """
+    sys.path.insert(0, OLD_SCRIPTS_DIR)
+    import oldaggregate_results
+    import oldcorrelation_analysis
+    import oldvisualize_results
+
+    output_dir = os.path.dirname(raw_path)
+    base_filename = os.path.splitext(os.path.basename(raw_path))[0]
+
+    def load(state):
+        state['df'] = oldaggregate_results.load_and_clean_data(raw_path, use_cache=False)
+
+    def aggregate(state):
+        state['reports'] = oldaggregate_results.create_aggregation_reports(state['df'], output_dir)
+
+    def correlate(state):
+        state['correlations'] = oldcorrelation_analysis.calculate_length_controlled_correlations(state['df'])
+
+    def save(state):
+        oldaggregate_results.save_reports(state['reports'], output_dir, base_filename.replace('_raw', '_aggregated'))
+        state['correlations'].to_csv(os.path.join(output_dir, f"{base_filename}_length_controlled_correlations.csv"),
+                                     index=False)
+
+    def plot(state):
+        import matplotlib.pyplot as plt
+
+        oldcorrelation_analysis.create_tradeoff_plots(state['correlations'], output_dir, base_filename)
+        plt.close('all')
+        oldvisualize_results.visualize_reports(state['reports'], output_dir, base_filename.replace('_raw', '_aggregated'))
+        plt.close('all')
+
+    return [('load', load), ('aggregate', aggregate), ('correlate', correlate), ('save', save), ('plot', plot)]
+
+PIPELINES = {
+    'analyze_data': analyze_data_pipeline,
+    'old_scripts': old_scripts_pipeline,
+}
+
+def run_pipeline(stages, skip, traced):
+    """Run the stages in order; returns {stage: seconds} or, when traced, {stage: peak traced MB}."""
+    state = {}
+    results = {}
+    for name, stage in stages:
+        if name in skip:
+            continue
+        if traced:
+            tracemalloc.start()
+            stage(state)
+            results[name] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+        else:
+            start = time.perf_counter()
+            stage(state)
+            results[name] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+    return results
+
+def measure(pipeline, raw_path, dpi, skip):
+    """Time and then trace every stage of a pipeline in this process."""
+    import contextlib, io
+    import matplotlib
+
+    matplotlib.use('Agg')
+    with contextlib.redirect_stdout(io.StringIO()):
+        timed = run_pipeline(PIPELINES[pipeline](raw_path, dpi), skip, traced=False)
+        traced = run_pipeline(PIPELINES[pipeline](raw_path, dpi), skip, traced=True)
+
+    for name in timed:
+        timed[name]['peak_alloc_mb'] = traced[name]
+    return timed
+
+def run_isolated(pipeline, raw_path, dpi, skip):
+    """Measure a pipeline in a fresh interpreter."""
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_stages', '--measure', pipeline, raw_path, '--dpi', str(dpi)]
+        + [arg for stage in skip for arg in ('--skip-stage', stage)],
+        cwd=AI_TESTING_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def git_commit():
+    """Short hash of the checked-out commit, or None outside a git checkout."""
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=AI_TESTING_DIR,
+                                   capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+def case_key(case):
+    return (case['schema'], case['rows'], case['event_keys'], case['nan_rate'], case['pipeline'])
+
+def compare(baseline, cases, tolerance):
+    """Print every stage that got slower than baseline by more than tolerance (a fraction)."""
+    previous = {case_key(case): case for case in baseline['cases']}
+    print(f"\n Compared with {baseline.get('git_commit') or 'baseline'} ({baseline['created_at']}):")
+    regressions = 0
+    for case in cases:
+        before = previous.get(case_key(case))
+        if before is None:
+            continue
+        for stage, result in case['stages'].items():
+            if stage not in before['stages']:
+                continue
+            ratio = result['seconds'] / max(before['stages'][stage]['seconds'], 1e-9)
+            if ratio > 1 + tolerance:
+                regressions += 1
+                print(f"  • SLOWER {case['pipeline']}.{stage} ({case['schema']}, {case['rows']} rows): "
+                      f"{before['stages'][stage]['seconds']:.3f}s -> {result['seconds']:.3f}s ({ratio:.2f}x)")
+    if not regressions:
+        print(f"  • No stage is more than {tolerance:.0%} slower")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and memory-profile each analysis stage on synthetic data.')
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e3, 1e4, 1e5],
+                        help='raw file sizes to benchmark (default: 1e3 1e4 1e5; up to 1e7 is practical)')
+    parser.add_argument('--schema', choices=['readability_length', 'acc_readability'], nargs='+',
+                        default=['readability_length', 'acc_readability'])
+    parser.add_argument('--pipeline', choices=list(PIPELINES), nargs='+', default=list(PIPELINES),
+                        help='old_scripts only runs on acc_readability files')
+    parser.add_argument('--event-keys', type=int, default=40, help='EventKey cardinality (default: 40)')
+    parser.add_argument('--nan-rate', type=float, default=0.01, help='share of missing NLI scores (default: 0.01)')
+    parser.add_argument('--dpi', type=int, default=300, help='figure resolution for analyze_data (default: 300)')
+    parser.add_argument('--plot-max-rows', type=float, default=1e6,
+                        help='skip the plot stage on larger files, where scatter plots dominate (default: 1e6)')
+    parser.add_argument('--skip-stage', choices=STAGES, action='append', default=[])
+    parser.add_argument('--output', default=DEFAULT_BASELINE, help='where to write the JSON results')
+    parser.add_argument('--compare', default=None,
+                        help='baseline JSON to compare against (default: the existing --output file)')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='report stages slower than the baseline by more than this fraction (default: 0.2)')
+    parser.add_argument('--measure', nargs=2, metavar=('PIPELINE', 'RAW_PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(args.measure[0], args.measure[1], args.dpi, args.skip_stage)))
+        return
+
+    from benchmarks.synthetic import raw_file_name, write_raw_csv
+
+    cases = []
+    print(f" {'Pipeline':<14}{'Schema':<20}{'Rows':>10}  {'Stage':<11}{'Seconds':>9}{'Peak alloc (MB)':>17}"
+          f"{'Peak RSS (MB)':>15}")
+    for schema in args.schema:
+        for rows in (int(rows) for rows in args.rows):
+            with tempfile.TemporaryDirectory() as tmp:
+                raw_path = write_raw_csv(os.path.join(tmp, raw_file_name(schema)), rows, args.event_keys,
+                                         args.nan_rate, schema=schema)
+                for pipeline in args.pipeline:
+                    if pipeline == 'old_scripts' and schema != 'acc_readability':
+                        continue
+                    skip = list(args.skip_stage) + (['plot'] if rows > args.plot_max_rows else [])
+                    stages = run_isolated(pipeline, raw_path, args.dpi, skip)
+                    cases.append({'pipeline': pipeline, 'schema': schema, 'rows': rows,
+                                  'event_keys': args.event_keys, 'nan_rate': args.nan_rate, 'stages': stages})
+                    for stage, result in stages.items():
+                        print(f" {pipeline:<14}{schema:<20}{rows:>10}  {stage:<11}{result['seconds']:>9.3f}"
+                              f"{result['peak_alloc_mb']:>17.1f}{result['peak_rss_mb']:>15.1f}")
+
+    results = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'dpi': args.dpi,
+        'cases': cases,
+    }
+
+    baseline_path = args.compare or args.output
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            compare(json.load(f), cases, args.tolerance)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n Results: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Startup benchmark: wall time of short analyze_data.py invocations, where interpreter and import cost
+dominate (the automation calls the analyzer on small trials many times a day).
+
+Usage: python -m benchmarks.bench_startup [rows] [repeats]
+Every invocation is a fresh interpreter; the median over repeats is reported.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_TESTING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def invocations(raw_path):
+    """The timed commands, as (name, argv) pairs."""
+    script = os.path.join(AI_TESTING_DIR, 'analyze_data.py')
+    return [
+        ('python (baseline)', [sys.executable, '-c', 'pass']),
+        ('import analyze_data', [sys.executable, '-c', 'import analyze_data']),
+        ('--help', [sys.executable, script, '--help']),
+        ('bad argument', [sys.executable, script, raw_path, '--dpi', 'high']),
+        ('--no-plots', [sys.executable, script, raw_path, '--no-plots', '--no-cache']),
+        ('--no-plots, correlations only', [sys.executable, script, raw_path, '--no-plots', '--no-cache',
+                                           '--skip-report', 'by_length', '--skip-report', 'overall',
+                                           '--skip-report', 'by_event', '--skip-report', 'length_analysis']),
+        ('--headless --dpi 72', [sys.executable, script, raw_path, '--headless', '--dpi', '72', '--no-cache']),
+    ]
+
+def time_invocation(argv, repeats):
+    """Median wall time of running argv repeats times."""
+    env = dict(os.environ, MPLBACKEND='Agg')
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=AI_TESTING_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    from benchmarks.synthetic import write_raw_csv
+
+    rows = int(float(sys.argv[1])) if len(sys.argv) > 1 else 500
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = os.path.join(tmp, 'readability_length_exp_raw_benchmark.csv')
+        write_raw_csv(raw_path, rows)
+        print(f" Median of {repeats} runs on a {rows}-row trial\n")
+
+        print(f" {'Invocation':<32}{'Seconds':>10}")
+        for name, argv in invocations(raw_path):
+            print(f" {name:<32}{time_invocation(argv, repeats):>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Word frequency benchmark: startup time, per-process memory and lookup throughput of the memory-mapped index
+(word_frequency_index.py) against loading backend/word_frequencies.json into a dict, as word-freq.ts does.
+
+Usage: python -m benchmarks.bench_word_frequencies [tokens] [repeats]
+Every measurement is a fresh subprocess; the median over repeats is reported. Anonymous memory is what a process
+holds privately (Linux only); the index's mapped pages are file-backed and shared by every process using it.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_loader import AI_TESTING_DIR
+
+SOURCES = ['json', 'index']
+
+def anonymous_mb():
+    """Anonymous (private, not file-backed) memory of this process in MB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Anonymous:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def write_synthetic_tokens(path, count, seed=0):
+    """
+    Write lowercase tokens as word-freq.ts sees them, one per line: mostly known words, a tenth unknown ones.
+    They are generated here rather than in the measured process, so its memory only holds the frequencies.
+    """
+    import numpy as np
+    import word_frequency_index
+
+    rng = np.random.default_rng(seed)
+    with open(word_frequency_index.WORD_FREQUENCIES_PATH) as f:
+        known = np.array(list(json.load(f)))
+    tokens = known[rng.integers(0, len(known), count)].astype(object)
+    unknown = rng.random(count) < 0.1
+    tokens[unknown] = [f"zz{i}q" for i in rng.integers(0, 50_000, unknown.sum())]
+    with open(path, 'w') as f:
+        f.write('\n'.join(tokens))
+
+def measure(source, tokens):
+    """Open one frequency source in this process and time lookups of every token."""
+    import numpy as np
+    import word_frequency_index
+
+    before_mb = anonymous_mb()
+    start = time.perf_counter()
+    if source == 'json':
+        with open(word_frequency_index.WORD_FREQUENCIES_PATH) as f:
+            frequencies = json.load(f)
+    elif source == 'index':
+        frequencies = word_frequency_index.open_index()
+    else:
+        raise ValueError(f"Unknown source: {source}")
+    startup = time.perf_counter() - start
+    after_mb = anonymous_mb()
+
+    start = time.perf_counter()
+    if source == 'json':
+        values = np.fromiter((frequencies.get(token) or 1.0 for token in tokens), dtype=float, count=len(tokens))
+    else:
+        values = frequencies.lookup(tokens)
+    lookup = time.perf_counter() - start
+
+    return {
+        'startup_seconds': startup,
+        'anonymous_mb': None if before_mb is None else after_mb - before_mb,
+        'lookups_per_second': len(tokens) / lookup,
+        'checksum': float(values.sum()),
+    }
+
+def read_tokens(path):
+    with open(path) as f:
+        return f.read().split('\n')
+
+def run_isolated(source, tokens_path, repeats):
+    """Median results of measuring a source in fresh interpreters."""
+    results = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_word_frequencies', '--measure', source, tokens_path],
+            cwd=AI_TESTING_DIR, capture_output=True, text=True, check=True
+        )
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(result[key] for result in results) if results[0][key] is not None else None
+            for key in results[0]}
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        print(json.dumps(measure(sys.argv[2], read_tokens(sys.argv[3]))))
+        return
+
+    import word_frequency_index
+
+    tokens = int(float(sys.argv[1])) if len(sys.argv) > 1 else 1_000_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    # Build the index up front so its one-off compile is not timed as startup
+    word_frequency_index.open_index().close()
+    print(f" Median of {repeats} runs, {tokens} token lookups\n")
+
+    print(f" {'Source':<8}{'Startup (ms)':>14}{'Anonymous (MB)':>16}{'Lookups/sec':>16}")
+    checksums = set()
+    with tempfile.TemporaryDirectory() as tmp:
+        tokens_path = os.path.join(tmp, 'tokens.txt')
+        write_synthetic_tokens(tokens_path, tokens)
+        for source in SOURCES:
+            result = run_isolated(source, tokens_path, repeats)
+            checksums.add(result['checksum'])
+            memory = f"{result['anonymous_mb']:.1f}" if result['anonymous_mb'] is not None else 'n/a'
+            print(f" {source:<8}{result['startup_seconds'] * 1000:>14.1f}{memory:>16}"
+                  f"{result['lookups_per_second']:>16,.0f}")
+    if len(checksums) != 1:
+        print("\n Warning: the sources returned different values")
+
+if __name__ == "__main__":
+    main()
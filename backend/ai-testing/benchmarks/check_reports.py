@@ -0,0 +1,75 @@
+"""
+Report regression check: regenerate the aggregate and correlation reports of every trial in test-results, with
+analyze_data.py for readability_length_exp files and oldaggregate_results.py for acc_readability_exp files, and
+compare them byte for byte with the reports stored next to the raw files.
+
+Usage: python -m benchmarks.check_reports [test-results]
+Stored reports whose header differs from the current layout were written by an earlier revision of the scripts
+and are listed as skipped; every other stored report must be reproduced exactly. Exits 1 on any difference.
+"""
+
+import contextlib
+import glob
+import io
+import os
+import sys
+import tempfile
+
+from benchmarks.bench_loader import AI_TESTING_DIR
+from benchmarks.bench_stages import OLD_SCRIPTS_DIR
+
+DEFAULT_RESULTS_DIR = os.path.join(AI_TESTING_DIR, 'test-results')
+
+def regenerate_reports(raw_path, output_dir):
+    """Write the reports of raw_path into output_dir; returns {stored report path: regenerated report path}."""
+    import analyze_data
+    sys.path.insert(0, OLD_SCRIPTS_DIR)
+    import oldaggregate_results
+
+    raw_dir, raw_name = os.path.split(raw_path)
+    base_filename = os.path.splitext(raw_name)[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        if raw_name.startswith('acc_readability_exp_raw'):
+            base_filename = base_filename.replace('_raw', '_aggregated')
+            df = oldaggregate_results.load_and_clean_data(raw_path, use_cache=False)
+            reports = oldaggregate_results.create_aggregation_reports(df, output_dir)
+            saved_files = oldaggregate_results.save_reports(reports, output_dir, base_filename)
+        else:
+            base_filename = base_filename.replace('_raw', '_analysis')
+            df = analyze_data.load_and_clean_data(raw_path, use_cache=False)
+            reports = analyze_data.create_aggregation_reports(df)
+            saved_files = analyze_data.save_reports(reports, output_dir, base_filename)
+    return {os.path.join(raw_dir, os.path.basename(path)): path for path in saved_files}
+
+def compare_report(stored_path, regenerated_path):
+    """'same', 'different', or 'skipped' when the stored report has another header (an older layout)."""
+    with open(stored_path, 'rb') as stored, open(regenerated_path, 'rb') as regenerated:
+        stored_bytes, regenerated_bytes = stored.read(), regenerated.read()
+    if stored_bytes == regenerated_bytes:
+        return 'same'
+    if stored_bytes.split(b'\n', 1)[0] != regenerated_bytes.split(b'\n', 1)[0]:
+        return 'skipped'
+    return 'different'
+
+def main():
+    results_dir = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_RESULTS_DIR
+    raw_paths = sorted(path for path in glob.glob(os.path.join(results_dir, '*', '*_raw_*.csv'))
+                       if not path.endswith('_correlations.csv'))
+
+    outcomes = {'same': [], 'different': [], 'skipped': []}
+    for raw_path in raw_paths:
+        with tempfile.TemporaryDirectory() as output_dir:
+            for stored_path, regenerated_path in regenerate_reports(raw_path, output_dir).items():
+                if os.path.exists(stored_path):
+                    outcomes[compare_report(stored_path, regenerated_path)].append(stored_path)
+
+    for path in outcomes['skipped']:
+        print(f" Skipped (older layout): {os.path.relpath(path, results_dir)}")
+    for path in outcomes['different']:
+        print(f" DIFFERENT: {os.path.relpath(path, results_dir)}")
+    print(f" {len(outcomes['same'])} stored reports reproduced, {len(outcomes['different'])} different, "
+          f"{len(outcomes['skipped'])} skipped, from {len(raw_paths)} raw files")
+    sys.exit(1 if outcomes['different'] else 0)
+
+if __name__ == '__main__':
+    main()
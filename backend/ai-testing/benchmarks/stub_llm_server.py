@@ -0,0 +1,123 @@
+"""
+Stub LLM server: a local stand-in for the Gemini generateContent API, so the experiment runner (run_experiments.py)
+can be exercised and benchmarked offline. Each response takes a random latency and answers with a plausible
+analysis whose explanation fields are sized to the prompt's word range; a share of requests fails instead, as
+rate limiting (429 with Retry-After), an overloaded service (503) or a truncated JSON answer.
+
+Usage: python -m benchmarks.stub_llm_server [--port N] [--latency SECONDS] [--error-rate RATE]
+"""
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.synthetic import POLICY_SECTION_IDS, PIPEDA_PRINCIPLE_IDS, EXPLANATION_WORDS
+
+WORD_RANGE = re.compile(r'must be strictly between ([\d.]+)-([\d.]+) words')
+FAILURES = ['rate_limited', 'unavailable', 'truncated']
+
+def make_analysis(rng, low, high):
+    """An analysis in the format the prompt asks for, each explanation field low to high words long."""
+    def text():
+        words = [rng.choice(EXPLANATION_WORDS) for _ in range(rng.randint(int(low), int(high)))]
+        return ' '.join(words).capitalize() + '.'
+
+    return {
+        'privacyRisk': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+        'regulatoryCompliance': {'framework': 'PIPEDA', 'compliant': rng.random() < 0.5,
+                                 'issues': text(), 'relevantSections': []},
+        'aiExplanation': {
+            'why': text(),
+            'storage': text(),
+            'access': text(),
+            'privacyExplanation': text(),
+            'privacyPolicyLink': rng.sample(POLICY_SECTION_IDS, 2),
+            'regulationLink': rng.sample(PIPEDA_PRINCIPLE_IDS, 2),
+        },
+    }
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timed out or was killed) before the response was ready
+            pass
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        prompt = ''.join(part.get('text', '') for part in request['contents'][0]['parts'])
+        with server.lock:
+            rng = random.Random(server.rng.random())
+            server.requests += 1
+
+        time.sleep(server.latency * rng.expovariate(1.0) if server.jitter else server.latency)
+        if rng.random() < server.error_rate:
+            failure = rng.choice(FAILURES)
+            with server.lock:
+                server.failures[failure] = server.failures.get(failure, 0) + 1
+            if failure == 'rate_limited':
+                return self._send(429, json.dumps({'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED'}}),
+                                  [('Retry-After', f"{server.retry_after:g}")])
+            if failure == 'unavailable':
+                return self._send(503, json.dumps({'error': {'code': 503, 'status': 'UNAVAILABLE'}}))
+            text = '```json\n' + json.dumps(make_analysis(rng, 5, 10))[:80]
+        else:
+            match = WORD_RANGE.search(prompt)
+            low, high = (float(match.group(1)), float(match.group(2))) if match else (24, 30)
+            text = '```json\n' + json.dumps(make_analysis(rng, low, high), indent=2) + '\n```'
+        self._send(200, json.dumps({'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]},
+                                                    'finishReason': 'STOP'}]}))
+
+def start_stub_server(port=0, latency=0.05, error_rate=0.1, retry_after=0.1, jitter=True, seed=0):
+    """Serve the stub on a background thread; returns the server and its base URL. Stop it with shutdown()."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.retry_after = retry_after
+    server.jitter = jitter
+    server.rng = random.Random(seed)
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.failures = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the Gemini generateContent API.')
+    parser.add_argument('--port', type=int, default=8808, help='port to listen on (default: 8808)')
+    parser.add_argument('--latency', type=float, default=0.5, help='mean seconds per response (default: 0.5)')
+    parser.add_argument('--error-rate', type=float, default=0.1, help='share of requests that fail (default: 0.1)')
+    parser.add_argument('--retry-after', type=float, default=1.0,
+                        help='Retry-After seconds sent with 429 responses (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.latency, args.error_rate, args.retry_after, seed=args.seed)
+    print(f" Stub LLM server listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Synthetic raw experiment data for benchmarks, in the readability_length_exp_raw layout written by evalAIExplanation.ts
+or the older acc_readability_exp_raw layout (with InstructionType and ColemanLiau) of the early trials, and the
+AI explanations (with their section links) the raw results are scored from.
+"""
+
+import numpy as np
+import pandas as pd
+
+READABILITY_LENGTH_COLUMNS = ['EventKey', 'TargetLength', 'ActualWordCount', 'NLI_DataCollection',
+                              'NLI_PrivacyExplanation', 'NLI_AverageScore', 'FleschKincaid', 'WordFrequencyScore']
+ACC_READABILITY_COLUMNS = ['InstructionType', 'EventKey', 'TargetLength', 'ActualWordCount', 'NLI_DataCollection',
+                           'NLI_PrivacyExplanation', 'NLI_AverageScore', 'FleschKincaid', 'ColemanLiau',
+                           'WordFrequencyScore']
+SCHEMAS = {
+    'readability_length': READABILITY_LENGTH_COLUMNS,
+    'acc_readability': ACC_READABILITY_COLUMNS,
+}
+TARGET_LENGTHS = [15, 20, 25, 30, 40, 50]
+INSTRUCTION_TYPES = ['readable', 'accurate']
+
+def raw_file_name(schema, timestamp='2025-01-01T00-00-00-000Z'):
+    """File name the experiment runner would give a raw file of this schema."""
+    return f"{schema}_exp_raw_{timestamp}.csv"
+
+def make_raw_frame(rows, event_keys=40, nan_rate=0.01, seed=0, schema='readability_length'):
+    """
+    Create a frame of plausible raw results in one of SCHEMAS; NLI scores are missing at nan_rate,
+    like failed NLI calls.
+    """
+    rng = np.random.default_rng(seed)
+    
+    target_length = rng.choice(TARGET_LENGTHS, rows)
+    actual_word_count = np.round(target_length * rng.uniform(0.7, 1.1, rows), 1)
+    nli_data_collection = np.round(rng.beta(5, 2, rows), 3)
+    nli_privacy_explanation = np.round(rng.beta(2, 2, rows), 3)
+    nli_data_collection[rng.random(rows) < nan_rate] = np.nan
+    nli_privacy_explanation[rng.random(rows) < nan_rate] = np.nan
+    
+    frame = {
+        'EventKey': np.array([f'event-{i}' for i in range(event_keys)])[rng.integers(0, event_keys, rows)],
+        'TargetLength': target_length,
+        'ActualWordCount': actual_word_count,
+        'NLI_DataCollection': nli_data_collection,
+        'NLI_PrivacyExplanation': nli_privacy_explanation,
+        'NLI_AverageScore': np.round(np.nanmean([nli_data_collection, nli_privacy_explanation], axis=0), 3),
+        'FleschKincaid': np.round(rng.normal(9, 2, rows) + actual_word_count * 0.02, 2),
+        'WordFrequencyScore': np.round(rng.normal(4.8, 0.3, rows), 2),
+    }
+    if schema == 'acc_readability':
+        frame['InstructionType'] = np.array(INSTRUCTION_TYPES)[rng.integers(0, len(INSTRUCTION_TYPES), rows)]
+        frame['ColemanLiau'] = np.round(frame['FleschKincaid'] + rng.normal(3, 1, rows), 2)
+    
+    return pd.DataFrame(frame)[SCHEMAS[schema]]
+
+def write_raw_csv(path, rows, event_keys=40, nan_rate=0.01, seed=0, chunk_rows=500_000, schema='readability_length'):
+    """Write a synthetic raw CSV in chunks, so files larger than memory can be generated."""
+    written = 0
+    chunk_index = 0
+    with open(path, 'w', newline='') as f:
+        while written < rows or written == 0:
+            chunk = make_raw_frame(min(chunk_rows, rows - written), event_keys, nan_rate, seed + chunk_index, schema)
+            chunk.to_csv(f, index=False, header=written == 0, na_rep='N/A')
+            written += len(chunk)
+            chunk_index += 1
+            if rows == 0:
+                break
+    return path
+
+POLICY_SECTION_IDS = ['dataCollection', 'personalInformation', 'microphone', 'accelerometer', 'lightSensor',
+                      'journalData', 'usageData', 'cloudStorage', 'localStorage', 'encryption', 'dataSharing',
+                      'dataRetention', 'userRights']
+PIPEDA_PRINCIPLE_IDS = ['accountability', 'purposes', 'consent', 'collection', 'use', 'safeguards', 'openness',
+                        'access']
+EXPLANATION_WORDS = ['your', 'data', 'is', 'stored', 'encrypted', 'on', 'our', 'servers', 'and', 'only', 'shared',
+                     'with', 'consent', 'the', 'app', 'collects', 'sensor', 'readings', 'to', 'personalize',
+                     'health', 'insights', 'PIPEDA', 'requires', 'safeguards', 'for', 'sensitive', 'information']
+
+def make_explanations(rows, event_keys=40, variants=3, seed=0):
+    """
+    Create AI explanations as the experiment runner receives them: each event links to a fixed set of privacy
+    policy sections and PIPEDA principles, and only `variants` distinct explanations exist per event and target
+    length, so premises and whole pairs repeat as they do across repetitions of a trial.
+    """
+    rng = np.random.default_rng(seed)
+    policy_links = [rng.choice(POLICY_SECTION_IDS, rng.integers(1, 4), replace=False).tolist()
+                    for _ in range(event_keys)]
+    regulation_links = [rng.choice(PIPEDA_PRINCIPLE_IDS, rng.integers(1, 3), replace=False).tolist()
+                        for _ in range(event_keys)]
+    
+    events = rng.integers(0, event_keys, rows)
+    target_length = rng.choice(TARGET_LENGTHS, rows)
+    variant = rng.integers(0, variants, rows) + events * variants
+    frame = {'EventKey': [f'event-{event}' for event in events], 'TargetLength': target_length}
+    for i, name in enumerate(['why', 'storage', 'access', 'privacyExplanation']):
+        # Each field's words are seeded by its variant, so equal variants give equal texts
+        frame[name] = [' '.join(np.random.default_rng([seed, i, length, v]).choice(EXPLANATION_WORDS, length)) + '.'
+                       for length, v in zip(target_length, variant)]
+    frame['privacyPolicyLink'] = [policy_links[event] for event in events]
+    frame['regulationLink'] = [regulation_links[event] for event in events]
+    return pd.DataFrame(frame)
@@ -0,0 +1,260 @@
+"""
+Cross-Trial Meta-Analysis
+Pools the results of many trials, in either raw schema (readability_length_exp_raw, or acc_readability_exp_raw
+with InstructionType and ColemanLiau). Trials are loaded in parallel and each is reduced to sufficient statistics
+per target length (counts, sums, sums of squares and cross-products, as CellMoments keeps them). The pooling is then
+a vectorized computation over the stacked per-trial statistics: Fisher-z pooled correlations and inverse-variance
+pooled metric means, each with DerSimonian-Laird random effects and Cochran's Q, I^2 and tau^2 heterogeneity.
+
+Usage: python analyze_data.py --meta-analysis test-results [--workers N]
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import io
+import re
+import contextlib
+from statistics import NormalDist
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import analyze_data
+
+# Every column of either raw schema; columns a trial lacks are added as missing values
+SCHEMA_FILE_PATTERN = re.compile(r'^(.*)_exp_raw_[^_]+\.csv$')
+META_METRICS = analyze_data.AGGREGATE_METRICS + ['ColemanLiau']
+META_CORRELATIONS = analyze_data.OVERALL_CORRELATIONS + [
+    ('NLI_Avg_vs_ColemanLiau', 'NLI_AverageScore', 'ColemanLiau', -1),
+    ('Length_vs_ColemanLiau', 'ActualWordCount', 'ColemanLiau', -1),
+]
+META_PAIRS = list(dict.fromkeys((x_metric, y_metric) for _, x_metric, y_metric, _ in META_CORRELATIONS))
+
+# Rows pooled over every target length of a trial
+ALL_LENGTHS = 'All'
+
+def trial_schema(path):
+    """Raw schema of a file, from its name (e.g. 'acc_readability' or 'readability_length')."""
+    match = SCHEMA_FILE_PATTERN.match(os.path.basename(path))
+    return match.group(1) if match else 'unknown'
+
+def trial_labels(paths):
+    """Short, unique names for trials: their paths relative to the directory all of them share."""
+    if len(paths) == 1:
+        return [os.path.basename(paths[0])]
+    common = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+    labels = [os.path.relpath(os.path.dirname(os.path.abspath(path)), common) for path in paths]
+    # Directories holding several raw files (e.g. trial10) need the file name too
+    return [label if labels.count(label) == 1 else os.path.join(label, os.path.basename(path))
+            for label, path in zip(labels, paths)]
+
+def reconcile_schema(df):
+    """Return df with every column of both raw schemas, those it lacks filled with missing values."""
+    missing = {col: pd.Categorical([None] * len(df)) if col in analyze_data.CATEGORICAL_COLUMNS
+               else np.full(len(df), np.nan)
+               for col in analyze_data.CATEGORICAL_COLUMNS + analyze_data.NUMERIC_COLUMNS if col not in df.columns}
+    return df.assign(**missing) if missing else df
+
+def trial_statistics(path, use_cache=True):
+    """
+    Load one trial and reduce it to per-target-length sufficient statistics (a CellMoments cells frame), with
+    a description of the trial. Runs in a worker process; the loader's messages are kept out of the console.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = analyze_data.load_and_clean_data(path, use_cache)
+    if df is None:
+        raise ValueError(f"could not load {path}")
+    present = [col for col in META_METRICS if col in df.columns]
+    instruction_types = (sorted(df['InstructionType'].dropna().unique().astype(str))
+                         if 'InstructionType' in df.columns else [])
+
+    moments = analyze_data.CellMoments(['TargetLength'], META_METRICS, META_PAIRS)
+    moments.update(reconcile_schema(df))
+    info = {
+        'Schema': trial_schema(path),
+        'Rows': len(df),
+        'TargetLengths': ' '.join(map(str, sorted(df['TargetLength'].dropna().unique()))),
+        'InstructionTypes': ' '.join(instruction_types),
+        'MissingMetrics': ' '.join(col for col in META_METRICS if col not in present),
+    }
+    return info, moments.cells
+
+def load_trials(paths, workers=None, use_cache=True):
+    """
+    Per-trial statistics of every raw file, loaded in parallel worker processes. Returns a description of each
+    trial and the stacked statistics, indexed by (Trial, TargetLength) with an ALL_LENGTHS row per trial.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths)))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(trial_statistics, paths, [use_cache] * len(paths)))
+    else:
+        results = [trial_statistics(path, use_cache) for path in paths]
+
+    labels = trial_labels(paths)
+    trials = pd.DataFrame([{'Trial': label, **info, 'Path': path}
+                           for label, path, (info, _) in zip(labels, paths, results)])
+    frames = []
+    for label, (_, cells) in zip(labels, results):
+        cells = cells.reset_index()
+        cells['TargetLength'] = cells['TargetLength'].astype(object)
+        total = cells.drop(columns='TargetLength').sum().to_frame().T.assign(TargetLength=ALL_LENGTHS)
+        frames.append(pd.concat([cells, total], ignore_index=True).assign(Trial=label))
+    stats = pd.concat(frames, ignore_index=True).set_index(['Trial', 'TargetLength'])
+    return trials, stats
+
+def stat_lengths(stats):
+    """The TargetLength columns of the pooled reports: every length of any trial, in order, then ALL_LENGTHS."""
+    lengths = stats.index.get_level_values('TargetLength').unique()
+    return sorted(length for length in lengths if length != ALL_LENGTHS) + [ALL_LENGTHS]
+
+def _stat_grid(stats, column):
+    """One statistic as a (trials, lengths) array, NaN where a trial has no such length."""
+    trials = stats.index.get_level_values('Trial').unique()
+    grid = stats[column].astype(float).unstack('TargetLength')
+    return grid.reindex(index=trials, columns=stat_lengths(stats)).to_numpy()
+
+def random_effects(estimates, variances, confidence=0.95):
+    """
+    Inverse-variance pooling of per-trial estimates along axis 0, ignoring NaN estimates. Returns arrays (one value
+    per column) of the trial count, fixed-effect estimate, Cochran's Q, I^2, the DerSimonian-Laird tau^2, and the
+    random-effects estimate with its standard error and confidence interval.
+    """
+    valid = np.isfinite(estimates) & np.isfinite(variances) & (variances > 0)
+    y = np.where(valid, estimates, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w = np.where(valid, 1.0 / np.where(valid, variances, 1.0), 0.0)
+        k = valid.sum(axis=0)
+        sum_w = w.sum(axis=0)
+        fixed = (w * y).sum(axis=0) / sum_w
+        q = (w * (y - fixed) ** 2).sum(axis=0)
+        df = np.maximum(k - 1, 0)
+        c = sum_w - (w * w).sum(axis=0) / sum_w
+        tau2 = np.where(k > 1, np.maximum(0.0, (q - df) / c), 0.0)
+        i2 = np.where(q > 0, np.maximum(0.0, (q - df) / q), 0.0)
+
+        w_random = np.where(valid, 1.0 / (np.where(valid, variances, 1.0) + tau2), 0.0)
+        pooled = (w_random * y).sum(axis=0) / w_random.sum(axis=0)
+        se = np.sqrt(1.0 / w_random.sum(axis=0))
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def nan_if_empty(values):
+        return np.where(k == 0, np.nan, values)
+
+    return {
+        'Trials': k,
+        'FixedEffect': nan_if_empty(fixed),
+        'Pooled': nan_if_empty(pooled),
+        'SE': nan_if_empty(se),
+        'CI_Low': nan_if_empty(pooled - z * se),
+        'CI_High': nan_if_empty(pooled + z * se),
+        'Q': nan_if_empty(q),
+        'I2': nan_if_empty(np.where(k > 1, i2, np.nan)),
+        'Tau2': nan_if_empty(tau2),
+    }
+
+def trial_correlations(stats):
+    """Each trial's named correlations per target length, as (lengths, trials x lengths arrays of n and r)."""
+    lengths = stat_lengths(stats)
+    n, r = {}, {}
+    for name, x_metric, y_metric, sign in META_CORRELATIONS:
+        pair = f'{x_metric}__{y_metric}'
+        n[name] = _stat_grid(stats, f'PairCount_{pair}')
+        r[name] = sign * analyze_data._pairwise_correlations(
+            np.nan_to_num(n[name]),
+            *(np.nan_to_num(_stat_grid(stats, f'{stat}_{pair}'))
+              for stat in ['PairSumX', 'PairSumY', 'PairSumXX', 'PairSumYY', 'PairSumXY'])
+        )
+    return lengths, n, r
+
+def pooled_correlations(stats, confidence=0.95):
+    """
+    Fisher-z pooled correlations per target length (and over all lengths): z = atanh(r) with variance 1 / (n - 3),
+    for trials with at least 4 complete pairs and |r| < 1, transformed back to r. Returns the pooled report and
+    the per-trial correlations it was pooled from.
+    """
+    lengths, n, r = trial_correlations(stats)
+    trials = stats.index.get_level_values('Trial').unique()
+    pooled, per_trial = [], []
+    for name, _, _, _ in META_CORRELATIONS:
+        usable = (n[name] > 3) & (np.abs(r[name]) < 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where(usable, np.arctanh(np.where(usable, r[name], 0.0)), np.nan)
+            variance = np.where(usable, 1.0 / (n[name] - 3), np.nan)
+        result = random_effects(z, variance, confidence)
+        pooled.append(pd.DataFrame({
+            'TargetLength': lengths,
+            'Correlation': name,
+            'Trials': result['Trials'],
+            'SampleSize': np.where(usable, n[name], 0).sum(axis=0).astype(np.int64),
+            'Pooled_r': np.tanh(result['Pooled']),
+            'CI_Low': np.tanh(result['CI_Low']),
+            'CI_High': np.tanh(result['CI_High']),
+            'FixedEffect_r': np.tanh(result['FixedEffect']),
+            'Q': result['Q'],
+            'I2': result['I2'],
+            'Tau2': result['Tau2'],
+        }))
+        per_trial.append(pd.DataFrame({
+            'Trial': np.repeat(trials, len(lengths)),
+            'TargetLength': np.tile(lengths, len(trials)),
+            'Correlation': name,
+            'SampleSize': np.nan_to_num(n[name]).ravel().astype(np.int64),
+            'r': r[name].ravel(),
+        }).dropna(subset=['r']))
+    return pd.concat(pooled, ignore_index=True), pd.concat(per_trial, ignore_index=True)
+
+def pooled_means(stats, confidence=0.95):
+    """Inverse-variance pooled mean of every metric per target length (and over all lengths), trials weighted by n / s^2."""
+    lengths = stat_lengths(stats)
+    pooled = []
+    for metric in META_METRICS:
+        n = _stat_grid(stats, f'Count_{metric}')
+        total = _stat_grid(stats, f'Sum_{metric}')
+        squares = _stat_grid(stats, f'SumSq_{metric}')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(n > 0, total / n, np.nan)
+            variance = np.where(n > 1, np.maximum(squares - total * mean, 0.0) / (n - 1), np.nan)
+            result = random_effects(mean, variance / n, confidence)
+        pooled.append(pd.DataFrame({
+            'TargetLength': lengths,
+            'Metric': metric,
+            'Trials': result['Trials'],
+            'SampleSize': np.nan_to_num(n).sum(axis=0).astype(np.int64),
+            'PooledMean': result['Pooled'],
+            'CI_Low': result['CI_Low'],
+            'CI_High': result['CI_High'],
+            'FixedEffectMean': result['FixedEffect'],
+            'Q': result['Q'],
+            'I2': result['I2'],
+            'Tau2': result['Tau2'],
+        }))
+    return pd.concat(pooled, ignore_index=True)
+
+def run_meta_analysis(raw_data_paths, max_workers=None, use_cache=True, output_dir=None):
+    """Pool every trial's results and write the meta-analysis reports; returns them."""
+    print(f" Meta-analysis of {len(raw_data_paths)} raw data files...")
+    trials, stats = load_trials(raw_data_paths, max_workers, use_cache)
+    for schema, count in trials['Schema'].value_counts().sort_index().items():
+        print(f"  • {count} {schema} trials")
+
+    correlations, per_trial = pooled_correlations(stats)
+    reports = {
+        'trials': trials,
+        'pooled_correlations': correlations,
+        'pooled_means': pooled_means(stats),
+        'trial_correlations': per_trial,
+    }
+
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z').replace(
+        ':', '-').replace('.', '-')
+    output_dir = output_dir or os.path.commonpath([os.path.dirname(path) for path in raw_data_paths])
+    saved_files = analyze_data.save_reports(reports, output_dir, f"meta_analysis_{timestamp}")
+
+    overall = correlations[correlations['TargetLength'] == ALL_LENGTHS]
+    print(f"\n POOLED CORRELATIONS (all lengths, random effects):")
+    for row in overall.itertuples():
+        print(f"  • {row.Correlation}: {row.Pooled_r:.3f} [{row.CI_Low:.3f}, {row.CI_High:.3f}], "
+              f"{row.Trials} trials, I2 {row.I2:.0%}")
+    print(f"\n Saved {len(saved_files)} meta-analysis reports to {output_dir}")
+    return reports
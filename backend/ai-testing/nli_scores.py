@@ -0,0 +1,311 @@
+"""
+Bulk NLI Scorer
+Scores AI explanations against the privacy policy and PIPEDA sections they link to, as consistency/nliEvaluator.ts
+does one pair at a time, but in bulk: identical pairs are scored once, work is grouped by premise and sent to a
+pluggable scorer in micro-batches, and scores are cached on disk by (premise hash, hypothesis hash, model id).
+
+Usage: python nli_scores.py explanations.jsonl [--scorer fake|transformers] [--cache PATH] [--batch-size N]
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+
+AI_TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(AI_TESTING_DIR)
+PRIVACY_POLICY_PATH = os.path.join(BACKEND_DIR, 'privacyPolicyData.json')
+PRIVACY_REGULATIONS_PATH = os.path.join(BACKEND_DIR, 'privacyRegulations.json')
+DEFAULT_CACHE_PATH = os.path.join(AI_TESTING_DIR, '.nli_cache', 'nli_scores.sqlite')
+
+# The NLI model nliEvaluator.ts runs (through its Xenova ONNX export)
+DEFAULT_MODEL = 'MoritzLaurer/DeBERTa-v3-large-mnli-fever-anli-ling-wanli'
+DEFAULT_BATCH_SIZE = 16
+
+NLI_COLUMNS = ['NLI_DataCollection', 'NLI_PrivacyExplanation', 'NLI_AverageScore']
+
+def text_hash(text):
+    """Hex digest identifying a premise or hypothesis."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+def find_section_by_id(obj, target_id):
+    """
+    The first object (depth first, in document order) whose id contains target_id, ignoring case,
+    or None: findSectionById in nliEvaluator.ts.
+    """
+    if isinstance(obj, dict) and isinstance(obj.get('id'), str) and obj['id']:
+        if target_id.lower() in obj['id'].lower():
+            return obj
+    children = obj.values() if isinstance(obj, dict) else obj if isinstance(obj, list) else []
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = find_section_by_id(child, target_id)
+            if found is not None:
+                return found
+    return None
+
+def _js_string(value):
+    """How Array.prototype.join writes a value: nested sections (objects) become '[object Object]'."""
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        return '[object Object]'
+    if isinstance(value, list):
+        return ','.join(_js_string(item) for item in value)
+    return str(value)
+
+class PremiseBuilder:
+    """Builds the premises nliEvaluator.ts scores against, each distinct list of links once."""
+
+    def __init__(self, policy_path=PRIVACY_POLICY_PATH, regulations_path=PRIVACY_REGULATIONS_PATH):
+        with open(policy_path) as f:
+            self.policy_sections = json.load(f)['privacyPolicySimplified']['sections']
+        with open(regulations_path) as f:
+            self.principles = json.load(f)['pipeda']['keyPrinciples']
+        self._premises = {}
+
+    def _premise(self, sections, field, links):
+        key = (field, tuple(links))
+        if key not in self._premises:
+            texts = []
+            for link in links:
+                found = find_section_by_id(sections, link)
+                texts.append(_js_string(found.get(field)) if found is not None else '')
+            # The premise is passed through JSON.stringify, so the model sees it as a quoted JSON string
+            self._premises[key] = json.dumps(', '.join(texts), ensure_ascii=False)
+        return self._premises[key]
+
+    def data_collection(self, privacy_policy_links):
+        return self._premise(self.policy_sections, 'content', privacy_policy_links)
+
+    def privacy_explanation(self, regulation_links):
+        return self._premise(self.principles, 'description', regulation_links)
+
+class FakeScorer:
+    """
+    Deterministic offline scorer: a pair's score is derived from a hash of its texts, so runs are repeatable.
+    latency (per call) and pair_latency (per hypothesis) simulate a model's cost for throughput tests.
+    """
+
+    def __init__(self, model_id='fake-nli', latency=0.0, pair_latency=0.0):
+        self.model_id = model_id
+        self.latency = latency
+        self.pair_latency = pair_latency
+
+    def score(self, premise, hypotheses):
+        if self.latency or self.pair_latency:
+            time.sleep(self.latency + self.pair_latency * len(hypotheses))
+        return [int.from_bytes(hashlib.blake2b(f"{premise}\0{hypothesis}".encode('utf-8'), digest_size=8).digest(),
+                               'big') / 2**64 for hypothesis in hypotheses]
+
+class TransformersScorer:
+    """
+    The zero-shot classification pipeline nliEvaluator.ts uses, with a micro-batch of hypotheses as the candidate
+    labels of one premise. Each label is scored on its own (entailment against contradiction), exactly as the TS
+    scores its single label per call.
+    """
+
+    def __init__(self, model_id=DEFAULT_MODEL, device=None):
+        try:
+            from transformers import pipeline
+        except ImportError:
+            raise ImportError("The transformers scorer needs transformers and torch: pip install transformers torch")
+        self.model_id = model_id
+        self._classifier = pipeline('zero-shot-classification', model=model_id, device=device)
+
+    def score(self, premise, hypotheses):
+        result = self._classifier(premise, candidate_labels=list(hypotheses), multi_label=True)
+        by_label = dict(zip(result['labels'], result['scores']))
+        return [by_label[hypothesis] for hypothesis in hypotheses]
+
+SCORERS = {
+    'fake': FakeScorer,
+    'transformers': TransformersScorer,
+}
+
+class NLIScoreCache:
+    """Scores on disk (SQLite), keyed by (model id, premise hash, hypothesis hash). path=None keeps them in memory."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path or ':memory:')
+        self._db.execute('CREATE TABLE IF NOT EXISTS nli_scores (model_id TEXT, premise_hash TEXT, '
+                         'hypothesis_hash TEXT, score REAL, PRIMARY KEY (model_id, premise_hash, hypothesis_hash)) '
+                         'WITHOUT ROWID')
+
+    def lookup(self, model_id, premise_hash, hypothesis_hashes):
+        """Cached scores of a premise's hypotheses, as {hypothesis hash: score}."""
+        wanted = set(hypothesis_hashes)
+        rows = self._db.execute('SELECT hypothesis_hash, score FROM nli_scores WHERE model_id = ? AND premise_hash = ?',
+                                (model_id, premise_hash))
+        return {hypothesis_hash: score for hypothesis_hash, score in rows if hypothesis_hash in wanted}
+
+    def store(self, model_id, premise_hash, scores):
+        """Record {hypothesis hash: score} for a premise; committed at once, so a batch is cached whole or not at all."""
+        with self._db:
+            self._db.executemany('INSERT OR REPLACE INTO nli_scores VALUES (?, ?, ?, ?)',
+                                 [(model_id, premise_hash, hypothesis_hash, score)
+                                  for hypothesis_hash, score in scores.items()])
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM nli_scores').fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+def score_pairs(premises, hypotheses, scorer, cache=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Score (premise, hypothesis) pairs given as two equal-length sequences. Each distinct pair is scored once:
+    cached scores are reused, and the rest are sent to scorer.score(premise, hypotheses) in micro-batches of at
+    most batch_size hypotheses per premise. Returns the scores (in input order) and run statistics.
+    """
+    start = time.perf_counter()
+    premise_hashes = [text_hash(premise) for premise in premises]
+    hypothesis_hashes = [text_hash(hypothesis) for hypothesis in hypotheses]
+
+    # Distinct work, grouped by premise: premise hash -> (premise, {hypothesis hash: hypothesis})
+    work = {}
+    for premise, premise_hash, hypothesis, hypothesis_hash in zip(premises, premise_hashes, hypotheses,
+                                                                  hypothesis_hashes):
+        work.setdefault(premise_hash, (premise, {}))[1].setdefault(hypothesis_hash, hypothesis)
+
+    scores = {}
+    cache_hits = batches = 0
+    for premise_hash, (premise, premise_hypotheses) in work.items():
+        cached = cache.lookup(scorer.model_id, premise_hash, premise_hypotheses) if cache is not None else {}
+        cache_hits += len(cached)
+        scores.update(((premise_hash, hypothesis_hash), score) for hypothesis_hash, score in cached.items())
+
+        missing = [hypothesis_hash for hypothesis_hash in premise_hypotheses if hypothesis_hash not in cached]
+        for batch_start in range(0, len(missing), batch_size):
+            batch = missing[batch_start:batch_start + batch_size]
+            batch_scores = dict(zip(batch, scorer.score(premise, [premise_hypotheses[h] for h in batch])))
+            batches += 1
+            if cache is not None:
+                cache.store(scorer.model_id, premise_hash, batch_scores)
+            scores.update(((premise_hash, hypothesis_hash), score) for hypothesis_hash, score in batch_scores.items())
+
+    unique_pairs = len(scores)
+    seconds = time.perf_counter() - start
+    stats = {
+        'model_id': scorer.model_id,
+        'pairs': len(premise_hashes),
+        'unique_pairs': unique_pairs,
+        'premises': len(work),
+        'cache_hits': cache_hits,
+        'scored': unique_pairs - cache_hits,
+        'batches': batches,
+        'seconds': seconds,
+        'pairs_per_second': len(premise_hashes) / seconds if seconds else float('inf'),
+    }
+    return np.array([scores[key] for key in zip(premise_hashes, hypothesis_hashes)], dtype=float), stats
+
+def nli_pairs(explanations, premises=None):
+    """
+    The two (premise, hypothesis) pairs nliEvaluator.ts scores per explanation, as four lists: data collection
+    premises and hypotheses (storage, access and why against the linked privacy policy sections), then privacy
+    explanation premises and hypotheses (privacyExplanation against the linked PIPEDA principles).
+    """
+    premises = premises or PremiseBuilder()
+    text = {field: explanations[field].fillna('').astype(str).tolist()
+            for field in ['why', 'storage', 'access', 'privacyExplanation']}
+    data_collection_premises = [premises.data_collection(links) for links in explanations['privacyPolicyLink']]
+    data_collection_hypotheses = [f"{storage}, {access}, {why}"
+                                  for storage, access, why in zip(text['storage'], text['access'], text['why'])]
+    privacy_premises = [premises.privacy_explanation(links) for links in explanations['regulationLink']]
+    return data_collection_premises, data_collection_hypotheses, privacy_premises, text['privacyExplanation']
+
+def score_explanations(explanations, scorer, cache=None, batch_size=DEFAULT_BATCH_SIZE, premises=None):
+    """
+    Return explanations with the NLI columns of the raw CSV added, and the scoring statistics. As in
+    evalAIExplanation.ts a score of 0 is recorded as missing, and the average is over the scores that are present.
+    """
+    data_premises, data_hypotheses, privacy_premises, privacy_hypotheses = nli_pairs(explanations, premises)
+    scores, stats = score_pairs(data_premises + privacy_premises, data_hypotheses + privacy_hypotheses, scorer,
+                                cache, batch_size)
+    data_collection, privacy_explanation = scores[:len(explanations)], scores[len(explanations):]
+    both = np.column_stack([data_collection, privacy_explanation])
+    present = (~np.isnan(both)).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = np.nansum(both, axis=1) / present
+    return explanations.assign(
+        NLI_DataCollection=np.where(data_collection != 0, data_collection, np.nan),
+        NLI_PrivacyExplanation=np.where(privacy_explanation != 0, privacy_explanation, np.nan),
+        NLI_AverageScore=average,
+    ), stats
+
+def load_explanations(path):
+    """
+    Explanations with their section links, from JSON Lines, a JSON array of objects, or CSV (links as JSON arrays).
+    Links given as a single string are treated as one link.
+    """
+    if path.endswith('.jsonl'):
+        df = pd.read_json(path, lines=True, dtype=False)
+    elif path.endswith('.json'):
+        with open(path) as f:
+            df = pd.DataFrame(json.load(f))
+    else:
+        df = pd.read_csv(path, keep_default_na=False)
+        for col in ['privacyPolicyLink', 'regulationLink']:
+            df[col] = [json.loads(links) if links.startswith('[') else [links] if links else [] for links in df[col]]
+    for col in ['privacyPolicyLink', 'regulationLink']:
+        df[col] = [links if isinstance(links, list) else [links] if isinstance(links, str) else [] for links in df[col]]
+    return df
+
+def print_stats(stats):
+    print(f" Scored {stats['pairs']} pairs with {stats['model_id']}: {stats['unique_pairs']} distinct over "
+          f"{stats['premises']} premises, {stats['cache_hits']} cached, {stats['scored']} scored in "
+          f"{stats['batches']} batches")
+    hit_rate = stats['cache_hits'] / stats['unique_pairs'] if stats['unique_pairs'] else 0.0
+    print(f" {stats['seconds']:.2f}s, {stats['pairs_per_second']:,.0f} pairs/sec, cache hit rate {hit_rate:.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Score AI explanations against their linked privacy policy and PIPEDA sections in bulk.'
+    )
+    parser.add_argument('path', help='explanations (.jsonl, .json or .csv) with why, storage, access, '
+                                     'privacyExplanation, privacyPolicyLink and regulationLink')
+    parser.add_argument('--scorer', choices=list(SCORERS), default='fake',
+                        help='scorer backend (default: fake, a deterministic offline scorer)')
+    parser.add_argument('--model', default=None,
+                        help=f'model id for the transformers scorer (default: {DEFAULT_MODEL})')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'hypotheses per scorer call (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'score cache (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', dest='cache', action='store_const', const=None,
+                        help='score every distinct pair, without reading or writing the cache')
+    parser.add_argument('--fake-latency', type=float, default=0.0,
+                        help='seconds the fake scorer waits per hypothesis, to simulate a model (default: 0)')
+    parser.add_argument('--output', default=None, help='where to write the scored CSV (default: <path>_nli.csv)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f" File not found: {args.path}")
+        sys.exit(1)
+
+    if args.scorer == 'fake':
+        scorer = FakeScorer(args.model or 'fake-nli', pair_latency=args.fake_latency)
+    else:
+        scorer = TransformersScorer(args.model or DEFAULT_MODEL)
+    cache = NLIScoreCache(args.cache) if args.cache else None
+
+    explanations = load_explanations(args.path)
+    scored, stats = score_explanations(explanations, scorer, cache, args.batch_size)
+    if cache is not None:
+        cache.close()
+
+    output = args.output or f"{os.path.splitext(args.path)[0]}_nli.csv"
+    for col in ['privacyPolicyLink', 'regulationLink']:
+        scored[col] = [json.dumps(links) for links in scored[col]]
+    scored.to_csv(output, index=False)
+    print_stats(stats)
+    print(f" Output: {output}")
+
+if __name__ == "__main__":
+    main()
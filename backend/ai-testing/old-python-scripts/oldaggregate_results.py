@@ -2,141 +2,94 @@
 This script was used for the early trials when multiple prompt types were part of the experiment.
 May be useful for future experiments with multiple prompt types.
 Privacy Experiment Data Aggregator
-Calculates comprehensive aggregate statistics from raw experiment data.
+Calculates comprehensive aggregate statistics from raw experiment data and hands them straight to
+oldvisualize_results.py in memory; the CSVs are only written as output.
 """
 
 import pandas as pd
 import numpy as np
 import sys
 import os
+import argparse
+import contextlib
+import io
+import tempfile
 from pathlib import Path
 
-def load_and_clean_data(filepath):
-    """Load CSV data and handle missing values."""
-    try:
-        df = pd.read_csv(filepath)
-        print(f"Loaded {len(df)} rows from {filepath}")
-        
-        # Convert N/A strings to NaN for proper handling
-        df = df.replace('N/A', np.nan)
-        
-        # Convert numeric columns to proper types
-        numeric_columns = ['TargetLength', 'ActualWordCount', 'NLI_DataCollection', 
-                          'NLI_PrivacyExplanation', 'NLI_AverageScore', 
-                          'FleschKincaid', 'ColemanLiau', 'WordFrequencyScore']
-        
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        return df
-        
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return None
-
-def calculate_basic_stats(df, group_cols, metrics):
-    """Calculate mean, std, count for specified metrics."""
-    stats = []
-    
-    # Handle case where no grouping columns are provided (overall stats)
-    if not group_cols:
-        row = {}
-        row['SampleSize'] = len(df)
-        
-        for metric in metrics:
-            if metric in df.columns:
-                values = df[metric].dropna()
-                row[f'Mean_{metric}'] = values.mean() if len(values) > 0 else np.nan
-                row[f'Std_{metric}'] = values.std() if len(values) > 0 else np.nan
-            else:
-                row[f'Mean_{metric}'] = np.nan
-                row[f'Std_{metric}'] = np.nan
-                
-        stats.append(row)
-    else:
-        # Normal grouping case
-        for group_name, group_df in df.groupby(group_cols):
-            if isinstance(group_name, tuple):
-                group_dict = dict(zip(group_cols, group_name))
-            else:
-                group_dict = {group_cols[0]: group_name}
-            
-            row = group_dict.copy()
-            row['SampleSize'] = len(group_df)
-            
-            for metric in metrics:
-                if metric in group_df.columns:
-                    values = group_df[metric].dropna()
-                    row[f'Mean_{metric}'] = values.mean() if len(values) > 0 else np.nan
-                    row[f'Std_{metric}'] = values.std() if len(values) > 0 else np.nan
-                else:
-                    row[f'Mean_{metric}'] = np.nan
-                    row[f'Std_{metric}'] = np.nan
-                    
-            stats.append(row)
-    
-    return pd.DataFrame(stats)
+# The aggregation engine is shared with analyze_data.py in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analyze_data import LENGTH_METRICS, add_length_metrics, calculate_grouping_sets_stats, load_and_clean_data
 
 def create_aggregation_reports(df, output_dir):
-    """Create comprehensive aggregation reports."""
+    """
+    Create comprehensive aggregation reports.
+    InstructionType is optional: files without it (the readability_length layout) get the
+    by_length, overall, by_event and length_analysis reports only.
+    """
     
     metrics = ['ActualWordCount', 'NLI_DataCollection', 'NLI_PrivacyExplanation', 
               'NLI_AverageScore', 'FleschKincaid', 'ColemanLiau', 'WordFrequencyScore']
+    metrics = [metric for metric in metrics if metric in df.columns]
     
     reports = {}
     
-    # 1. By Instruction Type and Target Length
-    print(" Calculating aggregates by Instruction Type and Target Length...")
-    by_instruction_length = calculate_basic_stats(
-        df, ['InstructionType', 'TargetLength'], metrics
+    # Length Analysis metrics - How well does actual match target?
+    df_length_analysis = add_length_metrics(df)
+    length_metrics = LENGTH_METRICS
+    
+    metric_columns = [f'{stat}_{metric}' for metric in metrics for stat in ('Mean', 'Std')]
+    length_columns = [f'{stat}_{metric}' for metric in length_metrics for stat in ('Mean', 'Std')]
+    
+    if 'InstructionType' not in df.columns:
+        print(" Calculating aggregates by Target Length and Event Type...")
+        by_length, overall, by_event = calculate_grouping_sets_stats(
+            df_length_analysis, [['TargetLength'], [], ['EventKey']], metrics + length_metrics
+        )
+        reports['by_length'] = by_length[['TargetLength', 'SampleSize'] + metric_columns]
+        reports['overall'] = overall[['SampleSize'] + metric_columns]
+        reports['by_event'] = by_event[['EventKey', 'SampleSize'] + metric_columns]
+        reports['length_analysis'] = by_length[['TargetLength', 'SampleSize'] + length_columns]
+        return reports
+    
+    # 1-6. Every grouping is computed by the shared engine in a single pass
+    print(" Calculating aggregates by Instruction Type, Target Length and Event Type...")
+    by_instruction_length, by_instruction, overall, by_event_instruction, by_event = calculate_grouping_sets_stats(
+        df_length_analysis,
+        [['InstructionType', 'TargetLength'], ['InstructionType'], [], ['EventKey', 'InstructionType'], ['EventKey']],
+        metrics + length_metrics
     )
-    reports['by_instruction_length'] = by_instruction_length
+    
+    # 1. By Instruction Type and Target Length
+    reports['by_instruction_length'] = by_instruction_length[['InstructionType', 'TargetLength', 'SampleSize'] + metric_columns]
     
     # 2. By Instruction Type (Overall)
-    print(" Calculating aggregates by Instruction Type...")
-    by_instruction = calculate_basic_stats(
-        df, ['InstructionType'], metrics
-    )
-    reports['by_instruction'] = by_instruction
+    reports['by_instruction'] = by_instruction[['InstructionType', 'SampleSize'] + metric_columns]
     
     # 3. Overall Statistics
-    print(" Calculating overall statistics...")
-    overall = calculate_basic_stats(
-        df, [], metrics  # No grouping columns for overall stats
-    )
-    overall['InstructionType'] = 'Overall'
-    reports['overall'] = overall
+    reports['overall'] = overall[['SampleSize'] + metric_columns].assign(InstructionType='Overall')
     
     # 4. By Event Type and Instruction Type
-    print(" Calculating aggregates by Event Type and Instruction Type...")
-    by_event_instruction = calculate_basic_stats(
-        df, ['EventKey', 'InstructionType'], metrics
-    )
-    reports['by_event_instruction'] = by_event_instruction
+    reports['by_event_instruction'] = by_event_instruction[['EventKey', 'InstructionType', 'SampleSize'] + metric_columns]
     
     # 5. By Event Type (Combined Instructions)
-    print(" Calculating aggregates by Event Type (combined)...")
-    by_event = calculate_basic_stats(
-        df, ['EventKey'], metrics
-    )
-    reports['by_event'] = by_event
+    reports['by_event'] = by_event[['EventKey', 'SampleSize'] + metric_columns]
     
-    # 6. Length Analysis - How well does actual match target?
+    # 6. Length Analysis
     print(" Analyzing length accuracy...")
-    df_length_analysis = df.copy()
-    df_length_analysis['LengthRatio'] = df_length_analysis['ActualWordCount'] / df_length_analysis['TargetLength']
-    df_length_analysis['LengthDifference'] = df_length_analysis['ActualWordCount'] - df_length_analysis['TargetLength']
-    df_length_analysis['LengthAccuracy'] = np.abs(df_length_analysis['LengthDifference']) / df_length_analysis['TargetLength']
-    
-    length_metrics = ['LengthRatio', 'LengthDifference', 'LengthAccuracy']
-    length_analysis = calculate_basic_stats(
-        df_length_analysis, ['InstructionType', 'TargetLength'], length_metrics
-    )
-    reports['length_analysis'] = length_analysis
+    reports['length_analysis'] = by_instruction_length[['InstructionType', 'TargetLength', 'SampleSize'] + length_columns]
     
     return reports
 
+def round_report(report_df):
+    """
+    Round numeric columns to 4 decimal places for readability, in a copy so the in-memory reports
+    handed to the visualizations keep full precision.
+    """
+    numeric_columns = report_df.select_dtypes(include=[np.number]).columns
+    report_df = report_df.copy()
+    report_df[numeric_columns] = report_df[numeric_columns].round(4)
+    return report_df
+
 def save_reports(reports, output_dir, base_filename):
     """Save all reports to CSV files."""
     
@@ -147,38 +100,44 @@ def save_reports(reports, output_dir, base_filename):
             filename = f"{base_filename}_{report_name}.csv"
             filepath = os.path.join(output_dir, filename)
             
-            # Round numeric columns to 4 decimal places for readability
-            numeric_columns = report_df.select_dtypes(include=[np.number]).columns
-            report_df[numeric_columns] = report_df[numeric_columns].round(4)
-            
-            report_df.to_csv(filepath, index=False)
+            round_report(report_df).to_csv(filepath, index=False)
             saved_files.append(filepath)
             print(f" Saved {report_name}: {filepath}")
     
     return saved_files
 
+def instruction_subsets(df):
+    """(instruction type, rows) pairs, or the whole frame as 'all' when there is no InstructionType column."""
+    if 'InstructionType' not in df.columns:
+        return [('all', df)]
+    return [(instruction, df[df['InstructionType'] == instruction]) for instruction in df['InstructionType'].unique()]
+
 def print_summary_statistics(df):
     """Print key summary statistics to console."""
     
+    # Averaged in float64 whatever the stored (compact) dtypes
+    df = df.astype({col: float for col in df.select_dtypes(include=[np.number]).columns})
+    
     print("\n" + "="*60)
     print(" SUMMARY STATISTICS")
     print("="*60)
     
     # Overall sample size
     print(f" Total Experiments: {len(df)}")
-    print(f" Instruction Types: {df['InstructionType'].nunique()} ({', '.join(df['InstructionType'].unique())})")
+    if 'InstructionType' in df.columns:
+        print(f" Instruction Types: {df['InstructionType'].nunique()} ({', '.join(df['InstructionType'].unique())})")
     print(f" Event Types: {df['EventKey'].nunique()}")
     print(f" Target Lengths: {df['TargetLength'].nunique()} ({', '.join(map(str, sorted(df['TargetLength'].unique())))})")
     
     # Key metrics by instruction type
     print(f"\n RESULTS BY INSTRUCTION TYPE:")
-    for instruction in df['InstructionType'].unique():
-        subset = df[df['InstructionType'] == instruction]
+    for instruction, subset in instruction_subsets(df):
         print(f"\n{instruction.upper()}:")
         print(f"  • Sample Size: {len(subset)}")
         print(f"  • Avg Word Count: {subset['ActualWordCount'].mean():.1f}")
         print(f"  • Avg Flesch-Kincaid: {subset['FleschKincaid'].mean():.2f}")
-        print(f"  • Avg Coleman-Liau: {subset['ColemanLiau'].mean():.2f}")
+        if 'ColemanLiau' in subset.columns:
+            print(f"  • Avg Coleman-Liau: {subset['ColemanLiau'].mean():.2f}")
         print(f"  • Avg Word Freq: {subset['WordFrequencyScore'].mean():.2f}")
         print(f"  • Avg NLI Data Collection Score: {subset['NLI_DataCollection'].mean():.3f}")
         print(f"  • Avg NLI Privacy Explanation Score: {subset['NLI_PrivacyExplanation'].mean():.3f}")
@@ -186,8 +145,7 @@ def print_summary_statistics(df):
     
     # Length adherence
     print(f"\n LENGTH ADHERENCE:")
-    for instruction in df['InstructionType'].unique():
-        subset = df[df['InstructionType'] == instruction]
+    for instruction, subset in instruction_subsets(df):
         length_ratio = (subset['ActualWordCount'] / subset['TargetLength']).mean()
         print(f"  • {instruction}: {length_ratio:.2f}x target length on average")
     
@@ -220,21 +178,41 @@ def print_summary_statistics(df):
         nli_wordfreq_corr = numeric_df['NLI_AverageScore'].corr(numeric_df['WordFrequencyScore'])
         print(f"  • NLI Score vs Word Frequency: {nli_wordfreq_corr:.3f}")
 
-def main():
-    if len(sys.argv) != 2:
-        print(" Usage: python aggregate_results.py <raw_data_csv_path>")
-        sys.exit(1)
-    
-    raw_data_path = sys.argv[1]
-    
-    if not os.path.exists(raw_data_path):
-        print(f" File not found: {raw_data_path}")
-        sys.exit(1)
-    
+def check_report_parity(reports):
+    """
+    Check that every report reads back from its CSV as the frame the visualizations get in memory,
+    rounded as save_reports rounds it: same columns in the same order, dtypes and values.
+    Categorical key columns are compared as their categories' type, which is all a CSV can hold.
+    Returns {report name: difference} for the reports that disagree, so an empty dict means parity.
+    """
+    mismatched = {}
+    with tempfile.TemporaryDirectory() as csv_dir:
+        for report_name, report_df in reports.items():
+            if report_df.empty:
+                continue
+            expected = round_report(report_df)
+            for col in expected.columns:
+                if isinstance(expected[col].dtype, pd.CategoricalDtype):
+                    expected[col] = expected[col].astype(expected[col].cat.categories.dtype)
+            with contextlib.redirect_stdout(io.StringIO()):
+                saved_file = save_reports({report_name: report_df}, csv_dir, 'parity')[0]
+            try:
+                pd.testing.assert_frame_equal(pd.read_csv(saved_file), expected, check_exact=True)
+            except AssertionError as e:
+                mismatched[report_name] = str(e)
+    return mismatched
+
+def run_pipeline(raw_data_path, plots=True, check_parity=False):
+    """
+    Load -> aggregate -> save -> visualize for one raw data file. The aggregate frames go to the
+    visualizations in memory, so the saved CSVs are never read back. check_parity also reads the
+    saved CSVs back and compares them with the in-memory reports (see check_report_parity).
+    Returns the saved files, or None when the data could not be loaded or the parity check failed.
+    """
     # Load data
     df = load_and_clean_data(raw_data_path)
     if df is None:
-        sys.exit(1)
+        return None
     
     # Setup output directory and base filename
     output_dir = os.path.dirname(raw_data_path)
@@ -250,6 +228,20 @@ def main():
     # Print summary to console
     print_summary_statistics(df)
     
+    # Create visualizations from the in-memory reports
+    if plots:
+        from oldvisualize_results import visualize_reports
+        visualize_reports(reports, output_dir, base_filename)
+    
+    if check_parity:
+        mismatched = check_report_parity(reports)
+        if mismatched:
+            print(f"\n In-memory and CSV reports differ:")
+            for report_name, difference in mismatched.items():
+                print(f"   • {report_name}: {difference}")
+            return None
+        print(f"\n In-memory and CSV reports match")
+    
     # Final output summary
     print(f"\n AGGREGATION COMPLETE!")
     print(f" Output Directory: {output_dir}")
@@ -257,11 +249,31 @@ def main():
     for file in saved_files:
         print(f"   • {os.path.basename(file)}")
     
+    return saved_files
+
+def main():
+    parser = argparse.ArgumentParser(description='Aggregate raw experiment data and visualize the aggregates.')
+    parser.add_argument('paths', nargs='+', help='raw data CSV files')
+    parser.add_argument('--no-plots', dest='plots', action='store_false', help='only write the aggregate CSVs')
+    parser.add_argument('--check-parity', action='store_true',
+                        help='also read the saved CSVs back and fail if they differ from the in-memory reports')
+    args = parser.parse_args()
+    
+    for raw_data_path in args.paths:
+        if not os.path.exists(raw_data_path):
+            print(f" File not found: {raw_data_path}")
+            sys.exit(1)
+    
+    for raw_data_path in args.paths:
+        if run_pipeline(raw_data_path, args.plots, args.check_parity) is None:
+            sys.exit(1)
+    
     print(f"\n Key Files:")
     print(f"   • by_instruction_length.csv - Main results by instruction type and target length")
     print(f"   • by_instruction.csv - Overall results by instruction type") 
     print(f"   • by_event_instruction.csv - Results by event type and instruction")
     print(f"   • length_analysis.csv - How well target lengths were achieved")
+    print(f"   • visualizations/ - Figures for the instruction × length and event reports")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
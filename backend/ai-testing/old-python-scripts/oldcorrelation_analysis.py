@@ -12,29 +12,9 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-def load_and_clean_data(filepath):
-    """Load CSV data and handle missing values."""
-    try:
-        df = pd.read_csv(filepath)
-        print(f"Loaded {len(df)} rows from {filepath}")
-        
-        # Convert N/A strings to NaN for proper handling
-        df = df.replace('N/A', np.nan)
-        
-        # Convert numeric columns to proper types
-        numeric_columns = ['TargetLength', 'ActualWordCount', 'NLI_DataCollection', 
-                           'NLI_PrivacyExplanation', 'NLI_AverageScore', 
-                           'FleschKincaid', 'ColemanLiau', 'WordFrequencyScore']
-        
-        for col in numeric_columns:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-        
-        return df
-        
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return None
+# Raw data is loaded (and cached) by the shared loader in analyze_data.py in the parent directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from analyze_data import load_and_clean_data
 
 def calculate_length_controlled_correlations(df):
     """Calculate accuracy vs readability correlations within each length category."""
@@ -11,7 +11,6 @@ import seaborn as sns
 import sys
 import os
 from pathlib import Path
-import glob
 
 # Set style for better-looking plots
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -400,13 +399,17 @@ def create_event_analysis_visualizations(df, output_dir, base_name, by_instructi
         ax4.tick_params(axis='x', rotation=45)
         ax4.grid(True, alpha=0.3)
         
-        ax5.bar(event_order, df.sort_values('Mean_NLI_AverageScore', ascending=False)['Mean_ColemanLiau'])
-        ax5.set_title('Coleman-Liau Score by Event Type')
-        ax5.set_xlabel('Event Type')
-        ax5.set_ylabel('C-L Score')
-        ax5.set_ylim(0, 20)
-        ax5.tick_params(axis='x', rotation=45)
-        ax5.grid(True, alpha=0.3)
+        # Newer raw files (readability_length layout) have no Coleman-Liau score
+        if 'Mean_ColemanLiau' in df.columns:
+            ax5.bar(event_order, df.sort_values('Mean_NLI_AverageScore', ascending=False)['Mean_ColemanLiau'])
+            ax5.set_title('Coleman-Liau Score by Event Type')
+            ax5.set_xlabel('Event Type')
+            ax5.set_ylabel('C-L Score')
+            ax5.set_ylim(0, 20)
+            ax5.tick_params(axis='x', rotation=45)
+            ax5.grid(True, alpha=0.3)
+        else:
+            fig.delaxes(ax5)
         
         ax6.bar(event_order, df.sort_values('Mean_NLI_AverageScore', ascending=False)['Mean_WordFrequencyScore'])
         ax6.set_title('Word Frequency Score by Event Type')
@@ -421,65 +424,79 @@ def create_event_analysis_visualizations(df, output_dir, base_name, by_instructi
     plt.savefig(os.path.join(output_dir, f'{base_name}_{suffix}_analysis.png'), dpi=300, bbox_inches='tight')
     plt.close()
 
-def process_all_csv_files(base_path):
-    """Process all CSV files and create visualizations."""
-    
+# Aggregate reports that have figures
+VISUALIZED_REPORTS = ['by_instruction_length', 'by_event_instruction', 'by_event']
+
+def visualize_reports(reports, base_dir, base_filename, keep_going=False):
+    """
+    Create visualizations straight from the aggregate report frames (as returned by
+    oldaggregate_results.create_aggregation_reports), keyed by report name.
+    A report whose figures fail to draw raises, unless keep_going, in which case the error is
+    printed and the remaining reports are still drawn.
+    Returns the visualization directory and the number of reports that failed.
+    """
     setup_plot_style()
     
-    base_dir = os.path.dirname(base_path)
-    base_filename = os.path.splitext(os.path.basename(base_path))[0]
-    base_filename = base_filename.replace('_raw', '_aggregated')
-    
-    # Find all related CSV files
-    csv_files = glob.glob(os.path.join(base_dir, f"{base_filename}_*.csv"))
-    
-    if not csv_files:
-        print(f" No CSV files found matching pattern: {base_filename}_*.csv")
-        return
-    
-    print(f"Found {len(csv_files)} CSV files to visualize")
-    
     # Create output directory for visualizations
     viz_dir = os.path.join(base_dir, 'visualizations')
     os.makedirs(viz_dir, exist_ok=True)
     
-    for csv_file in csv_files:
-        filename = os.path.basename(csv_file)
-        file_type = filename.replace(f"{base_filename}_", "").replace(".csv", "")
-        
-        print(f"\nProcessing: {filename}")
+    failures = 0
+    for report_name, df in reports.items():
+        if report_name not in VISUALIZED_REPORTS:
+            continue
+        if df.empty:
+            print(f"Skipping empty report: {report_name}")
+            continue
         
+        print(f"\nProcessing: {report_name}")
+        viz_base_name = f"{base_filename}_{report_name}"
         try:
-            df = pd.read_csv(csv_file)
-            
-            if df.empty:
-                print(f"Skipping empty file: {filename}")
-                continue
-            
-            viz_base_name = f"{base_filename}_{file_type}"
-            
-            if file_type == "by_instruction_length":
+            if report_name == "by_instruction_length":
                 create_instruction_length_visualizations(df, viz_dir, viz_base_name)
-            
-            elif file_type == "by_event_instruction":
+            elif report_name == "by_event_instruction":
                 create_event_analysis_visualizations(df, viz_dir, viz_base_name, by_instruction=True)
-                
-            elif file_type == "by_event":
-                create_event_analysis_visualizations(df, viz_dir, viz_base_name, by_instruction=False)
-                
             else:
-                print(f"Unknown file type: {file_type}, skipping visualization")
-                continue
-                
-            print(f" Created visualizations for {file_type}")
-            
+                create_event_analysis_visualizations(df, viz_dir, viz_base_name, by_instruction=False)
+            print(f" Created visualizations for {report_name}")
         except Exception as e:
-            print(f" Error processing {filename}: {e}")
-            continue
-    
-    print(f"\nVISUALIZATION COMPLETE!")
+            plt.close('all')
+            if not keep_going:
+                raise
+            failures += 1
+            print(f" Error visualizing {report_name}: {e}")
+    
+    if failures:
+        print(f"\nVISUALIZATION FAILED for {failures} report(s)")
+    else:
+        print(f"\nVISUALIZATION COMPLETE!")
     print(f"All visualizations saved to: {viz_dir}")
     print(f" Generated comprehensive charts for all data perspectives")
+    return viz_dir, failures
+
+def process_all_csv_files(base_path):
+    """
+    Process the aggregate CSV files already written next to base_path and create visualizations.
+    oldaggregate_results.py now visualizes its reports in memory; this is for re-plotting saved reports.
+    Every report is attempted; returns the number that failed to draw, or None when there were no CSVs.
+    """
+    base_dir = os.path.dirname(base_path)
+    base_filename = os.path.splitext(os.path.basename(base_path))[0]
+    base_filename = base_filename.replace('_raw', '_aggregated')
+    
+    # Only the reports that have figures are read back
+    reports = {}
+    for report_name in VISUALIZED_REPORTS:
+        csv_file = os.path.join(base_dir, f"{base_filename}_{report_name}.csv")
+        if os.path.exists(csv_file):
+            reports[report_name] = pd.read_csv(csv_file)
+    
+    if not reports:
+        print(f" No aggregate CSV files found for: {base_filename}")
+        return None
+    
+    print(f"Found {len(reports)} CSV files to visualize")
+    return visualize_reports(reports, base_dir, base_filename, keep_going=True)[1]
 
 def main():
     if len(sys.argv) != 2:
@@ -493,7 +510,8 @@ def main():
         print(f"Base file not found: {base_path}")
         sys.exit(1)
     
-    process_all_csv_files(base_path)
+    if process_all_csv_files(base_path) != 0:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
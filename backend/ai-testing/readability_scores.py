@@ -0,0 +1,335 @@
+"""
+Bulk Readability Scorer
+Computes Flesch-Kincaid, Coleman-Liau and word frequency scores for a whole column of explanation texts, exactly
+as readability/flesch-kincaid.ts, coleman-liau.ts and word-freq.ts do for one string, so metric definitions can
+be changed and archived explanations rescored without re-running the TypeScript experiment loop.
+"""
+
+import pandas as pd
+import numpy as np
+import sys
+import os
+import re
+import json
+import argparse
+import itertools
+import functools
+from decimal import Decimal, ROUND_HALF_UP
+from concurrent.futures import ProcessPoolExecutor
+
+import word_frequency_index
+
+AI_TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_TEXT_DIR = os.path.join(AI_TESTING_DIR, 'sample-text-testing')
+
+# Bump whenever a metric definition changes, so reports computed from rescored data are redone
+SCORER_VERSION = 1
+
+# The AIExplanation fields that evalReadability.ts joins (with single spaces, in this order) into one text
+EXPLANATION_FIELDS = ['why', 'storage', 'access', 'privacyExplanation']
+
+# Decimals the experiment loop writes each metric with (toFixed), so rescored data matches a regenerated trial
+RAW_CSV_DECIMALS = {'ActualWordCount': 1, 'FleschKincaid': 2, 'ColemanLiau': 2, 'WordFrequencyScore': 2}
+
+SHARD_SIZE = 50_000
+
+# Zipf value word-freq.ts gives words missing from word_frequencies.json. sampleTextTest.csv was generated while
+# it still gave them 0.1, so the sample texts are validated against that revision of the scorer.
+UNKNOWN_WORD_FREQUENCY = 1.0
+SAMPLE_TEXT_UNKNOWN_WORD_FREQUENCY = 0.1
+
+# Character classes of the TS regexes: JavaScript's \w is ASCII only
+FK_STRIP = r'[^A-Za-z0-9_\s.!?]'
+WORD_FREQ_STRIP = r'[^A-Za-z0-9_\s]'
+# A sentence is a run of text between [.!?]+ separators that is not just whitespace
+SENTENCE = r'[^.!?\s][^.!?]*'
+# Deletes the ASCII letters Coleman-Liau counts
+NON_LETTERS = str.maketrans('', '', 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+# Port of the `syllable` npm package (v5) used by flesch-kincaid.ts. Its inputs are ASCII words, because the
+# Flesch-Kincaid cleaning has already replaced every other character with a space.
+PROBLEMATIC_SYLLABLES = {
+    'abalone': 4, 'abare': 3, 'abbruzzese': 4, 'abed': 2, 'aborigine': 5, 'abruzzese': 4, 'acreage': 3,
+    'adame': 3, 'adieu': 2, 'adobe': 3, 'anemone': 4, 'anyone': 3, 'apache': 3, 'aphrodite': 4,
+    'apostrophe': 4, 'ariadne': 4, 'cafe': 2, 'calliope': 4, 'catastrophe': 4, 'chile': 2, 'chloe': 2,
+    'circe': 2, 'coyote': 3, 'daphne': 2, 'epitome': 4, 'eurydice': 4, 'euterpe': 3, 'every': 2,
+    'everywhere': 3, 'forever': 3, 'gethsemane': 4, 'guacamole': 4, 'hermione': 4, 'hyperbole': 4, 'jesse': 2,
+    'jukebox': 2, 'karate': 3, 'machete': 3, 'maybe': 2, 'naive': 2, 'newlywed': 3, 'penelope': 4, 'people': 2,
+    'persephone': 4, 'phoebe': 2, 'pulse': 1, 'queue': 1, 'recipe': 3, 'riverbed': 3, 'sesame': 3,
+    'shoreline': 2, 'simile': 3, 'snuffleupagus': 5, 'sometimes': 2, 'syncope': 3, 'tamale': 3, 'waterbed': 3,
+    'wednesday': 2, 'yosemite': 4, 'zoe': 2,
+}
+
+# Occurrences counted as two syllables that should be one
+MONOSYLLABIC_ONE = re.compile('|'.join([
+    'awe($|d|so)', 'cia(?:l|$)', 'tia', 'cius', 'cious', '[^aeiou]giu', '[aeiouy][^aeiouy]ion', 'iou', 'sia$',
+    'eous$', '[oa]gue$', '.[^aeiuoycgltdb]{2,}ed$', '.ely$', '^jua', 'uai', 'eau', '^busi$',
+    '(?:[aeiouy](?:[bcfgklmnprsvwxyz]|ch|dg|g[hn]|lch|l[lv]|mm|nch|n[cgn]|r[bcnsv]|squ|s[chkls]|th)ed$)',
+    '(?:[aeiouy](?:[bdfklmnprstvy]|ch|g[hn]|lch|l[lv]|mm|nch|nn|r[nsv]|squ|s[cklst]|th)es$)',
+]))
+MONOSYLLABIC_TWO = re.compile('[aeiouy](?:[bcdfgklmnprstvyz]|ch|dg|g[hn]|l[lv]|mm|n[cgns]|r[cnsv]|squ|s[cklst]|th)e$')
+
+# Occurrences counted as one syllable that should be two
+DOUBLE_SYLLABIC_ONE = re.compile('(?:' + '|'.join([
+    r'([^aeiouy])\1l', '[^aeiouy]ie(?:r|s?t)', '[aeiouym]bl', 'eo', 'ism', 'asm', 'thm', 'dnt', 'snt', 'uity',
+    'dea', 'gean', 'oa', 'ua', 'react?', 'orbed', 'shred', 'eings?', '[aeiouy]sh?e[rs]',
+]) + ')$')
+DOUBLE_SYLLABIC_TWO = re.compile('|'.join([
+    'creat(?!u)', '[^gq]ua[^auieo]', '[aeiou]{3}', '^(?:ia|mc|coa[dglx].)', '^re(app|es|im|us)', '(th|d)eist',
+]))
+DOUBLE_SYLLABIC_THREE = re.compile('|'.join([
+    '[^aeiou]y[ae]', '[^l]lien', 'riet', 'dien', 'iu', 'io', 'ii', 'uen', '[aeilotu]real', 'real[aeilotu]',
+    'iell', 'eo[^aeiou]', '[aeiou]y[aeiou]',
+]))
+DOUBLE_SYLLABIC_FOUR = re.compile('[^s]ia')
+
+# Prefixes and suffixes of one, two and three syllables
+SINGLE = re.compile('|'.join([
+    '^(?:un|fore|ware|none?|out|post|sub|pre|pro|dis|side|some)',
+    '(?:ly|less|some|ful|ers?|ness|cians?|ments?|ettes?|villes?|ships?|sides?|ports?|shires?|[gnst]ion(?:ed|s)?)$',
+]))
+DOUBLE = re.compile('|'.join([
+    '^(?:above|anti|ante|counter|hyper|afore|agri|infra|intra|inter|over|semi|ultra|under|extra|dia|micro|mega|'
+    'kilo|pico|nano|macro|somer)',
+    '(?:fully|berry|woman|women|edly|union|((?:[bcdfghjklmnpqrstvwxz])|[aeiou])ye?ing)$',
+]))
+TRIPLE = re.compile('(creations?|ology|ologist|onomy|onomist)$')
+
+# Syllables of every word seen so far in this process
+_syllable_cache = {}
+_word_frequency_index = None
+
+def _word_syllables(value):
+    """Syllables in one lowercase run of letters (syllable's `one`)."""
+    if not value:
+        return 0
+    if len(value) < 3:
+        return 1
+    if value in PROBLEMATIC_SYLLABLES:
+        return PROBLEMATIC_SYLLABLES[value]
+    # syllable also looks up the singular (via pluralize); regular plurals are the only ones that can match
+    for suffix in ('s', 'es'):
+        if value.endswith(suffix) and value[:-len(suffix)] in PROBLEMATIC_SYLLABLES:
+            return PROBLEMATIC_SYLLABLES[value[:-len(suffix)]]
+
+    count = 0
+    for pattern, syllables in [(TRIPLE, 3), (DOUBLE, 2), (SINGLE, 1)]:
+        value, matches = pattern.subn('', value)
+        count += syllables * matches
+
+    count += sum(1 for part in re.split('[^aeiouy]+', value) if part)
+    count -= len(MONOSYLLABIC_ONE.findall(value)) + len(MONOSYLLABIC_TWO.findall(value))
+    count += (len(DOUBLE_SYLLABIC_ONE.findall(value)) + len(DOUBLE_SYLLABIC_TWO.findall(value))
+              + len(DOUBLE_SYLLABIC_THREE.findall(value)) + bool(DOUBLE_SYLLABIC_FOUR.search(value)))
+    return count or 1
+
+def syllable_count(word):
+    """Syllables in a word, as counted by the `syllable` package: every run of letters, digits and underscores is a part."""
+    if word not in _syllable_cache:
+        parts = re.findall(r'\w+', word.lower().replace("'", '').replace('’', ''), flags=re.ASCII)
+        _syllable_cache[word] = sum(_word_syllables(re.sub('[^a-z]', '', part)) for part in parts)
+    return _syllable_cache[word]
+
+def load_word_frequencies():
+    """
+    The SUBTLEX-US zipf values used by word-freq.ts, as the memory-mapped index (see word_frequency_index.py),
+    mapped once per process. Forked workers share the parent's mapping.
+    """
+    global _word_frequency_index
+    if _word_frequency_index is None:
+        _word_frequency_index = word_frequency_index.open_index()
+    return _word_frequency_index
+
+def js_round(values, decimals):
+    """Math.round(x * 10**decimals) / 10**decimals: halves round towards +infinity."""
+    scaled = values * 10 ** decimals
+    rounded = np.floor(scaled)
+    return (rounded + (scaled - rounded >= 0.5)) / 10 ** decimals
+
+def to_fixed(values, decimals):
+    """The numbers Number.prototype.toFixed(decimals) would print: exact halves round up, away from zero."""
+    values = pd.Series(values, dtype=float)
+    uniques = values.dropna().unique()
+    quantum = Decimal(1).scaleb(-decimals)
+    fixed = {value: float(Decimal(value).quantize(quantum, rounding=ROUND_HALF_UP)) for value in uniques}
+    return values.map(fixed).to_numpy()
+
+def _token_table(texts):
+    """Whitespace tokens of every text as (row of each token, token codes, unique tokens, tokens per text)."""
+    tokens = texts.str.split()
+    lengths = tokens.str.len().to_numpy()
+    codes, uniques = pd.factorize(np.fromiter(itertools.chain.from_iterable(tokens), dtype=object,
+                                              count=int(lengths.sum())))
+    return np.repeat(np.arange(len(texts)), lengths), codes, uniques, lengths
+
+def _score_shard(texts, unknown_word_frequency=UNKNOWN_WORD_FREQUENCY):
+    """Scores of one shard of texts (a Series of str)."""
+    n = len(texts)
+    blank = texts.str.strip().str.len().to_numpy() == 0
+
+    # Flesch-Kincaid: 0.39 * words per sentence + 11.8 * syllables per word - 15.59
+    fk_text = texts.str.replace(FK_STRIP, ' ', regex=True)
+    sentences = fk_text.str.count(SENTENCE).to_numpy()
+    rows, codes, uniques, words = _token_table(fk_text)
+    syllables = np.fromiter((syllable_count(word) for word in uniques), dtype=float, count=len(uniques))
+    syllable_totals = np.bincount(rows, weights=syllables[codes], minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fk = js_round(0.39 * (words / sentences) + 11.8 * (syllable_totals / words) - 15.59, 2)
+    fk = np.where(blank | (sentences == 0), 0.0, fk)
+
+    # Coleman-Liau: 0.0588 * letters per 100 words - 0.296 * sentences per 100 words - 15.8
+    letters = texts.str.len().to_numpy() - texts.str.translate(NON_LETTERS).str.len().to_numpy()
+    cl_words = texts.str.split().str.len().to_numpy()
+    cl_sentences = texts.str.count(SENTENCE).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cl = js_round(0.0588 * ((letters / cl_words) * 100) - 0.296 * ((cl_sentences / cl_words) * 100) - 15.8, 2)
+    cl = np.where(blank | (cl_words == 0), 0.0, cl)
+
+    # Word frequency: mean zipf value of the lowercase words, unknown_word_frequency for unknown words.
+    # bincount adds each text's values in order, so the sums are the same as the TS loop's.
+    rows, codes, uniques, freq_words = _token_table(texts.str.lower().str.replace(WORD_FREQ_STRIP, ' ', regex=True))
+    zipf = load_word_frequencies().lookup(uniques, default=unknown_word_frequency)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        word_frequency = np.bincount(rows, weights=zipf[codes], minlength=n) / freq_words
+    word_frequency = np.where(blank | (freq_words == 0), 0.0, word_frequency)
+
+    return pd.DataFrame({'WordCount': cl_words, 'FleschKincaid': fk, 'ColemanLiau': cl,
+                         'WordFrequencyScore': word_frequency}, index=texts.index)
+
+def score_texts(texts, workers=1, shard_size=SHARD_SIZE, unknown_word_frequency=UNKNOWN_WORD_FREQUENCY):
+    """
+    Readability of every text in an iterable or Series: WordCount (whitespace-separated words), FleschKincaid,
+    ColemanLiau and WordFrequencyScore, unrounded beyond what the TS functions return.
+    Texts are scored in shards of shard_size, spread over worker processes when workers > 1.
+    """
+    texts = pd.Series(texts, dtype=object).fillna('').astype(str)
+    score_shard = functools.partial(_score_shard, unknown_word_frequency=unknown_word_frequency)
+    shards = [texts.iloc[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    if not shards:
+        return score_shard(texts)
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            results = list(executor.map(score_shard, shards))
+    else:
+        results = [score_shard(shard) for shard in shards]
+    return pd.concat(results)
+
+def explanation_texts(df, text_column=None):
+    """The text each row was scored on: text_column, or the AIExplanation fields joined as in evalReadability.ts."""
+    if text_column is not None:
+        return df[text_column].fillna('').astype(str)
+    missing = [field for field in EXPLANATION_FIELDS if field not in df.columns]
+    if missing:
+        raise KeyError(f"no explanation text: missing columns {', '.join(missing)}")
+    fields = [df[field].fillna('').astype(str) for field in EXPLANATION_FIELDS]
+    return fields[0].str.cat(fields[1:], sep=' ')
+
+def explanations_path(raw_path):
+    """The explanation texts run_experiments.py keeps next to a raw CSV, as JSON Lines."""
+    return os.path.splitext(raw_path)[0] + '_explanations.jsonl'
+
+def join_explanation_texts(df, raw_path):
+    """
+    df plus the explanation fields of each row, from the explanations file run_experiments.py writes next to
+    raw_path, matched on (TargetLength, EventKey, Repetition). A cell run again after a crash can have several
+    records, and the last one is the explanation of its committed row. Returns None when a row has no record.
+    """
+    path = explanations_path(raw_path)
+    if 'Repetition' not in df.columns or not os.path.exists(path):
+        return None
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A record cut short by a crash; its row was never committed
+                continue
+    keys = ['TargetLength', 'EventKey', 'Repetition']
+    texts = pd.DataFrame(records, columns=['TargetLength', 'EventKey', 'repetition'] + EXPLANATION_FIELDS)
+    texts = texts.rename(columns={'repetition': 'Repetition'}).astype({'TargetLength': 'int64', 'EventKey': str,
+                                                                        'Repetition': 'int64'})
+    texts = texts.drop_duplicates(keys, keep='last').set_index(keys)[EXPLANATION_FIELDS]
+    rows = pd.MultiIndex.from_arrays([df['TargetLength'].astype('int64'), df['EventKey'].astype(str),
+                                      df['Repetition'].astype('int64')], names=keys)
+    joined = texts.reindex(rows)
+    if joined.isna().any(axis=None):
+        return None
+    return df.assign(**{field: joined[field].to_numpy() for field in EXPLANATION_FIELDS})
+
+def has_explanation_texts(df, text_column=None):
+    """Whether a raw frame carries the explanation texts needed to rescore it."""
+    columns = [text_column] if text_column is not None else EXPLANATION_FIELDS
+    return all(col in df.columns for col in columns)
+
+def rescore_readability(df, text_column=None, workers=1):
+    """
+    Return df with ActualWordCount (words per explanation field, as in evalAIExplanation.ts) and the readability
+    metrics recomputed from the explanation texts, at the precision the experiment loop writes them with.
+    ColemanLiau is only replaced in frames that have it (the older acc_readability schema).
+    """
+    scores = score_texts(explanation_texts(df, text_column), workers)
+    rescored = {
+        'ActualWordCount': to_fixed(scores['WordCount'].to_numpy() / 4, RAW_CSV_DECIMALS['ActualWordCount']),
+        'FleschKincaid': to_fixed(scores['FleschKincaid'], RAW_CSV_DECIMALS['FleschKincaid']),
+        'WordFrequencyScore': to_fixed(scores['WordFrequencyScore'], RAW_CSV_DECIMALS['WordFrequencyScore']),
+    }
+    if 'ColemanLiau' in df.columns:
+        rescored['ColemanLiau'] = to_fixed(scores['ColemanLiau'], RAW_CSV_DECIMALS['ColemanLiau'])
+    return df.assign(**rescored)
+
+def sample_text_hypotheses(path=os.path.join(SAMPLE_TEXT_DIR, 'sampleTextTesting.ts')):
+    """The hypothesis texts of sampleTextTesting.ts, in order."""
+    with open(path) as f:
+        source = f.read()
+    return [json.loads(f'"{text}"') for text in re.findall(r'hypothesis:\s*"((?:[^"\\]|\\.)*)"', source)]
+
+def validate_against_sample_texts():
+    """
+    Compare the scores of the sample hypotheses with the ones the TS functions stored in sampleTextTest.csv,
+    scoring unknown words as word-freq.ts did when that file was generated.
+    Returns the number of mismatching values.
+    """
+    expected = pd.read_csv(os.path.join(SAMPLE_TEXT_DIR, 'sampleTextTest.csv'))
+    hypotheses = sample_text_hypotheses()
+    scores = score_texts(hypotheses, unknown_word_frequency=SAMPLE_TEXT_UNKNOWN_WORD_FREQUENCY)
+
+    mismatches = 0
+    print(f" {'#':<4}{'Words':>7}{'FK (TS)':>10}{'FK':>8}{'WordFreq (TS)':>20}{'WordFreq':>20}")
+    for i, (hypothesis, row) in enumerate(zip(hypotheses, expected.itertuples())):
+        fk = scores['FleschKincaid'].iloc[i]
+        word_frequency = scores['WordFrequencyScore'].iloc[i]
+        words = len(hypothesis.split(' '))
+        ok = words == row.WordCount and fk == row.FleschKincaid and abs(word_frequency - row.WordFrequencyScore) < 1e-12
+        mismatches += not ok
+        print(f" {i:<4}{words:>7}{row.FleschKincaid:>10.2f}{fk:>8.2f}{row.WordFrequencyScore:>20.15f}"
+              f"{word_frequency:>20.15f}{'' if ok else '  MISMATCH'}")
+    print(f"\n {len(hypotheses) - mismatches}/{len(hypotheses)} sample texts match the TypeScript scores")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Score explanation texts for readability in bulk, as the readability/*.ts functions do.'
+    )
+    parser.add_argument('path', nargs='?',
+                        help=f'CSV of explanation texts ({", ".join(EXPLANATION_FIELDS)} columns, or --text-column)')
+    parser.add_argument('--text-column', default=None, help='score this column instead of the explanation fields')
+    parser.add_argument('--output', default=None, help='where to write the scored CSV (default: <path>_scored.csv)')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes to spread shards over (default: 1)')
+    parser.add_argument('--validate', action='store_true',
+                        help='check the scorer against the TypeScript scores stored in sample-text-testing')
+    args = parser.parse_args()
+
+    if args.validate:
+        sys.exit(1 if validate_against_sample_texts() else 0)
+    if args.path is None:
+        parser.error('a CSV path is required unless --validate is given')
+
+    df = pd.read_csv(args.path, dtype={col: str for col in EXPLANATION_FIELDS + [args.text_column]}, keep_default_na=False)
+    scores = score_texts(explanation_texts(df, args.text_column), args.workers)
+    output = args.output or f"{os.path.splitext(args.path)[0]}_scored.csv"
+    pd.concat([df, scores], axis=1).to_csv(output, index=False)
+    print(f" Scored {len(df)} texts: {output}")
+
+if __name__ == "__main__":
+    main()
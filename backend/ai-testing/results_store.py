@@ -0,0 +1,214 @@
+"""
+Pooled Results Store
+Ingests raw experiment files of every trial, in either raw schema, into one local SQLite database (a single file,
+no server) with the trial id, schema version and source file of each row, indexed on (EventKey, TargetLength).
+The by_length, overall, by_event, length_analysis and correlation reports over the whole history are then pushed
+down to the database: one GROUP BY query reduces the rows to sufficient statistics per (TargetLength, EventKey)
+cell, so no more than a chunk of rows is ever held in memory, however many trials the store holds.
+
+Usage: python analyze_data.py --store results.sqlite test-results [--trial trial1 --trial trial2]
+"""
+
+import sqlite3
+import os
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+
+import analyze_data
+from meta_analysis import trial_schema
+
+# Bump when the tables change; older stores are rebuilt from their raw files
+STORE_VERSION = 1
+RESULT_COLUMNS = analyze_data.CATEGORICAL_COLUMNS + analyze_data.NUMERIC_COLUMNS
+KEY_COLS = ['TargetLength', 'EventKey']
+
+# Length adherence as add_length_metrics computes it, for the rows of the query
+LENGTH_METRIC_SQL = {
+    'LengthRatio': 'ActualWordCount / TargetLength',
+    'LengthDifference': 'ActualWordCount - TargetLength',
+    'LengthAccuracy': 'ABS(ActualWordCount - TargetLength) / TargetLength',
+}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS store_info (
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source_file TEXT PRIMARY KEY,
+    trial_id TEXT NOT NULL,
+    schema_version TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    committed_size INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    trial_id TEXT NOT NULL,
+    schema_version TEXT NOT NULL,
+    source_file TEXT NOT NULL,
+    EventKey TEXT,
+    InstructionType TEXT,
+    TargetLength INTEGER,
+    {', '.join(f'{col} REAL' for col in analyze_data.NUMERIC_COLUMNS if col != 'TargetLength')}
+);
+CREATE INDEX IF NOT EXISTS results_event_length ON results (EventKey, TargetLength);
+CREATE INDEX IF NOT EXISTS results_source ON results (source_file);
+"""
+
+def trial_id(path):
+    """Trial a raw file belongs to: the name of the directory it sits in (e.g. 'trial10')."""
+    return os.path.basename(os.path.dirname(os.path.abspath(path))) or 'unknown'
+
+def open_store(db_path):
+    """Open (creating if needed) the store at db_path; a store of another STORE_VERSION is emptied first."""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    row = None
+    try:
+        row = conn.execute('SELECT version FROM store_info').fetchone()
+    except sqlite3.OperationalError:
+        pass
+    if row is not None and row[0] != STORE_VERSION:
+        print(f" {db_path} was written by store version {row[0]}, rebuilding it")
+        conn.executescript('DROP TABLE IF EXISTS results; DROP TABLE IF EXISTS sources; DROP TABLE store_info;')
+        row = None
+    conn.executescript(SCHEMA)
+    if row is None:
+        conn.execute('INSERT INTO store_info (version) VALUES (?)', (STORE_VERSION,))
+        conn.commit()
+    return conn
+
+def ingest_file(conn, path, chunksize=100_000):
+    """
+    Load the committed rows of one raw file into the store, replacing what an earlier ingest of it left.
+    Files whose committed content has not changed are skipped. Returns the number of rows written.
+    """
+    source = os.path.abspath(path)
+    end = analyze_data.committed_size(path)
+    content_hash = analyze_data.file_content_hash(path, end=end)
+    known = conn.execute('SELECT content_hash FROM sources WHERE source_file = ?', (source,)).fetchone()
+    if known is not None and known[0] == content_hash:
+        return 0
+
+    labels = (trial_id(path), trial_schema(path), source)
+    insert = (f'INSERT INTO results (trial_id, schema_version, source_file, {", ".join(RESULT_COLUMNS)}) '
+              f'VALUES ({", ".join("?" * (3 + len(RESULT_COLUMNS)))})')
+    rows = 0
+    # One transaction per file: readers never see a file half ingested
+    with conn:
+        conn.execute('DELETE FROM results WHERE source_file = ?', (source,))
+        for chunk in analyze_data.iter_clean_chunks(path, chunksize):
+            values = {col: chunk[col].astype(object).where(chunk[col].notna(), None) if col in chunk.columns
+                      else [None] * len(chunk) for col in RESULT_COLUMNS}
+            # TargetLength is stored as an integer so cells line up with the raw frames' keys
+            values['TargetLength'] = [None if value is None else int(value) for value in values['TargetLength']]
+            conn.executemany(insert, (labels + row for row in zip(*values.values())))
+            rows += len(chunk)
+        conn.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?)',
+                     (source, labels[0], labels[1], content_hash, end, rows,
+                      datetime.now(timezone.utc).isoformat()))
+    return rows
+
+def ingest(conn, raw_data_paths, chunksize=100_000):
+    """Bring the store up to date with raw_data_paths; returns the number of files (re)ingested."""
+    changed = 0
+    for path in raw_data_paths:
+        rows = ingest_file(conn, path, chunksize)
+        if rows:
+            changed += 1
+            print(f" Ingested {rows} rows from {path}")
+    return changed
+
+def _where(trials=None, schema_version=None):
+    """SQL filter and parameters selecting the rows of the given trials and schema version."""
+    clauses, params = [], []
+    if trials:
+        clauses.append(f'trial_id IN ({", ".join("?" * len(trials))})')
+        params.extend(trials)
+    if schema_version:
+        clauses.append('schema_version = ?')
+        params.append(schema_version)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+def cell_moments(conn, trials=None, schema_version=None, metrics=None, pairs=None):
+    """
+    Per (TargetLength, EventKey) cell statistics of the selected rows as a CellMoments, computed by the database
+    in one GROUP BY over the (EventKey, TargetLength) index: the same counts, sums, sums of squares and pair
+    cross-products CellMoments.update keeps, so the reports come out as they would from the raw frames.
+    """
+    metrics = metrics or analyze_data.AGGREGATE_METRICS + analyze_data.LENGTH_METRICS
+    pairs = pairs or analyze_data.CORRELATION_PAIRS
+    where, params = _where(trials, schema_version)
+
+    derived = ', '.join(f'{sql} AS {name}' for name, sql in LENGTH_METRIC_SQL.items())
+    stats = ['COUNT(*) AS Rows']
+    for metric in metrics:
+        stats += [f'COUNT({metric}) AS Count_{metric}', f'TOTAL({metric}) AS Sum_{metric}',
+                  f'TOTAL({metric} * {metric}) AS SumSq_{metric}']
+    for x_metric, y_metric in pairs:
+        pair = f'{x_metric}__{y_metric}'
+        both = f'{x_metric} IS NOT NULL AND {y_metric} IS NOT NULL'
+        stats += [f'SUM({both}) AS PairCount_{pair}',
+                  f'TOTAL(CASE WHEN {both} THEN {x_metric} END) AS PairSumX_{pair}',
+                  f'TOTAL(CASE WHEN {both} THEN {y_metric} END) AS PairSumY_{pair}',
+                  f'TOTAL(CASE WHEN {both} THEN {x_metric} * {x_metric} END) AS PairSumXX_{pair}',
+                  f'TOTAL(CASE WHEN {both} THEN {y_metric} * {y_metric} END) AS PairSumYY_{pair}',
+                  f'TOTAL({x_metric} * {y_metric}) AS PairSumXY_{pair}']
+    query = (f'SELECT {", ".join(KEY_COLS)}, {", ".join(stats)} '
+             f'FROM (SELECT *, {derived} FROM results{where}) GROUP BY {", ".join(KEY_COLS)}')
+
+    cells = pd.read_sql_query(query, conn, params=params)
+    moments = analyze_data.CellMoments(KEY_COLS, metrics, pairs)
+    if not cells.empty:
+        counts = [col for col in cells.columns if col.startswith(('Count_', 'PairCount_'))]
+        cells = cells.fillna({col: 0 for col in counts}).astype({**{col: np.int64 for col in counts},
+                                                                  **{col: object for col in KEY_COLS}})
+        # copy() consolidates the columns read one at a time into a few blocks
+        moments.merge(cells.set_index(KEY_COLS).copy())
+    return moments
+
+def store_metrics(conn, trials=None, schema_version=None):
+    """Aggregate metrics with at least one value among the selected rows (those the raw files actually had)."""
+    where, params = _where(trials, schema_version)
+    counts = conn.execute(f'SELECT {", ".join(f"COUNT({metric})" for metric in analyze_data.AGGREGATE_METRICS)} '
+                          f'FROM results{where}', params).fetchone()
+    return [metric for metric, count in zip(analyze_data.AGGREGATE_METRICS, counts) if count]
+
+def store_reports(conn, trials=None, schema_version=None, skip_reports=()):
+    """Create the aggregate and correlation reports (minus any in skip_reports) over the selected rows."""
+    moments = cell_moments(conn, trials, schema_version)
+    if moments.cells is None:
+        return 0, {}
+    rows = int(moments.cells['Rows'].sum())
+    return rows, analyze_data.moment_reports(moments, store_metrics(conn, trials, schema_version), skip_reports)
+
+def run_store_reports(raw_data_paths, db_path, trials=None, schema_version=None, skip_reports=(), output_dir=None):
+    """Ingest raw_data_paths into the store at db_path, then write the reports over the selected trials."""
+    conn = open_store(db_path)
+    try:
+        start = time.perf_counter()
+        changed = ingest(conn, raw_data_paths)
+        print(f" {changed} of {len(raw_data_paths)} raw data files ingested into {db_path} "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        sources = conn.execute('SELECT COUNT(*), COUNT(DISTINCT trial_id), TOTAL(rows) FROM sources').fetchone()
+        print(f" Store holds {int(sources[2])} rows from {sources[0]} files of {sources[1]} trials")
+
+        start = time.perf_counter()
+        rows, reports = store_reports(conn, trials, schema_version, skip_reports)
+        print(f" Reported on {rows} rows in {time.perf_counter() - start:.2f}s")
+    finally:
+        conn.close()
+
+    if not reports:
+        print(" No rows matched")
+        return reports
+    timestamp = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z').replace(
+        ':', '-').replace('.', '-')
+    output_dir = output_dir or os.path.dirname(os.path.abspath(db_path))
+    base_filename = f"{os.path.splitext(os.path.basename(db_path))[0]}_{timestamp}"
+    saved_files = analyze_data.save_reports(reports, output_dir, base_filename)
+    print(f"\n Saved {len(saved_files)} store reports to {output_dir}")
+    return reports
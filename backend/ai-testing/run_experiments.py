@@ -0,0 +1,664 @@
+"""
+Experiment Runner
+Runs the length experiment of evalAIExplanation.ts (every target length against every test event) as a concurrent
+grid: cells are sent to the Gemini REST API by a bounded pool of asyncio workers behind a token bucket rate limiter,
+and failed calls (the "Gemini error ... skipping" cases of the TS loop) are retried with exponential backoff.
+Completed explanations are scored in micro-batches (readability_scores.py, nli_scores.py) and appended to a raw CSV
+in the readability_length_exp_raw layout analyze_data.py reads, plus a Repetition column.
+
+Any endpoint that speaks the generateContent API works, such as the local stub in benchmarks/stub_llm_server.py.
+
+Usage: python run_experiments.py [--concurrency N] [--rate N] [--repetitions N] [--endpoint URL]
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import re
+import sys
+import ast
+import json
+import time
+import random
+import asyncio
+import argparse
+import http.client
+import urllib.error
+import urllib.request
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import nli_scores
+import readability_scores
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: the ledger works the same, without the guard against two runs writing one file
+    fcntl = None
+
+AI_TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(AI_TESTING_DIR)
+TEST_EVENTS_PATH = os.path.join(AI_TESTING_DIR, 'test-events.ts')
+TRANSPARENCY_TYPES_PATH = os.path.join(BACKEND_DIR, 'src', 'constants', 'types', 'Transparency.ts')
+RESULTS_DIR = os.path.join(AI_TESTING_DIR, 'test-results')
+
+# The experiment grid and model settings of evalAIExplanation.ts and GeminiLLMService.ts
+INSTRUCTION = ("Provide your analysis in clear, concise, user-friendly language that a non-technical person can "
+               "understand. Replace complex legal and technical jargon with simple explanations that the average "
+               "middle schooler can grasp.")
+PROMPT_LENGTHS = [15, 20, 25, 30, 40, 50]
+DEFAULT_ENDPOINT = 'https://generativelanguage.googleapis.com'
+DEFAULT_MODEL = 'gemini-2.5-flash'
+GENERATION_CONFIG = {'temperature': 0.3, 'topK': 40, 'topP': 0.95, 'maxOutputTokens': 16384}
+
+RAW_COLUMNS = ['EventKey', 'TargetLength', 'ActualWordCount', 'NLI_DataCollection', 'NLI_PrivacyExplanation',
+               'NLI_AverageScore', 'FleschKincaid', 'WordFrequencyScore']
+# The runner's raw CSV also records each row's repetition, so a resumed run knows exactly which cells are done
+LEDGER_COLUMNS = RAW_COLUMNS + ['Repetition']
+NLI_DECIMALS = 3
+
+# Statuses worth retrying: rate limited, or the service failing or overloaded
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Tokens of the TypeScript object literals in test-events.ts
+TS_TOKEN = re.compile(r"""\s+|//[^\n]*|/\*.*?\*/|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?"""
+                      r"""|[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*|\S""", re.S)
+
+def load_enums(path=TRANSPARENCY_TYPES_PATH):
+    """The string enums of Transparency.ts, as {enum name: {member: value}}."""
+    with open(path) as f:
+        source = f.read()
+    return {name: dict(re.findall(r"(\w+)\s*=\s*'([^']*)'", body))
+            for name, body in re.findall(r'export enum (\w+)\s*\{(.*?)\}', source, re.S)}
+
+def _ts_tokens(source):
+    return [token for token in TS_TOKEN.findall(source) if not token.isspace() and not token.startswith(('//', '/*'))]
+
+def _parse_ts_value(tokens, position, enums):
+    """Parse the object literal value starting at tokens[position]; returns it and the position after it."""
+    token = tokens[position]
+    position += 1
+    if token in ('{', '['):
+        closing = '}' if token == '{' else ']'
+        items = {} if token == '{' else []
+        while tokens[position] != closing:
+            if closing == ']':
+                value, position = _parse_ts_value(tokens, position, enums)
+                items.append(value)
+            else:
+                key = ast.literal_eval(tokens[position]) if tokens[position][0] in '\'"' else tokens[position]
+                if tokens[position + 1] != ':':
+                    raise ValueError(f"Expected ':' after key {key}")
+                items[key], position = _parse_ts_value(tokens, position + 2, enums)
+            if tokens[position] == ',':
+                position += 1
+        return items, position + 1
+    if token[0] in '\'"':
+        return ast.literal_eval(token), position
+    if token[0].isdigit() or token[0] == '-':
+        return float(token) if '.' in token else int(token), position
+    if token in ('true', 'false', 'null'):
+        return {'true': True, 'false': False, 'null': None}[token], position
+    enum, _, member = token.partition('.')
+    if member and enum in enums and member in enums[enum]:
+        return enums[enum][member], position
+    raise ValueError(f"Unsupported value in test events: {token}")
+
+def load_test_events(path=TEST_EVENTS_PATH, enums=None):
+    """
+    The testEvents Map of test-events.ts, as {event key: (transparency event, user consent preferences)} in
+    definition order. The TS file stays the single source of the test cases; enum members become their values.
+    """
+    with open(path) as f:
+        source = f.read()
+    match = re.search(r'testEvents\b[^=]*=\s*new Map\(', source)
+    if match is None:
+        raise ValueError(f"No testEvents Map in {path}")
+    entries, _ = _parse_ts_value(_ts_tokens(source[match.end():]), 0, enums if enums is not None else load_enums())
+    return {key: (event, preferences) for key, (event, preferences) in entries}
+
+def _js_number(value):
+    """How a template literal writes a number: integral values without a decimal point."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def create_privacy_analysis_prompt(transparency_event, privacy_policy, user_consent_preferences,
+                                   regulation_frameworks, pipeda_regulations, specific_instructions=INSTRUCTION,
+                                   length=30):
+    """createPrivacyAnalysisPrompt of src/llm/prompts.ts, character for character (\\x20: its trailing spaces)."""
+    pipeda = f"**SPECIFIC PIPEDA REGULATIONS**:\n{pipeda_regulations}\n" if pipeda_regulations else ''
+    return f"""You are a privacy compliance expert analyzing a sleep tracking application's data handling practices.\x20
+
+The following transparency event contains information about the purpose of data collection, data storage location, encryption methods and transmission methods.\x20
+
+**TRANSPARENCY EVENT**:
+{json.dumps(transparency_event, indent=2, ensure_ascii=False)}
+
+The following is the privacy policy of the sleep tracker application:
+
+**PRIVACY POLICY**:
+{privacy_policy}
+
+The following are the user's consent preferences - what the user has agreed to regarding data collection and processing:
+**USER CONSENT PREFERENCES**:
+{json.dumps(user_consent_preferences, indent=2, ensure_ascii=False)}
+
+**REGULATORY FRAMEWORKS TO CONSIDER**:
+{', '.join(regulation_frameworks)}
+
+{pipeda}
+
+**ANALYSIS INSTRUCTIONS**:
+1. Evaluate if the data collection aligns with the stated purpose
+2. Verify if the transparency event information complies with the privacy policy and user consent preferences.\x20
+3. Assess compliance with the specified regulatory frameworks and provided regulations only. DO NOT use any other regulations.
+4. Identify potential privacy risks and their severity according to the below critera:\x20
+
+**RISK ASSESSMENT CRITERIA**:
+- **HIGH RISK**: Clear violation of regulations, privacy policy, or user consent; unauthorized data collection; insecure storage/transmission
+- **MEDIUM RISK**: Technically compliant but suboptimal practices; vague purposes; excessive data collection; third-party sharing concerns
+- **LOW RISK**: Fully compliant with minimal privacy concerns; clear purpose; proper consent; secure handling
+
+**REQUIRED OUTPUT FORMAT** (respond with valid JSON only, each aiExplanation field ("why", "storage", "access" and "privacyExplanation") must be strictly between {_js_number(0.8 * length)}-{_js_number(length)} words):
+{{
+  "privacyRisk": "HIGH" | "MEDIUM" | "LOW",
+  "regulatoryCompliance": {{
+    "framework": "PIPEDA",
+    "compliant": true | false,
+    "issues": "description of compliance issues",
+    "relevantSections": ["section reference 1", "section reference 2"]
+  }},
+  "aiExplanation": {{
+    "why": "brief explanation of why this data is collected and what benefits it provides to the user",
+    "storage": "where the data is stored and how it is protected",
+    "access": "who has access to the data",
+    "privacyExplanation": "explanation covering the privacy risks associated with this data collection, summarize what PIPEDA regulations say about these risks and whether the collection complies with these requirements",
+    "privacyPolicyLink": ["section_id_1", "section_id_2"], // only provide 2-3 most relevant sections\x20
+    "regulationLink": ["principle_id_1", "principle_id_2"], // only provide 2-3 most relevant principles
+  }}
+}}
+{specific_instructions}"""
+
+def experiment_prompts(events, lengths=PROMPT_LENGTHS, instruction=INSTRUCTION):
+    """The prompt of every (target length, event key) pair, built from the policy and PIPEDA data as the TS does."""
+    with open(nli_scores.PRIVACY_POLICY_PATH) as f:
+        privacy_policy = json.dumps(json.load(f)['privacyPolicy'], separators=(',', ':'), ensure_ascii=False)
+    with open(nli_scores.PRIVACY_REGULATIONS_PATH) as f:
+        pipeda = json.dumps(json.load(f)['pipeda'], separators=(',', ':'), ensure_ascii=False)
+    return {(length, key): create_privacy_analysis_prompt(event, privacy_policy, preferences, ['PIPEDA'], pipeda,
+                                                          instruction, length)
+            for length in lengths for key, (event, preferences) in events.items()}
+
+def experiment_grid(event_keys, lengths=PROMPT_LENGTHS, repetitions=1):
+    """Cells (target length, event key, repetition), in the order the TS loop visits them, repetition by repetition."""
+    return [(length, key, repetition) for repetition in range(repetitions)
+            for length in lengths for key in event_keys]
+
+class LLMError(Exception):
+    """A failed generateContent call. retryable says whether trying again may succeed."""
+
+    def __init__(self, message, retryable=True, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, given either as seconds or as an HTTP-date (a date already
+    past waits 0); None when the header is missing or unreadable.
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    return seconds if 0 <= seconds < float('inf') else None
+
+def parse_analysis_response(text):
+    """
+    The aiExplanation of a model response, checked and cleaned as parseAnalysisResponse in GeminiLLMService.ts
+    does: code fences are stripped and section links given as dotted paths are cut to their last part.
+    """
+    clean = re.sub(r'```\n?', '', re.sub(r'```json\n?', '', text)).strip()
+    try:
+        parsed = json.loads(clean)
+    except json.JSONDecodeError as e:
+        raise LLMError(f"Invalid JSON response: {e}")
+    if not isinstance(parsed, dict) or not all(parsed.get(key) for key in
+                                               ['privacyRisk', 'regulatoryCompliance', 'aiExplanation']):
+        raise LLMError('Invalid response structure')
+    explanation = parsed['aiExplanation']
+    for field in ['privacyPolicyLink', 'regulationLink']:
+        links = explanation.get(field)
+        if not isinstance(links, list):
+            raise LLMError(f"Invalid response structure: {field} is not a list")
+        explanation[field] = [link.split('.')[-1] if '.' in link else link for link in map(str, links)]
+    return explanation
+
+class GeminiClient:
+    """
+    generateContent over HTTP with the standard library. Calls block, so they run on a thread pool sized to the
+    runner's concurrency; one call per thread keeps the asyncio loop free for scheduling.
+    """
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, model=DEFAULT_MODEL, api_key=None, timeout=120.0, threads=8):
+        self.url = f"{endpoint.rstrip('/')}/v1beta/models/{model}:generateContent"
+        self.api_key = api_key
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='gemini')
+
+    def _post(self, prompt):
+        body = json.dumps({'contents': [{'role': 'user', 'parts': [{'text': prompt}]}],
+                           'generationConfig': GENERATION_CONFIG}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['x-goog-api-key'] = self.api_key
+        request = urllib.request.Request(self.url, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise LLMError(f"HTTP {e.code}: {e.reason}", retryable=e.code in RETRYABLE_STATUSES,
+                           retry_after=parse_retry_after(e.headers.get('Retry-After') if e.headers else None))
+        except (http.client.HTTPException, OSError) as e:
+            # URLError, timeouts, resets and responses cut short (IncompleteRead) are all worth retrying
+            raise LLMError(f"Request failed: {getattr(e, 'reason', None) or repr(e)}")
+        except json.JSONDecodeError as e:
+            raise LLMError(f"Unreadable response body: {e}")
+
+        candidates = payload.get('candidates') or []
+        if not candidates:
+            # A prompt blocked by the safety filters comes back without candidates and fails the same way again
+            reason = payload.get('promptFeedback', {}).get('blockReason', 'no candidates')
+            raise LLMError(f"Empty response: {reason}", retryable=False)
+        parts = candidates[0].get('content', {}).get('parts', [])
+        return ''.join(part.get('text', '') for part in parts)
+
+    async def generate(self, prompt):
+        """The response text of one prompt; raises LLMError."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._post, prompt)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+class TokenBucket:
+    """
+    Rate limiter: acquire() waits for one of rate tokens refilled per second, and up to capacity unused tokens are
+    banked, so short bursts are allowed while the long-run rate stays at rate. rate=None disables the limit.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def backoff_delay(attempt, base, cap, rng):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return rng.uniform(0, min(cap, base * 2 ** attempt))
+
+def _timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z').replace(
+        ':', '-').replace('.', '-')
+
+def _format_fixed(values, decimals, missing=None):
+    fixed = readability_scores.to_fixed(values, decimals)
+    return [missing if missing is not None and np.isnan(value) else f"{value:.{decimals}f}" for value in fixed]
+
+def score_results(results, scorer, cache=None, premises=None, batch_size=nli_scores.DEFAULT_BATCH_SIZE):
+    """
+    Raw CSV rows (lists of strings) for completed cells, given as dicts with EventKey, TargetLength and the
+    aiExplanation fields: NLI scores, words per explanation field and readability, formatted like resultToCSVRow.
+    """
+    frame = pd.DataFrame(results)
+    frame, _ = nli_scores.score_explanations(frame, scorer, cache, batch_size, premises)
+    readability = readability_scores.score_texts(readability_scores.explanation_texts(frame))
+    columns = [
+        frame['EventKey'].astype(str).tolist(),
+        frame['TargetLength'].astype(str).tolist(),
+        _format_fixed(readability['WordCount'].to_numpy() / 4, readability_scores.RAW_CSV_DECIMALS['ActualWordCount']),
+        *[_format_fixed(frame[col], NLI_DECIMALS, missing='N/A') for col in nli_scores.NLI_COLUMNS],
+        _format_fixed(readability['FleschKincaid'], readability_scores.RAW_CSV_DECIMALS['FleschKincaid']),
+        _format_fixed(readability['WordFrequencyScore'],
+                      readability_scores.RAW_CSV_DECIMALS['WordFrequencyScore']),
+    ]
+    return [list(row) for row in zip(*columns)]
+
+class ExperimentRunner:
+    """
+    Runs grid cells with at most concurrency calls in flight, each call first taking a token from the rate limiter.
+    A failed call is retried up to retries times after a backoff (or the server's Retry-After); a cell that still
+    fails is skipped, as the TS loop skips Gemini errors. Completed cells are handed to on_result.
+    """
+
+    def __init__(self, client, prompts, concurrency=8, rate=None, burst=None, retries=5, backoff=1.0,
+                 max_backoff=60.0, seed=0):
+        self.client = client
+        self.prompts = prompts
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rng = random.Random(seed)
+        self.stats = {'cells': 0, 'resumed': 0, 'completed': 0, 'failed': 0, 'calls': 0, 'retries': 0, 'errors': {}}
+
+    async def run_cell(self, cell):
+        """The aiExplanation of one cell, or None once its retries are spent."""
+        length, event_key, repetition = cell
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            self.stats['calls'] += 1
+            try:
+                return parse_analysis_response(await self.client.generate(self.prompts[length, event_key]))
+            except LLMError as e:
+                kind = str(e).split(':')[0]
+                self.stats['errors'][kind] = self.stats['errors'].get(kind, 0) + 1
+                if not e.retryable or attempt == self.retries:
+                    print(f" Gemini error for event: {event_key} (length {length}, repetition {repetition}) - "
+                          f"skipping after {attempt + 1} attempt(s): {e}")
+                    return None
+                self.stats['retries'] += 1
+                delay = backoff_delay(attempt, self.backoff, self.max_backoff, self.rng)
+                await asyncio.sleep(max(delay, e.retry_after or 0))
+
+    async def run(self, cells, on_result):
+        """Run every cell; on_result(cell, explanation) is awaited for each success."""
+        queue = asyncio.Queue()
+        for cell in cells:
+            queue.put_nowait(cell)
+        self.stats['cells'] += len(cells)
+
+        async def worker():
+            while True:
+                try:
+                    cell = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                explanation = await self.run_cell(cell)
+                if explanation is None:
+                    self.stats['failed'] += 1
+                else:
+                    self.stats['completed'] += 1
+                    await on_result(cell, explanation)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(cells)) or 1)))
+        return self.stats
+
+class ExperimentLedger:
+    """
+    The raw CSV as an append-only ledger of grid cells, so an interrupted run can be resumed. Every committed row
+    is one cell, and a batch of rows is committed by a single append followed by fsync, so a crash leaves at most
+    one partial line at the end. Opening the ledger drops that line, and readers (analyze_data.py) ignore it.
+
+    Every row ends with its repetition, so a cell (TargetLength, EventKey, repetition) is done exactly when the
+    file holds a row with those three values.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.completed = set()
+        self.dropped_bytes = 0
+        self._fd = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(self._fd)
+                raise RuntimeError(f"{self.path} is being written by another run")
+
+        with open(self._fd, 'rb', closefd=False) as f:
+            content = f.read()
+        header = (','.join(LEDGER_COLUMNS) + '\n').encode('utf-8')
+        if not content:
+            self._append(header)
+            return self
+        if not content.startswith(header):
+            raise ValueError(f"{self.path} is not a raw file written by run_experiments.py (no Repetition column)")
+
+        end = content.rfind(b'\n') + 1
+        if end < len(content):
+            os.ftruncate(self._fd, end)
+            self.dropped_bytes = len(content) - end
+        for line in content[len(header):end].decode('utf-8').splitlines():
+            fields = line.split(',')
+            self.completed.add((int(fields[1]), fields[0], int(fields[-1])))
+        return self
+
+    def _append(self, data):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+        os.fsync(self._fd)
+
+    def pending(self, cells):
+        """The cells (TargetLength, EventKey, repetition) without a committed row."""
+        return [cell for cell in cells if cell not in self.completed]
+
+    def commit(self, rows):
+        """Append rows (lists of formatted values in LEDGER_COLUMNS order) as one write."""
+        if rows:
+            self._append(''.join(','.join(row) + '\n' for row in rows).encode('utf-8'))
+            for row in rows:
+                self.completed.add((int(row[1]), row[0], int(row[-1])))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class RawResultWriter:
+    """
+    Scores completed cells in micro-batches on one background thread (so a slow NLI model never stalls the
+    requests in flight) and commits each batch to the ledger. A batch's explanations are appended before its rows,
+    so every committed row has its explanation; after a crash the explanations file may hold a few extra records.
+    """
+
+    def __init__(self, path, scorer, cache_path=None, batch_size=16, explanations_path=None):
+        self.ledger = ExperimentLedger(path)
+        self.scorer = scorer
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.explanations_path = explanations_path
+        self.rows = 0
+        self._pending = []
+        self._flushing = None
+        # SQLite connections belong to the thread that made them, so the cache is opened on the scoring thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='scoring')
+        self._cache = None
+        self._premises = nli_scores.PremiseBuilder()
+
+    def _open(self):
+        self.ledger.open()
+        if self.cache_path is not None:
+            self._cache = nli_scores.NLIScoreCache(self.cache_path)
+
+    def _write(self, batch):
+        results = [{'EventKey': key, 'TargetLength': length, **explanation}
+                   for (length, key, _), explanation in batch]
+        rows = score_results(results, self.scorer, self._cache, self._premises)
+        if self.explanations_path is not None:
+            with open(self.explanations_path, 'a') as f:
+                f.write(''.join(json.dumps({**result, 'repetition': repetition}, ensure_ascii=False) + '\n'
+                                for ((_, _, repetition), _), result in zip(batch, results)))
+        self.ledger.commit([row + [str(repetition)] for row, ((_, _, repetition), _) in zip(rows, batch)])
+        self.rows += len(rows)
+
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+
+    async def add(self, cell, explanation):
+        self._pending.append((cell, explanation))
+        if len(self._pending) >= self.batch_size and (self._flushing is None or self._flushing.done()):
+            await self._drain()
+
+    async def _drain(self):
+        if self._flushing is not None:
+            await self._flushing
+        batch, self._pending = self._pending, []
+        if batch:
+            self._flushing = asyncio.ensure_future(
+                asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch))
+
+    async def close(self):
+        await self._drain()
+        if self._flushing is not None:
+            await self._flushing
+        if self._cache is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._cache.close)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.ledger.close)
+        self._executor.shutdown()
+
+async def run_experiment_async(client, events, output_path, lengths=PROMPT_LENGTHS, repetitions=1, concurrency=8,
+                               rate=None, burst=None, retries=5, backoff=1.0, scorer=None, cache_path=None,
+                               batch_size=16, explanations_path=None, seed=0):
+    prompts = experiment_prompts(events, lengths)
+    cells = experiment_grid(list(events), lengths, repetitions)
+    writer = RawResultWriter(output_path, scorer or nli_scores.FakeScorer(), cache_path, batch_size,
+                             explanations_path)
+    runner = ExperimentRunner(client, prompts, concurrency, rate, burst, retries, backoff, seed=seed)
+
+    start = time.perf_counter()
+    await writer.start()
+    try:
+        pending = writer.ledger.pending(cells)
+        if writer.ledger.dropped_bytes:
+            print(f" Dropped a partial row ({writer.ledger.dropped_bytes} bytes) left by an interrupted run")
+        if len(pending) < len(cells):
+            print(f" Resuming {output_path}: {len(cells) - len(pending)} of {len(cells)} cells already done")
+        runner.stats['resumed'] = len(cells) - len(pending)
+        stats = await runner.run(pending, writer.add)
+    finally:
+        await writer.close()
+    stats['rows'] = writer.rows
+    stats['seconds'] = time.perf_counter() - start
+    stats['cells_per_second'] = stats['completed'] / stats['seconds'] if stats['seconds'] else float('inf')
+    return stats
+
+def run_experiment(events=None, output_path=None, endpoint=DEFAULT_ENDPOINT, model=DEFAULT_MODEL, api_key=None,
+                   lengths=PROMPT_LENGTHS, repetitions=1, concurrency=8, rate=None, burst=None, retries=5,
+                   backoff=1.0, timeout=120.0, scorer=None, cache_path=None, batch_size=16, explanations=True,
+                   seed=0, resume=False):
+    """
+    Run the experiment grid and write its raw CSV (by default a new timestamped file in test-results, with the
+    explanations alongside as JSON Lines). With resume, output_path is an existing raw CSV of an interrupted run
+    and only its missing cells are run. Returns the run statistics, including the output path.
+    """
+    events = events if events is not None else load_test_events()
+    output_path = output_path or os.path.join(RESULTS_DIR, f"readability_length_exp_raw_{_timestamp()}.csv")
+    if os.path.exists(output_path) and not resume:
+        raise FileExistsError(f"{output_path} already exists; resume it to run only its missing cells")
+    explanations_path = os.path.splitext(output_path)[0] + '_explanations.jsonl' if explanations else None
+    if explanations_path is not None and os.path.exists(explanations_path) and not resume:
+        os.remove(explanations_path)
+
+    client = GeminiClient(endpoint, model, api_key, timeout, threads=concurrency)
+    try:
+        stats = asyncio.run(run_experiment_async(
+            client, events, output_path, lengths, repetitions, concurrency, rate, burst, retries, backoff, scorer,
+            cache_path, batch_size, explanations_path, seed
+        ))
+    finally:
+        client.close()
+    stats['output_path'] = output_path
+    return stats
+
+def print_stats(stats):
+    resumed = f" ({stats['resumed']} done before)" if stats['resumed'] else ''
+    print(f" {stats['completed']}/{stats['cells']} cells completed{resumed}, {stats['failed']} skipped, "
+          f"{stats['calls']} calls ({stats['retries']} retries) in {stats['seconds']:.1f}s, "
+          f"{stats['cells_per_second']:.2f} cells/sec")
+    if stats['errors']:
+        print(" Errors: " + ', '.join(f"{kind} x{count}" for kind, count in sorted(stats['errors'].items())))
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the explanation length experiment grid against Gemini.')
+    parser.add_argument('--endpoint', default=DEFAULT_ENDPOINT,
+                        help=f'generateContent API base URL (default: {DEFAULT_ENDPOINT})')
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'model to call (default: {DEFAULT_MODEL})')
+    parser.add_argument('--lengths', type=int, nargs='+', default=PROMPT_LENGTHS,
+                        help=f"target lengths in words (default: {' '.join(map(str, PROMPT_LENGTHS))})")
+    parser.add_argument('--events', nargs='+', default=None, help='test event keys to run (default: all)')
+    parser.add_argument('--repetitions', type=int, default=1, help='times to run every cell (default: 1)')
+    parser.add_argument('--concurrency', type=int, default=8, help='requests in flight at once (default: 8)')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='requests started per second at most (default: unlimited)')
+    parser.add_argument('--burst', type=float, default=None,
+                        help='requests allowed at once above the rate (default: the rate, at least 1)')
+    parser.add_argument('--retries', type=int, default=5, help='retries of a failed call (default: 5)')
+    parser.add_argument('--backoff', type=float, default=1.0,
+                        help='base seconds of the exponential backoff between retries (default: 1)')
+    parser.add_argument('--timeout', type=float, default=120.0, help='seconds per request (default: 120)')
+    parser.add_argument('--scorer', choices=list(nli_scores.SCORERS), default='transformers',
+                        help='NLI scorer (default: transformers; fake scores offline runs)')
+    parser.add_argument('--nli-cache', default=nli_scores.DEFAULT_CACHE_PATH,
+                        help=f'NLI score cache (default: {nli_scores.DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-nli-cache', dest='nli_cache', action='store_const', const=None,
+                        help='score without reading or writing the NLI cache')
+    parser.add_argument('--output', default=None,
+                        help='raw CSV to write (default: test-results/readability_length_exp_raw_<timestamp>.csv)')
+    parser.add_argument('--resume', metavar='RAW_CSV', default=None,
+                        help='continue an interrupted run in its raw CSV, running only the cells it is missing')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the backoff jitter (default: 0)')
+    args = parser.parse_args()
+
+    api_key = os.environ.get('GEMINI_API_KEY')
+    if not api_key and args.endpoint == DEFAULT_ENDPOINT:
+        print(" GEMINI_API_KEY environment variable is not set")
+        sys.exit(1)
+
+    events = load_test_events()
+    if args.events:
+        unknown = [key for key in args.events if key not in events]
+        if unknown:
+            print(f" Unknown test events: {', '.join(unknown)}")
+            sys.exit(1)
+        events = {key: events[key] for key in args.events}
+    scorer = nli_scores.SCORERS[args.scorer]()
+
+    if args.resume and not os.path.exists(args.resume):
+        print(f" File not found: {args.resume}")
+        sys.exit(1)
+    output_path = args.resume or args.output
+    if output_path and os.path.exists(output_path) and not args.resume:
+        print(f" {output_path} already exists; pass --resume {output_path} to run only its missing cells")
+        sys.exit(1)
+
+    total = len(args.lengths) * len(events) * args.repetitions
+    print(f" Starting {total} experiments ({args.concurrency} concurrent"
+          f"{f', at most {args.rate:g}/sec' if args.rate else ''})...")
+    stats = run_experiment(events, output_path, args.endpoint, args.model, api_key, args.lengths, args.repetitions,
+                           args.concurrency, args.rate, args.burst, args.retries, args.backoff, args.timeout, scorer,
+                           args.nli_cache, seed=args.seed, resume=bool(args.resume))
+    print_stats(stats)
+    print(f" Raw data saved to: {stats['output_path']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Word Frequency Index
+Compiles backend/word_frequencies.json (the SUBTLEX-US zipf values used by readability/word-freq.ts) into a compact
+binary index that is memory-mapped instead of parsed, so every process shares one copy through the page cache.
+
+Layout, all little-endian: a header, a length table of (first entry, entry count) per key length in bytes, the
+zipf values as float64, then the keys. Keys are grouped by byte length and sorted within each group, so a group is
+a fixed-width array that numpy can binary search for a whole batch of tokens at once.
+
+Usage: python word_frequency_index.py [--json PATH] [--output PATH]
+"""
+
+import numpy as np
+import os
+import sys
+import mmap
+import json
+import struct
+import hashlib
+import tempfile
+import argparse
+
+AI_TESTING_DIR = os.path.dirname(os.path.abspath(__file__))
+WORD_FREQUENCIES_PATH = os.path.join(os.path.dirname(AI_TESTING_DIR), 'word_frequencies.json')
+
+# Bump INDEX_VERSION whenever the layout changes; older index files are then rebuilt
+INDEX_VERSION = 1
+INDEX_DIR = os.path.join(AI_TESTING_DIR, '.word_frequency_index')
+INDEX_PATH = os.path.join(INDEX_DIR, f'word_frequencies.v{INDEX_VERSION}.idx')
+
+MAGIC = b'WFREQIDX'
+# magic, version, max key length, entries, source size, source mtime (ns), source content digest
+HEADER = struct.Struct('<8sIIQQq16s')
+
+def _source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).digest()
+
+def build_index(json_path=WORD_FREQUENCIES_PATH, index_path=INDEX_PATH):
+    """Compile the JSON frequencies into an index file (written atomically) and return its path."""
+    with open(json_path) as f:
+        frequencies = json.load(f)
+
+    keys = [key.encode('utf-8') for key in frequencies]
+    values = np.array(list(frequencies.values()), dtype=np.float64)
+    lengths = np.array([len(key) for key in keys])
+    max_length = int(lengths.max()) if len(keys) else 0
+
+    # Group by byte length, then sort each group bytewise as numpy compares fixed-width bytes
+    order = sorted(range(len(keys)), key=lambda i: (lengths[i], keys[i]))
+    counts = np.bincount(lengths, minlength=max_length + 1)
+    length_table = np.column_stack([np.concatenate([[0], np.cumsum(counts)[:-1]]), counts]).astype('<u8')
+
+    stat = os.stat(json_path)
+    header = HEADER.pack(MAGIC, INDEX_VERSION, max_length, len(keys), stat.st_size, stat.st_mtime_ns,
+                         _source_digest(json_path))
+
+    index_dir = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(index_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(length_table.tobytes())
+            f.write(values[order].astype('<f8').tobytes())
+            f.write(b''.join(keys[i] for i in order))
+        os.replace(tmp_path, index_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return index_path
+
+class WordFrequencyIndex:
+    """A memory-mapped word frequency index; look up single words with get() and batches with lookup()."""
+
+    def __init__(self, index_path=INDEX_PATH):
+        with open(index_path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.max_length, self.entries, self.source_size, self.source_mtime_ns,
+         self.source_digest) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{index_path} is not a version {INDEX_VERSION} word frequency index")
+
+        offset = HEADER.size
+        self._length_table = np.frombuffer(self._map, dtype='<u8', count=2 * (self.max_length + 1),
+                                           offset=offset).reshape(-1, 2)
+        offset += self._length_table.nbytes
+        self.values = np.frombuffer(self._map, dtype='<f8', count=self.entries, offset=offset)
+        offset += self.values.nbytes
+
+        # One fixed-width view of the keys per byte length
+        self._keys = {}
+        for length, (first, count) in enumerate(self._length_table):
+            if count and length:
+                self._keys[length] = (int(first), np.frombuffer(self._map, dtype=f'S{length}', count=int(count),
+                                                                offset=offset))
+                offset += int(count) * length
+
+    def __len__(self):
+        return self.entries
+
+    def is_current(self, json_path=WORD_FREQUENCIES_PATH):
+        """Whether the index was built from the JSON file as it is now (checked by size and mtime, then content)."""
+        stat = os.stat(json_path)
+        if stat.st_size != self.source_size:
+            return False
+        return stat.st_mtime_ns == self.source_mtime_ns or _source_digest(json_path) == self.source_digest
+
+    def lookup(self, tokens, default=1.0):
+        """
+        Zipf values of a sequence of tokens (str) as a float64 array, with default for unknown words.
+        Like word-freq.ts (`frequencies[word] || 1.0`), a stored value of 0 also gives the default.
+        """
+        encoded = np.array([token.encode('utf-8') for token in tokens], dtype=bytes)
+        result = np.full(len(encoded), default, dtype=np.float64)
+        if len(encoded) == 0:
+            return result
+
+        # Count bytes before any narrowing: fixed-width bytes drop trailing NULs, which keys never have
+        lengths = np.char.str_len(encoded)
+        for length in np.unique(lengths):
+            if length not in self._keys:
+                continue
+            first, keys = self._keys[length]
+            selected = np.flatnonzero(lengths == length)
+            queries = encoded[selected].astype(f'S{length}')
+            positions = np.minimum(np.searchsorted(keys, queries), len(keys) - 1)
+            found = keys[positions] == queries
+            values = self.values[first + positions[found]]
+            result[selected[found]] = np.where(values > 0, values, default)
+        return result
+
+    def get(self, word, default=None):
+        """Zipf value of one word, or default."""
+        value = self.lookup([word], np.nan)[0]
+        return default if np.isnan(value) else value
+
+    def close(self):
+        # The views export the map's buffer, so they go first
+        self._length_table = self.values = None
+        self._keys = {}
+        self._map.close()
+
+def open_index(json_path=WORD_FREQUENCIES_PATH, index_path=INDEX_PATH):
+    """Map the index, building or rebuilding it first when it is missing or older than the JSON file."""
+    if os.path.exists(index_path):
+        try:
+            index = WordFrequencyIndex(index_path)
+            if index.is_current(json_path):
+                return index
+            index.close()
+        except (ValueError, struct.error) as e:
+            print(f"Warning: Rebuilding unreadable word frequency index {index_path}: {e}")
+    build_index(json_path, index_path)
+    return WordFrequencyIndex(index_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile word_frequencies.json into a memory-mapped index.')
+    parser.add_argument('--json', default=WORD_FREQUENCIES_PATH,
+                        help='frequencies to compile (default: backend/word_frequencies.json)')
+    parser.add_argument('--output', default=INDEX_PATH, help=f'index file to write (default: {INDEX_PATH})')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json):
+        print(f" File not found: {args.json}")
+        sys.exit(1)
+    index_path = build_index(args.json, args.output)
+    index = WordFrequencyIndex(index_path)
+    print(f" Indexed {len(index)} words ({os.path.getsize(index_path) / 2**20:.2f} MB, "
+          f"JSON {os.path.getsize(args.json) / 2**20:.2f} MB): {index_path}")
+
+if __name__ == "__main__":
+    main()